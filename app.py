@@ -1,23 +1,33 @@
 # Enhanced Flask App with PostgreSQL Integration
 # Professional authentication with password hashing and session management
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, make_response
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, make_response, g, has_app_context, send_file, send_from_directory
 from flask_mail import Mail, Message
+import click
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.extensions
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor, execute_values, Json
 import bcrypt
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 import re
 import io
+import csv
+import base64
+import binascii
 import uuid
 import json
 from functools import wraps
+from werkzeug.utils import secure_filename
 import logging
 from contextlib import contextmanager
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
+import select
 from reportlab.lib.pagesizes import letter, A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -26,6 +36,11 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.pdfgen import canvas
 import tempfile
+import shutil
+import hashlib
+import numpy as np
+from cachetools import TTLCache
+from PIL import Image as PILImage, ImageOps, UnidentifiedImageError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -66,25 +81,305 @@ DATABASE_CONFIG = {
 GOOGLE_DRIVE_FOLDER_ID = os.getenv('GOOGLE_DRIVE_FOLDER_ID', '')
 
 # Database Connection Pool
+# Pool sizing and lifetime are tunable per deployment; each gunicorn worker
+# process owns its own pool.
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_MAX_LIFETIME = int(os.getenv('DB_POOL_MAX_LIFETIME', 1800))  # seconds before a connection is recycled
+DB_POOL_MAX_IDLE = int(os.getenv('DB_POOL_MAX_IDLE', 300))  # seconds before surplus idle connections are closed
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', 5))  # ping connections idle longer than this
+DB_SESSION_TIMEZONE = 'America/Chicago'
+
+class DatabaseConnectionPool:
+    """Thread-safe, fork-aware pool of PostgreSQL connections.
+
+    Connections are opened lazily up to ``max_size`` and the session time zone
+    is set once when each physical connection is created. Idle connections are
+    pinged before reuse, recycled after ``max_lifetime`` seconds, and dropped
+    (without touching the shared socket) when the process forks.
+    """
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=10, max_lifetime=1800,
+                 max_idle=300, timeout=30, health_check_after=5):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self._reset()
+
+    def _reset(self):
+        """Start with an empty pool owned by the current process."""
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = []  # [(conn, last_used)] - most recently used last
+        self._created = {}  # id(conn) -> creation timestamp
+        self._size = 0  # idle + checked out
+        self._pid = os.getpid()
+
+    def _after_fork(self):
+        """Forget connections inherited from the parent process.
+
+        The sockets are shared with the parent, so closing them here would
+        terminate the parent's sessions. Keep references so they are never
+        garbage collected (and therefore never closed) in the child.
+        """
+        inherited = [conn for conn, _ in self._idle]
+        self._inherited = getattr(self, '_inherited', []) + inherited
+        self._reset()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.connect_kwargs)
+        try:
+            # Set timezone to Central Time (Dallas, TX) once per physical connection
+            with conn.cursor() as cur:
+                cur.execute("SET TIME ZONE %s", (DB_SESSION_TIMEZONE,))
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        self._created[id(conn)] = time.monotonic()
+        return conn
+
+    def _expired(self, conn, now):
+        created = self._created.get(id(conn), now)
+        return self.max_lifetime > 0 and now - created >= self.max_lifetime
+
+    def _close(self, conn):
+        self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, last_used, now):
+        if conn.closed or self._expired(conn, now):
+            return False
+        if now - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def warm(self):
+        """Open connections until ``min_size`` are idle in the pool."""
+        self._check_pid()
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self):
+        """Check out a healthy connection, opening one if the pool has room."""
+        self._check_pid()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            stale = []
+            conn = None
+            with self._cond:
+                now = time.monotonic()
+                # Trim surplus connections that have sat idle for too long
+                while (self._idle and self._size > self.min_size
+                       and now - self._idle[0][1] >= self.max_idle):
+                    stale.append(self._idle.pop(0)[0])
+                    self._size -= 1
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    last_used = None
+                else:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise psycopg2.pool.PoolError(
+                            f"Connection pool exhausted ({self.max_size} connections in use)")
+                    self._cond.wait(remaining)
+                    continue
+
+            for old_conn in stale:
+                self._close(old_conn)
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(conn, last_used, time.monotonic()):
+                return conn
+
+            # Unhealthy or expired - drop it and try again
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, rolling back any open transaction."""
+        if self._pid != os.getpid() or id(conn) not in self._created:
+            # Checked out before a fork, or not ours - never reuse it here
+            return
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        now = time.monotonic()
+        if discard or conn.closed or self._expired(conn, now):
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append((conn, now))
+            self._cond.notify()
+
+    def closeall(self):
+        """Close every idle connection owned by this process."""
+        self._check_pid()
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+db_pool = DatabaseConnectionPool(
+    DATABASE_CONFIG,
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    max_lifetime=DB_POOL_MAX_LIFETIME,
+    max_idle=DB_POOL_MAX_IDLE,
+    timeout=DB_POOL_TIMEOUT,
+    health_check_after=DB_POOL_HEALTH_CHECK_AFTER
+)
+
+# gunicorn workers fork after import when preloading; never share sockets with the parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=db_pool._after_fork)
+
 @contextmanager
-def get_db_connection():
-    """Context manager for database connections with automatic cleanup."""
+def _checkout_db_connection():
+    """Check a pooled connection out for the duration of a single block."""
     conn = None
+    discard = False
     try:
-        conn = psycopg2.connect(**DATABASE_CONFIG)
-        # Set timezone to Central Time (Dallas, TX)
-        with conn.cursor() as cur:
-            cur.execute("SET TIME ZONE 'America/Chicago'")
-        conn.commit()
+        conn = db_pool.getconn()
         yield conn
     except Exception as e:
         if conn:
-            conn.rollback()
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            discard = True
         logger.error(f"Database error: {e}")
         raise
     finally:
         if conn:
-            conn.close()
+            db_pool.putconn(conn, discard=discard)
+
+@contextmanager
+def get_db_connection():
+    """Context manager for database connections with automatic cleanup.
+
+    Inside an application context (every request, and background threads that
+    push one) a single pooled connection is shared by the decorators, helpers
+    and handler, and returned to the pool when the context tears down.
+    Outside an application context a connection is checked out per block.
+    """
+    if not has_app_context():
+        with _checkout_db_connection() as conn:
+            yield conn
+        return
+
+    conn = g.get('db_conn')
+    if conn is not None and g.db_conn_depth == 0 and (conn.closed or g.get('db_conn_discard')):
+        # The shared connection broke earlier in this context - replace it
+        g.pop('db_conn')
+        db_pool.putconn(conn, discard=True)
+        conn = None
+    if conn is None:
+        conn = db_pool.getconn()
+        g.db_conn = conn
+        g.db_conn_depth = 0
+        g.db_conn_discard = False
+
+    # A nested block (e.g. log_submission inside a handler's transaction) gets a
+    # savepoint so its failure cannot roll back the enclosing block's work
+    savepoint = None
+    if g.db_conn_depth > 0 and conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INTRANS:
+        savepoint = f"nested_block_{g.db_conn_depth}"
+        with conn.cursor() as cur:
+            cur.execute(f"SAVEPOINT {savepoint}")
+
+    g.db_conn_depth += 1
+    try:
+        yield conn
+    except Exception as e:
+        try:
+            if savepoint and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                except psycopg2.Error:
+                    # Savepoint released by an inner commit - fall back to a full rollback
+                    conn.rollback()
+            else:
+                conn.rollback()
+        except psycopg2.Error:
+            g.db_conn_discard = True
+        if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            g.db_conn_discard = True
+        logger.error(f"Database error: {e}")
+        raise
+    else:
+        if g.db_conn_depth == 1 and not conn.closed:
+            # End any read-only transaction left open, as closing the connection used to
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                g.db_conn_discard = True
+    finally:
+        g.db_conn_depth -= 1
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Return the request-scoped database connection to the pool."""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.putconn(conn, discard=g.pop('db_conn_discard', False))
 
 def init_database():
     """Initialize database connection and create tables on startup."""
@@ -114,6 +409,24 @@ def init_database():
                 """)
                 conn.commit()
                 
+        # Probe optional schema once instead of on every request
+        users_have_password_change_column()
+
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                ensure_email_outbox_table(cur)
+                ensure_weekly_rollups_table(cur)
+                ensure_notification_triggers(cur)
+                ensure_notification_indexes(cur)
+                ensure_pagination_indexes(cur)
+                ensure_vacation_conflict_index(cur)
+                ensure_idempotency_keys_table(cur)
+                ensure_sheet_backfill_table(cur)
+                ensure_image_upload_jobs_table(cur)
+            conn.commit()
+
+        # Open the remaining minimum pool connections up front
+        db_pool.warm()
         logger.info("Database connection successful and tables initialized")
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
@@ -204,6 +517,69 @@ def admin_or_supervisor_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Password change enforcement
+PASSWORD_CHANGE_CHECK_TTL = int(os.getenv('PASSWORD_CHANGE_CHECK_TTL', 300))  # seconds
+
+# Whether users.password_change_required exists; probed once at startup and
+# re-probed (at most every PASSWORD_CHANGE_CHECK_TTL seconds) only while missing
+_password_change_column = {'exists': None, 'checked_at': 0.0}
+
+def users_have_password_change_column(cur=None):
+    """Return True if the users.password_change_required column exists."""
+    exists = _password_change_column['exists']
+    if exists or (exists is not None and
+                  time.time() - _password_change_column['checked_at'] < PASSWORD_CHANGE_CHECK_TTL):
+        return exists
+
+    def probe(cursor):
+        cursor.execute("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = 'users' AND column_name = 'password_change_required'
+        """)
+        return cursor.fetchone() is not None
+
+    if cur is not None:
+        exists = probe(cur)
+    else:
+        with get_db_connection() as conn:
+            with conn.cursor() as new_cur:
+                exists = probe(new_cur)
+
+    if not exists:
+        # Column doesn't exist yet - skip password change enforcement
+        # This allows the app to function while waiting for database migration
+        logger.info("password_change_required column not found - skipping password change enforcement")
+    _password_change_column['exists'] = exists
+    _password_change_column['checked_at'] = time.time()
+    return exists
+
+def cache_password_change_flag(required):
+    """Remember the user's must-change-password flag in their session."""
+    session['password_change_required'] = bool(required)
+    session['password_change_checked_at'] = time.time()
+
+def invalidate_password_change_flag():
+    """Force the next protected request to re-read the flag from the database."""
+    session.pop('password_change_required', None)
+    session.pop('password_change_checked_at', None)
+
+def fetch_password_change_required(user_id):
+    """Read the user's must-change-password flag, caching it in the session."""
+    required = False
+    if users_have_password_change_column():
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT password_change_required 
+                    FROM users 
+                    WHERE id = %s
+                """, (user_id,))
+                user = cur.fetchone()
+                required = bool(user and user.get('password_change_required', False))
+    cache_password_change_flag(required)
+    return required
+
 def password_change_required(f):
     """Decorator to enforce password change for users with temporary passwords."""
     @wraps(f)
@@ -223,41 +599,25 @@ def password_change_required(f):
             user_id = session.get('user_id')
             
             try:
-                with get_db_connection() as conn:
-                    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                        # First check if the password_change_required column exists
-                        cur.execute("""
-                            SELECT column_name 
-                            FROM information_schema.columns 
-                            WHERE table_name = 'users' AND column_name = 'password_change_required'
-                        """)
-                        column_exists = cur.fetchone()
-                        
-                        if column_exists:
-                            # Column exists, check if password change is required
-                            cur.execute("""
-                                SELECT password_change_required 
-                                FROM users 
-                                WHERE id = %s
-                            """, (user_id,))
-                            user = cur.fetchone()
-                            
-                            if user and user.get('password_change_required', False):
-                                # User must change password before accessing any other functionality
-                                if request.path.startswith('/api/') or request.headers.get('Accept', '').startswith('application/json'):
-                                    return jsonify({
-                                        'success': False,
-                                        'message': 'Password change required before accessing this resource',
-                                        'error': 'password_change_required',
-                                        'redirect_url': url_for('set_password')
-                                    }), 403
-                                else:
-                                    flash("You must change your password before accessing the dashboard.", "warning")
-                                    return redirect(url_for('set_password'))
-                        else:
-                            # Column doesn't exist yet - skip password change enforcement
-                            # This allows the app to function while waiting for database migration
-                            logger.info("password_change_required column not found - skipping password change enforcement")
+                # The flag travels with the session so every worker sees the same
+                # value; it is re-read from the database once it goes stale
+                required = session.get('password_change_required')
+                checked_at = session.get('password_change_checked_at', 0)
+                if required is None or time.time() - checked_at >= PASSWORD_CHANGE_CHECK_TTL:
+                    required = fetch_password_change_required(user_id)
+                
+                if required:
+                    # User must change password before accessing any other functionality
+                    if request.path.startswith('/api/') or request.headers.get('Accept', '').startswith('application/json'):
+                        return jsonify({
+                            'success': False,
+                            'message': 'Password change required before accessing this resource',
+                            'error': 'password_change_required',
+                            'redirect_url': url_for('set_password')
+                        }), 403
+                    else:
+                        flash("You must change your password before accessing the dashboard.", "warning")
+                        return redirect(url_for('set_password'))
                             
             except Exception as e:
                 logger.error(f"Error checking password change requirement: {e}")
@@ -283,46 +643,90 @@ def add_cache_control_headers(f):
 def make_session_permanent():
     session.permanent = True
 
-# Google Sheets Configuration (for legacy compatibility if needed)
-try:
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
-    from googleapiclient.discovery import build
-    
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    credentials_path = os.getenv('GOOGLE_CREDENTIALS_PATH', '/etc/secrets/credentials.json')
-    
-    if os.path.exists(credentials_path):
-        creds = ServiceAccountCredentials.from_json_keyfile_name(credentials_path, scope)
-        client = gspread.authorize(creds)
-        drive_service = build('drive', 'v3', credentials=creds)
-        SPREADSHEET_ID = os.getenv('GOOGLE_SPREADSHEET_ID', '15YC7uMlrecjNDuwyT1fzRhipxmtjjzhfibxnLxoYkoQ')
-        SHEET_NAME = "Foreign Material Reports"
-        SPREADSHEET_NAME = 'BAKERY METRICS_2024-2025'
-        
-        # Helper to get latest week sheet name
-        def get_latest_week_sheet():
-            spreadsheet = client.open_by_key(SPREADSHEET_ID)
-            sheet_names = spreadsheet.worksheets()
-            pattern = re.compile(r"(\d{2}-\d{2}-\d{4})_\d{2}-\d{2}-\d{4}")
-
-            def extract_date(sheet):
-                match = pattern.match(sheet.title)
-                if match:
-                    return datetime.strptime(match.group(1), "%m-%d-%Y")
-                return datetime.min
-
-            sorted_sheets = sorted(sheet_names, key=extract_date, reverse=True)
-            return sorted_sheets[0].title if sorted_sheets else ""
-    else:
-        logger.warning("Google credentials not found, Google Sheets functionality disabled")
-        client = None
-        drive_service = None
-        
-except ImportError:
-    logger.warning("Google API libraries not installed, Google Sheets functionality disabled")
-    client = None
-    drive_service = None
+@app.before_request
+def ensure_background_workers():
+    # Resume delivering any queued emails and image uploads in this worker process
+    start_email_outbox_workers()
+    start_image_upload_workers()
+
+# Google API clients
+# Service-account credentials are loaded once per process and shared, so their access
+# token is reused until it expires. Drive and Sheets services are built lazily from the
+# discovery documents bundled with google-api-python-client (no discovery fetch) and
+# cached per thread, because the httplib2 transport behind each service is not
+# thread-safe. The metrics spreadsheet's id is looked up through Drive at most once
+# every GOOGLE_SPREADSHEET_ID_TTL seconds, unless GOOGLE_SPREADSHEET_ID pins it.
+GOOGLE_API_SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+GOOGLE_SPREADSHEET_NAME = 'BAKERY METRICS_2024-2025'
+GOOGLE_SPREADSHEET_ID_TTL = int(os.getenv('GOOGLE_SPREADSHEET_ID_TTL', '3600'))
+_google_clients = {'credentials': None, 'lock': threading.Lock(), 'local': threading.local()}
+_google_spreadsheet_ids = TTLCache(maxsize=16, ttl=GOOGLE_SPREADSHEET_ID_TTL)
+
+class GoogleAPIUnavailable(Exception):
+    """Google API libraries or service-account credentials are missing."""
+
+def google_credentials_path():
+    path = os.getenv('GOOGLE_CREDENTIALS_PATH')
+    if path:
+        return path
+    for candidate in ('/etc/secrets/credentials.json', 'credentials.json'):
+        if os.path.exists(candidate):
+            return candidate
+    return 'credentials.json'
+
+def get_google_credentials():
+    """Shared service-account credentials for this process."""
+    with _google_clients['lock']:
+        if _google_clients['credentials'] is None:
+            try:
+                from google.oauth2.service_account import Credentials
+            except ImportError as e:
+                raise GoogleAPIUnavailable(f'Google API libraries not available: {e}')
+            path = google_credentials_path()
+            if not os.path.exists(path):
+                raise GoogleAPIUnavailable(f'Google credentials file not found at {path}')
+            _google_clients['credentials'] = Credentials.from_service_account_file(path, scopes=GOOGLE_API_SCOPES)
+            logger.info(f"Loaded Google service-account credentials from {path}")
+        return _google_clients['credentials']
+
+def get_google_service(name, version):
+    """This thread's cached client for a Google API, e.g. ('sheets', 'v4')."""
+    services = _google_clients['local'].__dict__.setdefault('services', {})
+    service = services.get((name, version))
+    if service is None:
+        try:
+            from googleapiclient.discovery import build
+        except ImportError as e:
+            raise GoogleAPIUnavailable(f'Google API libraries not available: {e}')
+        # GOOGLE_<API>_API_ENDPOINT points a client at another server, e.g. a local fake
+        endpoint = os.getenv(f'GOOGLE_{name.upper()}_API_ENDPOINT')
+        if endpoint:
+            from google.auth.credentials import AnonymousCredentials
+            credentials = get_google_credentials() if os.path.exists(google_credentials_path()) else AnonymousCredentials()
+            service = build(name, version, credentials=credentials, client_options={'api_endpoint': endpoint},
+                            static_discovery=True, cache_discovery=False)
+        else:
+            service = build(name, version, credentials=get_google_credentials(),
+                            static_discovery=True, cache_discovery=False)
+        services[(name, version)] = service
+    return service
+
+def get_spreadsheet_id(name=GOOGLE_SPREADSHEET_NAME):
+    """Drive id of the named spreadsheet, or None when it does not exist."""
+    if name == GOOGLE_SPREADSHEET_NAME and os.getenv('GOOGLE_SPREADSHEET_ID'):
+        return os.getenv('GOOGLE_SPREADSHEET_ID')
+    with _google_clients['lock']:
+        spreadsheet_id = _google_spreadsheet_ids.get(name)
+    if spreadsheet_id is None:
+        escaped = name.replace('\\', '\\\\').replace("'", "\\'")
+        query = f"name='{escaped}' and mimeType='application/vnd.google-apps.spreadsheet' and trashed=false"
+        files = get_google_service('drive', 'v3').files().list(q=query, fields="files(id)").execute().get('files', [])
+        if not files:
+            return None
+        spreadsheet_id = files[0]['id']
+        with _google_clients['lock']:
+            _google_spreadsheet_ids[name] = spreadsheet_id
+    return spreadsheet_id
 
 # Helper Functions
 def log_submission(user_id, user_name, user_email, submission_type, message, week_sheet=None, day_of_week=None, success=True):
@@ -390,39 +794,996 @@ def update_last_login(user_id):
     except Exception as e:
         logger.error(f"Failed to update last login: {e}")
 
+# Week resolution
+# Nearly every dashboard request resolves "latest" against the active week list,
+# which only changes when weeks are created, deleted or imported. The list is
+# cached per process and re-read when its generation is bumped (shared through
+# the response cache backend when one is configured) or after
+# WEEK_LIST_CACHE_TTL seconds (RESPONSE_CACHE_LOCAL_TTL without a shared backend).
+WEEK_LIST_CACHE_TTL = int(os.getenv('WEEK_LIST_CACHE_TTL', '300'))
+WEEK_LIST_CACHE_TAG = 'week-list'
+_week_list_cache = {'weeks': None, 'generation': None, 'loaded_at': 0.0}
+_week_list_lock = threading.Lock()
+
+def get_active_weeks():
+    """Active week sheets (sheet_name, week_start, week_end), most recently created first."""
+    generation = response_cache.tag_generation(WEEK_LIST_CACHE_TAG)
+    with _week_list_lock:
+        if (_week_list_cache['weeks'] is not None
+                and _week_list_cache['generation'] == generation
+                and time.monotonic() - _week_list_cache['loaded_at'] < response_cache.generation_ttl(WEEK_LIST_CACHE_TTL)):
+            return _week_list_cache['weeks']
+
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT sheet_name, week_start, week_end
+                FROM weekly_sheets
+                WHERE is_active = true
+                ORDER BY created_at DESC
+            """)
+            weeks = [dict(row) for row in cur.fetchall()]
+
+    with _week_list_lock:
+        # Stored under the generation read before the query, so an invalidation
+        # that lands mid-query forces another read next time
+        _week_list_cache.update(weeks=weeks, generation=generation, loaded_at=time.monotonic())
+    return weeks
+
+def invalidate_week_list():
+    """Drop the cached week list everywhere, along with responses that resolved "latest"."""
+    with _week_list_lock:
+        _week_list_cache['weeks'] = None
+    response_cache.invalidate([WEEK_LIST_CACHE_TAG, RESPONSE_CACHE_ALL_WEEKS_TAG])
+
 def get_latest_week_sheet():
     """Get the most recent week sheet."""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT sheet_name
-                    FROM weekly_sheets
-                    WHERE is_active = true
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                """)
-                result = cur.fetchone()
-                return result['sheet_name'] if result else ""
+        weeks = get_active_weeks()
+        return weeks[0]['sheet_name'] if weeks else ""
     except Exception as e:
         logger.error(f"Error getting latest week sheet: {e}")
         return ""
 
+def get_recent_week_sheets(count):
+    """Names of the `count` most recent week sheets by week start date."""
+    weeks = sorted(
+        get_active_weeks(),
+        key=lambda week: (week['week_start'] is not None, week['week_start']),
+        reverse=True
+    )
+    return [week['sheet_name'] for week in weeks[:count]]
+
 def get_all_week_sheets():
     """Get all week sheets ordered by date."""
     try:
+        return [dict(week) for week in get_active_weeks()]
+    except Exception as e:
+        logger.error(f"Error getting week sheets: {e}")
+        return []
+
+# Weekly rollups
+# Per-week dashboard aggregates are computed once when a week's data changes and
+# stored as a single JSONB row, so the dashboard endpoints read one row instead
+# of re-joining week_submissions with the three shift-metric tables.
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+def ensure_weekly_rollups_table(cur):
+    """Create the weekly_rollups table if it doesn't exist."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS weekly_rollups (
+            week_name VARCHAR(100) PRIMARY KEY,
+            rollup JSONB NOT NULL,
+            submission_count INTEGER NOT NULL DEFAULT 0,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def _nonzero_avg(values):
+    """Average of the non-zero values, rounded to 2 places (0 when there are none)."""
+    non_zero_values = [x for x in values if x != 0]
+    return round(sum(non_zero_values) / len(non_zero_values), 2) if non_zero_values else 0
+
+def _build_week_average(fs_rows, ss_rows, bs_rows):
+    """Die cut / shift averages and totals used by the week summary table."""
+    def safe_avg(values):
+        filtered = [float(v) for v in values if v is not None]
+        return sum(filtered) / len(filtered) if filtered else 0
+    
+    def safe_total(values):
+        filtered = [float(v) for v in values if v is not None]
+        return sum(filtered) if filtered else 0
+    
+    # FIRST SHIFT CALCULATIONS
+    first_dc1_oee_avg = safe_avg([row['fs_dc1_oee'] for row in fs_rows])
+    first_dc1_volume_total = safe_total([row['fs_dc1_lbs'] for row in fs_rows])
+    first_dc1_waste_total = safe_total([row['fs_dc1_waste_lb'] for row in fs_rows])
+    first_dc2_oee_avg = safe_avg([row['fs_dc2_oee'] for row in fs_rows])
+    first_dc2_volume_total = safe_total([row['fs_dc2_lbs'] for row in fs_rows])
+    first_dc2_waste_total = safe_total([row['fs_dc2_waste_lb'] for row in fs_rows])
+    first_total_oee_avg = safe_avg([row['fs_oee_avg'] for row in fs_rows])
+    first_total_volume_total = safe_total([row['fs_pounds_total'] for row in fs_rows])
+    first_total_waste_total = first_dc1_waste_total + first_dc2_waste_total
+    
+    # SECOND SHIFT CALCULATIONS
+    second_dc1_oee_avg = safe_avg([row['ss_dc1_oee'] for row in ss_rows])
+    second_dc1_volume_total = safe_total([row['ss_dc1_lbs'] for row in ss_rows])
+    second_dc1_waste_total = safe_total([row['ss_dc1_waste_lb'] for row in ss_rows])
+    second_dc2_oee_avg = safe_avg([row['ss_dc2_oee'] for row in ss_rows])
+    second_dc2_volume_total = safe_total([row['ss_dc2_lbs'] for row in ss_rows])
+    second_dc2_waste_total = safe_total([row['ss_dc2_waste_lb'] for row in ss_rows])
+    second_total_oee_avg = safe_avg([row['ss_oee_avg'] for row in ss_rows])
+    second_total_volume_total = safe_total([row['ss_pounds_total'] for row in ss_rows])
+    second_total_waste_total = second_dc1_waste_total + second_dc2_waste_total
+    
+    # BOTH SHIFTS CALCULATIONS (combine first and second shift data)
+    both_dc1_oee_avg = safe_avg([row['fs_dc1_oee'] for row in fs_rows] + [row['ss_dc1_oee'] for row in ss_rows])
+    both_dc1_volume_total = first_dc1_volume_total + second_dc1_volume_total
+    both_dc1_waste_total = first_dc1_waste_total + second_dc1_waste_total
+    both_dc2_oee_avg = safe_avg([row['fs_dc2_oee'] for row in fs_rows] + [row['ss_dc2_oee'] for row in ss_rows])
+    both_dc2_volume_total = first_dc2_volume_total + second_dc2_volume_total
+    both_dc2_waste_total = first_dc2_waste_total + second_dc2_waste_total
+    both_total_oee_avg = safe_avg([row['bs_oee_avg'] for row in bs_rows])
+    both_total_volume_total = safe_total([row['bs_pounds_total'] for row in bs_rows])
+    both_total_waste_total = both_dc1_waste_total + both_dc2_waste_total
+    
+    def by_shift(first, second, both, digits):
+        return {
+            "first_shift": round(first, digits) if first > 0 else 0,
+            "second_shift": round(second, digits) if second > 0 else 0,
+            "both_shifts": round(both, digits) if both > 0 else 0
+        }
+    
+    def pct(waste, volume):
+        return (waste / volume * 100) if volume > 0 else 0
+    
+    return {
+        "oee": {
+            "die_cut_1": by_shift(first_dc1_oee_avg, second_dc1_oee_avg, both_dc1_oee_avg, 1),
+            "die_cut_2": by_shift(first_dc2_oee_avg, second_dc2_oee_avg, both_dc2_oee_avg, 1),
+            "total": by_shift(first_total_oee_avg, second_total_oee_avg, both_total_oee_avg, 1)
+        },
+        "volume": {
+            "die_cut_1": by_shift(first_dc1_volume_total, second_dc1_volume_total, both_dc1_volume_total, 0),
+            "die_cut_2": by_shift(first_dc2_volume_total, second_dc2_volume_total, both_dc2_volume_total, 0),
+            "total": by_shift(first_total_volume_total, second_total_volume_total, both_total_volume_total, 0)
+        },
+        "waste": {
+            "pounds": {
+                "die_cut_1": by_shift(first_dc1_waste_total, second_dc1_waste_total, both_dc1_waste_total, 1),
+                "die_cut_2": by_shift(first_dc2_waste_total, second_dc2_waste_total, both_dc2_waste_total, 1),
+                "total": by_shift(first_total_waste_total, second_total_waste_total, both_total_waste_total, 1)
+            },
+            "percentage": {
+                "die_cut_1": by_shift(pct(first_dc1_waste_total, first_dc1_volume_total),
+                                      pct(second_dc1_waste_total, second_dc1_volume_total),
+                                      pct(both_dc1_waste_total, both_dc1_volume_total), 1),
+                "die_cut_2": by_shift(pct(first_dc2_waste_total, first_dc2_volume_total),
+                                      pct(second_dc2_waste_total, second_dc2_volume_total),
+                                      pct(both_dc2_waste_total, both_dc2_volume_total), 1),
+                "total": by_shift(pct(first_total_waste_total, first_total_volume_total),
+                                  pct(second_total_waste_total, second_total_volume_total),
+                                  pct(both_total_waste_total, both_total_volume_total), 1)
+            }
+        }
+    }
+
+def _build_weekly_rollup(rows):
+    """Compute every per-day series and per-week aggregate the dashboards need."""
+    def num(value):
+        return float(value or 0)
+
+    # Daily combined / per-shift series (weekly metrics and comprehensive report)
+    series = {key: [0.0] * 5 for key in (
+        'oee', 'waste', 'oee_first_shift', 'oee_second_shift',
+        'waste_first_shift', 'waste_second_shift', 'pounds_first_shift', 'pounds_second_shift'
+    )}
+    # Shift averages straight from the auto-calculated columns (report charts)
+    charts = {shift: {'oee': [0.0] * 5, 'waste': [0.0] * 5, 'production': [0.0] * 5}
+              for shift in ('first_shift', 'second_shift', 'both_shifts')}
+    line_rows = []
+    kpi_rows = []
+    fs_rows, ss_rows, bs_rows = [], [], []
+    weekday_submissions = 0
+
+    for row in rows:
+        day = row['day_of_week']
+        line_rows.append({
+            'day': day,
+            'oee1': row['bs_dc1_oee'], 'oee2': row['bs_dc2_oee'],
+            'pounds1': row['bs_dc1_lbs'], 'pounds2': row['bs_dc2_lbs'],
+            'waste1': row['bs_dc1_waste_lb'], 'waste2': row['bs_dc2_waste_lb']
+        })
+        if row['bs_oee_avg'] is not None:
+            kpi_rows.append(row)
+
+        if day not in WEEKDAYS:
+            continue
+        day_idx = WEEKDAYS.index(day)
+        weekday_submissions += 1
+        if row['fs_dc1_oee'] is not None:
+            fs_rows.append(row)
+        if row['ss_dc1_oee'] is not None:
+            ss_rows.append(row)
+        if row['bs_oee_avg'] is not None:
+            bs_rows.append(row)
+
+        first_oee1, first_oee2 = num(row['fs_dc1_oee']), num(row['fs_dc2_oee'])
+        second_oee1, second_oee2 = num(row['ss_dc1_oee']), num(row['ss_dc2_oee'])
+        first_avg_oee = (first_oee1 + first_oee2) / 2 if first_oee1 > 0 and first_oee2 > 0 else (first_oee1 or first_oee2)
+        second_avg_oee = (second_oee1 + second_oee2) / 2 if second_oee1 > 0 and second_oee2 > 0 else (second_oee1 or second_oee2)
+
+        first_total_pounds = num(row['fs_dc1_lbs']) + num(row['fs_dc2_lbs'])
+        second_total_pounds = num(row['ss_dc1_lbs']) + num(row['ss_dc2_lbs'])
+        first_total_waste = num(row['fs_dc1_waste_lb']) + num(row['fs_dc2_waste_lb'])
+        second_total_waste = num(row['ss_dc1_waste_lb']) + num(row['ss_dc2_waste_lb'])
+        first_waste_pct = (first_total_waste / first_total_pounds * 100) if first_total_pounds > 0 else 0
+        second_waste_pct = (second_total_waste / second_total_pounds * 100) if second_total_pounds > 0 else 0
+
+        # Use auto-calculated combined values from both_shifts_metrics if available
+        if row['bs_oee_avg'] is not None:
+            series['oee'][day_idx] = float(row['bs_oee_avg'])
+        else:
+            series['oee'][day_idx] = (first_avg_oee + second_avg_oee) / 2 if first_avg_oee > 0 and second_avg_oee > 0 else (first_avg_oee or second_avg_oee)
+        if row['bs_waste_avg'] is not None:
+            series['waste'][day_idx] = float(row['bs_waste_avg'])
+        else:
+            series['waste'][day_idx] = (first_waste_pct + second_waste_pct) / 2 if first_waste_pct > 0 and second_waste_pct > 0 else (first_waste_pct or second_waste_pct)
+
+        series['oee_first_shift'][day_idx] = first_avg_oee
+        series['oee_second_shift'][day_idx] = second_avg_oee
+        series['pounds_first_shift'][day_idx] = first_total_pounds
+        series['pounds_second_shift'][day_idx] = second_total_pounds
+        series['waste_first_shift'][day_idx] = first_waste_pct
+        series['waste_second_shift'][day_idx] = second_waste_pct
+
+        for shift, prefix in (('first_shift', 'fs'), ('second_shift', 'ss')):
+            if row[f'{prefix}_oee_avg'] is not None:
+                charts[shift]['oee'][day_idx] = float(row[f'{prefix}_oee_avg'])
+            if row[f'{prefix}_waste_avg'] is not None:
+                charts[shift]['waste'][day_idx] = float(row[f'{prefix}_waste_avg'])
+            if row[f'{prefix}_dc1_lbs'] is not None and row[f'{prefix}_dc2_lbs'] is not None:
+                charts[shift]['production'][day_idx] = float(row[f'{prefix}_dc1_lbs']) + float(row[f'{prefix}_dc2_lbs'])
+        if row['bs_oee_avg'] is not None:
+            charts['both_shifts']['oee'][day_idx] = float(row['bs_oee_avg'])
+        if row['bs_waste_avg'] is not None:
+            charts['both_shifts']['waste'][day_idx] = float(row['bs_waste_avg'])
+        if row['bs_pounds_total'] is not None:
+            charts['both_shifts']['production'][day_idx] = float(row['bs_pounds_total'])
+
+    def positive_avg(values):
+        positive = [v for v in values if v > 0]
+        return round(sum(positive) / len(positive), 2) if positive else 0
+
+    for shift_data in charts.values():
+        shift_data['averages'] = {
+            'oee': positive_avg(shift_data['oee']),
+            'waste': positive_avg(shift_data['waste']),
+            'production': positive_avg(shift_data['production'])
+        }
+
+    kpi_count = len(kpi_rows)
+    kpis = {
+        'avg_oee': sum(num(row['bs_oee_avg']) for row in kpi_rows) / kpi_count if kpi_count else 0,
+        'avg_waste': sum(num(row['bs_waste_avg']) for row in kpi_rows) / kpi_count if kpi_count else 0,
+        'total_production': sum(num(row['bs_pounds_total']) for row in kpi_rows)
+    }
+
+    return {
+        'series': series,
+        'oee_avg': _nonzero_avg(series['oee']),
+        'waste_avg': _nonzero_avg(series['waste']),
+        'total_production': sum(series['pounds_first_shift']) + sum(series['pounds_second_shift']),
+        'charts': charts,
+        'line_rows': [{key: (float(value) if value is not None and key != 'day' else value)
+                       for key, value in line_row.items()} for line_row in line_rows],
+        'kpis': kpis,
+        'week_average': _build_week_average(fs_rows, ss_rows, bs_rows),
+        'data_points': {
+            'first_shift_count': len(fs_rows),
+            'second_shift_count': len(ss_rows),
+            'both_shifts_count': len(bs_rows),
+            'week_submissions': weekday_submissions
+        }
+    }
+
+def refresh_weekly_rollup(conn, week_name):
+    """Recompute and store the rollup for one week, returning it (the caller commits)."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # Serialize refreshes of the same week so the last writer always saw the latest data
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", ('weekly_rollup:' + week_name,))
+        cur.execute("""
+            SELECT
+                ws.day_of_week,
+                fs.die_cut1_oee_pct as fs_dc1_oee, fs.die_cut2_oee_pct as fs_dc2_oee, fs.oee_avg_pct as fs_oee_avg,
+                fs.die_cut1_lbs as fs_dc1_lbs, fs.die_cut2_lbs as fs_dc2_lbs, fs.pounds_total as fs_pounds_total,
+                fs.die_cut1_waste_lb as fs_dc1_waste_lb, fs.die_cut2_waste_lb as fs_dc2_waste_lb, fs.waste_avg_pct as fs_waste_avg,
+                ss.die_cut1_oee_pct as ss_dc1_oee, ss.die_cut2_oee_pct as ss_dc2_oee, ss.oee_avg_pct as ss_oee_avg,
+                ss.die_cut1_lbs as ss_dc1_lbs, ss.die_cut2_lbs as ss_dc2_lbs, ss.pounds_total as ss_pounds_total,
+                ss.die_cut1_waste_lb as ss_dc1_waste_lb, ss.die_cut2_waste_lb as ss_dc2_waste_lb, ss.waste_avg_pct as ss_waste_avg,
+                bs.die_cut1_oee_pct as bs_dc1_oee, bs.die_cut2_oee_pct as bs_dc2_oee, bs.oee_avg_pct as bs_oee_avg,
+                bs.die_cut1_lbs as bs_dc1_lbs, bs.die_cut2_lbs as bs_dc2_lbs, bs.pounds_total as bs_pounds_total,
+                bs.die_cut1_waste_lb as bs_dc1_waste_lb, bs.die_cut2_waste_lb as bs_dc2_waste_lb, bs.waste_avg_pct as bs_waste_avg
+            FROM week_submissions ws
+            LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
+            LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
+            LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
+            WHERE ws.week_name = %s
+            ORDER BY
+                CASE ws.day_of_week
+                    WHEN 'Monday' THEN 1
+                    WHEN 'Tuesday' THEN 2
+                    WHEN 'Wednesday' THEN 3
+                    WHEN 'Thursday' THEN 4
+                    WHEN 'Friday' THEN 5
+                END,
+                ws.created_at
+        """, (week_name,))
+        rows = cur.fetchall()
+
+        rollup = _build_weekly_rollup(rows)
+        cur.execute("""
+            INSERT INTO weekly_rollups (week_name, rollup, submission_count, refreshed_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (week_name) DO UPDATE SET
+                rollup = EXCLUDED.rollup,
+                submission_count = EXCLUDED.submission_count,
+                refreshed_at = CURRENT_TIMESTAMP
+        """, (week_name, Json(rollup), len(rows)))
+    return rollup
+
+def load_weekly_rollups(conn, week_names):
+    """Return {week_name: rollup} for the given weeks, building any that are missing.
+
+    Only weeks that exist in week_submissions or weekly_sheets are built; unknown
+    week names are left out of the result.
+    """
+    week_names = [name for name in week_names if name]
+    if not week_names:
+        return {}
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT week_name, rollup FROM weekly_rollups WHERE week_name = ANY(%s)
+        """, (week_names,))
+        rollups = {row['week_name']: row['rollup'] for row in cur.fetchall()}
+
+        missing = [name for name in week_names if name not in rollups]
+        if not missing:
+            return rollups
+        cur.execute("""
+            SELECT week_name FROM week_submissions WHERE week_name = ANY(%s)
+            UNION
+            SELECT sheet_name FROM weekly_sheets WHERE sheet_name = ANY(%s)
+        """, (missing, missing))
+        known = {row['week_name'] for row in cur.fetchall()}
+
+    for week_name in missing:
+        if week_name in known:
+            # Weeks submitted before rollups existed are built on first read, in their own
+            # transaction so a read never commits the caller's shared connection
+            with _checkout_db_connection() as build_conn:
+                rollups[week_name] = refresh_weekly_rollup(build_conn, week_name)
+                build_conn.commit()
+    return rollups
+
+def load_weekly_rollup(conn, week_name):
+    """Return the rollup for a single week, or None for an unknown week (see load_weekly_rollups)."""
+    return load_weekly_rollups(conn, [week_name]).get(week_name)
+
+def update_weekly_rollup(week_name):
+    """Refresh a week's rollup after a write; drop it for a lazy rebuild if that fails."""
+    try:
+        with get_db_connection() as conn:
+            refresh_weekly_rollup(conn, week_name)
+            conn.commit()
+    except Exception as e:
+        logger.warning(f"Failed to refresh weekly rollup for {week_name}: {e}")
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM weekly_rollups WHERE week_name = %s", (week_name,))
+                conn.commit()
+        except Exception as delete_error:
+            logger.error(f"Failed to drop stale weekly rollup for {week_name}: {delete_error}")
+
+def week_data_changed(week_name):
+    """Bring everything derived from a week's metrics up to date after a write."""
+    update_weekly_rollup(week_name)
+    invalidate_pdf_cache(week_name)
+    invalidate_response_cache(week_name)
+
+# Response cache
+# Dashboard APIs only change when metrics are written, so their JSON responses
+# are cached in an in-process LRU keyed on the endpoint, the normalized query
+# args and the generation of every tag the response depends on. Writers bump the
+# generation of the affected week (and of the "all weeks" tag), so stale entries
+# are never read again and simply age out. Set RESPONSE_CACHE_REDIS_URL to share
+# entries and generations between gunicorn workers; without it another worker's
+# writes are only seen once entries expire, so the process-local TTL stays short.
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '900'))
+RESPONSE_CACHE_LOCAL_TTL = int(os.getenv('RESPONSE_CACHE_LOCAL_TTL', '5'))
+RESPONSE_CACHE_REDIS_URL = os.getenv('RESPONSE_CACHE_REDIS_URL')
+RESPONSE_CACHE_GLOBAL_TAG = '*'
+RESPONSE_CACHE_ALL_WEEKS_TAG = 'weeks'
+
+# Query args that only bust browser caches and never change the response
+RESPONSE_CACHE_IGNORED_ARGS = {'_', 't', 'ts', 'timestamp'}
+
+class ResponseCache:
+    """LRU cache of JSON responses with generation-based tag invalidation."""
+
+    def __init__(self, max_entries, ttl, redis_url=None, local_ttl=RESPONSE_CACHE_LOCAL_TTL):
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._shared = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+        if redis_url and max_entries > 0:
+            try:
+                import redis
+                self._shared = redis.Redis.from_url(redis_url, socket_timeout=1)
+            except ImportError:
+                logger.warning("redis is not installed, response cache is process-local")
+        if self._shared is None:
+            # Generations are per process: bound how long other workers' writes stay invisible
+            ttl = min(ttl, local_ttl)
+        self._local_ttl = local_ttl
+        self._ttl = ttl
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl) if max_entries > 0 and ttl > 0 else None
+
+    @property
+    def enabled(self):
+        return self._entries is not None
+
+    def generation_ttl(self, ttl):
+        """`ttl` for a process-local cache keyed on these tag generations.
+
+        Without a shared backend other workers never see a bumped generation, so the
+        TTL is capped the same way as the cached responses.
+        """
+        return ttl if self._shared is not None else min(ttl, self._local_ttl)
+
+    def _tag_generations(self, tags):
+        tags = [RESPONSE_CACHE_GLOBAL_TAG] + sorted(tags)
+        if self._shared is not None:
+            values = self._shared.mget([f'response_cache:gen:{tag}' for tag in tags])
+            return tuple(int(value or 0) for value in values)
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def tag_generation(self, tag):
+        """Current generation of a single tag, falling back to this process's view."""
+        try:
+            return self._tag_generations([tag])
+        except Exception as e:
+            logger.warning(f"Response cache backend unavailable: {e}")
+            with self._lock:
+                self.errors += 1
+                return (self._generations.get(RESPONSE_CACHE_GLOBAL_TAG, 0), self._generations.get(tag, 0))
+
+    def make_key(self, endpoint, args, tags):
+        """Build the cache key for a request, or None when the backend is unavailable."""
+        normalized = sorted(
+            (name, value) for name, value in args.items(multi=True)
+            if name not in RESPONSE_CACHE_IGNORED_ARGS and value != ''
+        )
+        try:
+            generations = self._tag_generations(tags)
+        except Exception as e:
+            logger.warning(f"Response cache backend unavailable: {e}")
+            with self._lock:
+                self.errors += 1
+            return None
+        raw = json.dumps([endpoint, normalized, sorted(tags), generations])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+        if body is None and self._shared is not None:
+            try:
+                body = self._shared.get(f'response_cache:entry:{key}')
+            except Exception as e:
+                logger.warning(f"Response cache backend unavailable: {e}")
+                with self._lock:
+                    self.errors += 1
+                body = None
+            if body is not None:
+                with self._lock:
+                    self._entries[key] = body
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+        if self._shared is not None:
+            try:
+                self._shared.setex(f'response_cache:entry:{key}', self._ttl, body)
+            except Exception as e:
+                logger.warning(f"Response cache backend unavailable: {e}")
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self.invalidations += 1
+        if self._shared is not None:
+            try:
+                pipe = self._shared.pipeline()
+                for tag in tags:
+                    pipe.incr(f'response_cache:gen:{tag}')
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Failed to invalidate shared response cache {tags}: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'backend': 'redis' if self._shared is not None else 'local',
+                'entries': len(self._entries) if self._entries is not None else 0,
+                'max_entries': self._entries.maxsize if self._entries is not None else 0,
+                'ttl_seconds': self._ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0,
+                'invalidations': self.invalidations,
+                'errors': self.errors
+            }
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_REDIS_URL)
+
+def week_cache_tags(week_arg='week'):
+    """Tag a response with the requested week, or with all weeks for latest/unfiltered requests."""
+    def tags():
+        week = request.args.get(week_arg, '').strip()
+        if week and week.lower() not in ('latest', 'all'):
+            return [f'week:{week}']
+        return [RESPONSE_CACHE_ALL_WEEKS_TAG]
+    return tags
+
+def cached_response(tags=None):
+    """Cache successful JSON responses of a GET endpoint until its tags are invalidated.
+
+    Apply below the auth decorators so access checks still run on every request.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not response_cache.enabled or request.method != 'GET':
+                return f(*args, **kwargs)
+
+            # Resolve the key (and its tag generations) before reading any data, so a
+            # response computed from rows that are being replaced is stored under the
+            # generation that the writer is about to retire.
+            key = response_cache.make_key(request.endpoint, request.args, tags() if tags else [RESPONSE_CACHE_ALL_WEEKS_TAG])
+            if key is None:
+                return f(*args, **kwargs)
+
+            body = response_cache.get(key)
+            if body is not None:
+                response = app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and response.is_json and not g.get('response_cache_skip'):
+                response_cache.set(key, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+    return decorator
+
+def skip_response_cache():
+    """Keep the current response (e.g. an empty fallback after an error) out of the cache."""
+    g.response_cache_skip = True
+
+def invalidate_response_cache(week_name=None):
+    """Retire cached responses for one week (plus latest/all-week views), or for everything."""
+    if week_name:
+        response_cache.invalidate([f'week:{week_name}', RESPONSE_CACHE_ALL_WEEKS_TAG])
+    else:
+        response_cache.invalidate([RESPONSE_CACHE_GLOBAL_TAG])
+
+# Conditional GET
+# Read-heavy endpoints derive a version from cheap change markers (row counts and
+# created_at/updated_at maxima, or the week's rollup refresh time) and answer
+# If-None-Match with 304 before the view builds any JSON.
+def table_change_marker(cur, table, columns=('created_at', 'updated_at')):
+    """Row count plus the latest change timestamps of a table, as a version string."""
+    maxima = ', '.join(f"MAX({column})" for column in columns)
+    cur.execute(f"SELECT COUNT(*), {maxima} FROM {table}")
+    return ':'.join('' if value is None else str(value) for value in cur.fetchone())
+
+def table_version(*tables, columns=('created_at', 'updated_at')):
+    """Version function for conditional_get over one or more tables."""
+    def version():
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                return '|'.join(table_change_marker(cur, table, columns) for table in tables)
+    return version
+
+def conditional_get(version):
+    """Serve a weak ETag built from version() and answer matching If-None-Match with 304.
+
+    version() may return None when no version can be determined, in which case the
+    view runs as usual without an ETag.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                current_version = version(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Could not compute ETag version for {request.endpoint}: {e}")
+                current_version = None
+            if current_version is None:
+                return f(*args, **kwargs)
+
+            normalized_args = sorted(request.args.items(multi=True))
+            raw = json.dumps([request.endpoint, kwargs, normalized_args, current_version], default=str)
+            etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+def weekly_rollup_version():
+    """Version of the week a dashboard request resolves to, from its rollup refresh time."""
+    week = request.args.get('week', 'latest')
+    if week == 'latest':
+        week = get_latest_week_sheet()
+    if not week:
+        return None
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT refreshed_at, submission_count FROM weekly_rollups WHERE week_name = %s
+            """, (week,))
+            row = cur.fetchone()
+    # No rollup yet: let the view build it and skip the ETag this time
+    return f"{week}:{row[0]}:{row[1]}" if row else None
+
+def public_announcements_version():
+    """Announcements change on writes and also when one expires."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            marker = table_change_marker(cur, 'announcements')
+            cur.execute("""
+                SELECT COUNT(*) FROM announcements
+                WHERE is_active = TRUE
+                AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+            """)
+            return f"{marker}:{cur.fetchone()[0]}"
+
+def legal_document_version(document_type):
+    table_mapping = {
+        'privacy': 'privacy_policy',
+        'terms': 'terms_of_service',
+        'cookie': 'cookie_policy',
+        'security': 'security_policy',
+        'compliance': 'compliance_policy'
+    }
+    table_name = table_mapping.get(document_type)
+    return table_version(table_name)() if table_name else None
+
+# Keyset pagination
+# List endpoints seek past the last row of the previous page on their (created_at, id)
+# ordering instead of OFFSET, so every page costs the same however deep it is. The
+# cursor is the ordering key of that last row; totals are optional planner estimates
+# rather than a COUNT(*) over the whole table.
+KEYSET_DEFAULT_LIMIT = int(os.getenv('KEYSET_DEFAULT_LIMIT', '50'))
+KEYSET_MAX_LIMIT = int(os.getenv('KEYSET_MAX_LIMIT', '500'))
+
+def encode_page_cursor(values):
+    """Opaque cursor for the ordering key of a page's last row."""
+    payload = [value.isoformat() if hasattr(value, 'isoformat') else
+               value if value is None or isinstance(value, (bool, int, float, str)) else str(value)
+               for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+def decode_page_cursor(cursor, key_length):
+    """Inverse of encode_page_cursor; raises ValueError for malformed cursors."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (TypeError, AttributeError, UnicodeError, binascii.Error, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid page cursor: {e}")
+    if not isinstance(values, list) or len(values) != key_length or None in values:
+        raise ValueError("Invalid page cursor")
+    return values
+
+def keyset_request_args(default_limit=KEYSET_DEFAULT_LIMIT, max_limit=KEYSET_MAX_LIMIT, limit_arg='limit'):
+    """(limit, cursor, include_total) from the query string; raises ValueError on bad input."""
+    try:
+        limit = int(request.args.get(limit_arg, default_limit))
+    except ValueError:
+        raise ValueError(f"Invalid {limit_arg}")
+    limit = max(1, min(limit, max_limit))
+    cursor = request.args.get('cursor', '').strip() or None
+    include_total = request.args.get('total', '').strip().lower() == 'estimate'
+    return limit, cursor, include_total
+
+def estimate_query_rows(cur, query, params):
+    """Planner row estimate for a query, without executing it."""
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    row = cur.fetchone()
+    plan = row['QUERY PLAN'] if isinstance(row, dict) else row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def fetch_keyset_page(cur, query, params, order_by, limit, cursor=None, conditions=(),
+                      row_key=None, include_total=False):
+    """Fetch one page of `query` ordered by `order_by` (all descending), seeking past `cursor`.
+
+    `query` is a SELECT ... FROM ... without WHERE/ORDER BY; `conditions` are ANDed into
+    its WHERE clause and `params` bind them in order. `order_by` must be non-null
+    expressions ending in a unique column, and `row_key(row)` must return their values
+    for a fetched row (by default the row's columns named like the last part of each
+    expression). A `limit` of None returns every row after the cursor in one page.
+    Returns (rows, pagination) where pagination is ready for jsonify.
+    """
+    order_by = tuple(order_by)
+    if row_key is None:
+        names = [expression.rsplit('.', 1)[-1] for expression in order_by]
+        row_key = lambda row: [row[name] for name in names]
+
+    conditions = list(conditions)
+    params = list(params)
+    filtered_query = query + (" WHERE " + " AND ".join(conditions) if conditions else "")
+    estimated_total = estimate_query_rows(cur, filtered_query, params) if include_total else None
+
+    if cursor:
+        after = decode_page_cursor(cursor, len(order_by))
+        conditions.append(f"({', '.join(order_by)}) < ({', '.join(['%s'] * len(order_by))})")
+        params.extend(after)
+
+    page_query = query + (" WHERE " + " AND ".join(conditions) if conditions else "")
+    page_query += " ORDER BY " + ", ".join(f"{expression} DESC" for expression in order_by)
+    if limit is not None:
+        page_query += " LIMIT %s"
+        params = params + [limit + 1]
+    cur.execute(page_query, params)
+    rows = cur.fetchall()
+
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit]
+    pagination = {
+        'limit': limit,
+        'has_more': has_more,
+        'next_cursor': encode_page_cursor(row_key(rows[-1])) if has_more else None
+    }
+    if estimated_total is not None:
+        pagination['estimated_total'] = max(estimated_total, len(rows))
+    return rows, pagination
+
+def keyset_page_totals(pagination, page, per_page, row_count):
+    """(total, total_pages) for numbered-page UIs: exact on the last page, estimated before it."""
+    seen = (page - 1) * per_page + row_count
+    if pagination['has_more']:
+        total = max(pagination.get('estimated_total') or 0, seen + 1)
+    else:
+        total = seen
+    return total, (total + per_page - 1) // per_page
+
+def ensure_pagination_indexes(cur):
+    """Indexes matching each paginated list's ordering so a page is an index range scan."""
+    indexes = [
+        ('idx_email_activity_log_sent_at_id', 'email_activity_log', '(sent_at, id)'),
+        ('idx_user_reviews_public_featured_order', 'user_reviews',
+         '((COALESCE(is_featured, false)), created_at, id) WHERE is_approved = true'),
+        ('idx_support_tickets_created_at_id', 'support_tickets', '(created_at, id)'),
+        ('idx_vacation_activity_order', 'vacation',
+         '(GREATEST(created_at, COALESCE(updated_at, created_at), COALESCE(decided_at, created_at)), id)'),
+        ('idx_week_submissions_created_at_id', 'week_submissions', '(created_at, id)'),
+        ('idx_issues_created_at_id', 'issues', '(created_at, id)'),
+        ('idx_foreign_material_reports_created_at_id', 'foreign_material_reports', '(created_at, id)'),
+        ('idx_employees_created_at_id', 'employees', '(created_at, id)'),
+        ('idx_submission_logs_created_at_id', 'submission_logs', '(created_at, id)'),
+    ]
+    # Superseded by idx_user_reviews_public_featured_order, which matches the COALESCE ordering
+    cur.execute("DROP INDEX IF EXISTS idx_user_reviews_public_order")
+    for index_name, table, columns in indexes:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        if cur.fetchone()[0]:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} {columns}")
+
+# Idempotent submissions
+# Floor devices queue submissions in the service worker while offline and replay them
+# later, possibly more than once if a response was lost. Each attempt carries an
+# Idempotency-Key header; the first request with a key claims it, and the response it
+# produced is stored so any replay gets that same response back without re-running the
+# handler. Claims whose request never finished are taken over after
+# IDEMPOTENCY_CLAIM_TIMEOUT seconds, and keys are purged after IDEMPOTENCY_KEY_TTL_HOURS,
+# at startup and then by a new claim at most once per IDEMPOTENCY_PURGE_INTERVAL seconds.
+# Pages also send the id of the user who filled the form; a queued submission replayed
+# after someone else logged in on a shared device is refused instead of being recorded
+# under the wrong account.
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+SUBMITTING_USER_HEADER = 'X-Submitting-User'
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+IDEMPOTENCY_CLAIM_TIMEOUT = int(os.getenv('IDEMPOTENCY_CLAIM_TIMEOUT', '120'))
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', '72'))
+IDEMPOTENCY_PURGE_INTERVAL = int(os.getenv('IDEMPOTENCY_PURGE_INTERVAL', '3600'))
+_idempotency_purge = {'at': time.monotonic(), 'lock': threading.Lock()}
+
+def ensure_idempotency_keys_table(cur):
+    """Create the submission_idempotency_keys table and drop expired keys."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS submission_idempotency_keys (
+            user_id VARCHAR(64) NOT NULL,
+            idempotency_key VARCHAR(128) NOT NULL,
+            endpoint VARCHAR(100) NOT NULL,
+            status_code INTEGER,
+            content_type VARCHAR(255),
+            location TEXT,
+            response_body TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            PRIMARY KEY (user_id, idempotency_key)
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_submission_idempotency_keys_created_at
+        ON submission_idempotency_keys (created_at)
+    """)
+    purge_expired_idempotency_keys(cur)
+
+def purge_expired_idempotency_keys(cur):
+    cur.execute("""
+        DELETE FROM submission_idempotency_keys
+        WHERE created_at < CURRENT_TIMESTAMP - make_interval(hours => %s)
+    """, (IDEMPOTENCY_KEY_TTL_HOURS,))
+    return cur.rowcount
+
+def purge_idempotency_keys_if_due():
+    """Drop expired keys if this process has not done so for IDEMPOTENCY_PURGE_INTERVAL seconds."""
+    with _idempotency_purge['lock']:
+        if time.monotonic() - _idempotency_purge['at'] < IDEMPOTENCY_PURGE_INTERVAL:
+            return
+        _idempotency_purge['at'] = time.monotonic()
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                purged = purge_expired_idempotency_keys(cur)
+            conn.commit()
+        if purged:
+            logger.info(f"Purged {purged} expired idempotency keys")
+    except Exception as e:
+        logger.warning(f"Failed to purge expired idempotency keys: {e}")
+
+def idempotent_submission(f):
+    """Decorator that answers replays of an Idempotency-Key with the stored first response."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER, '').strip()
+        user_id = session.get('user_id')
+        submitting_user = request.headers.get(SUBMITTING_USER_HEADER, '').strip()
+        if submitting_user and user_id and submitting_user != str(user_id):
+            return jsonify({
+                'success': False,
+                'message': 'This submission was made by a different user. Log in as that user to send it.',
+                'error_type': 'user_mismatch'
+            }), 409
+        if not key or not user_id:
+            return f(*args, **kwargs)
+
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return jsonify({
+                'success': False,
+                'message': f'{IDEMPOTENCY_KEY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'
+            }), 400
+
+        user_id = str(user_id)
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
-                    SELECT sheet_name, week_start, week_end
-                    FROM weekly_sheets
-                    WHERE is_active = true
-                    ORDER BY created_at DESC
-                """)
-                return cur.fetchall()
+                    INSERT INTO submission_idempotency_keys (user_id, idempotency_key, endpoint)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (user_id, idempotency_key) DO UPDATE
+                    SET created_at = CURRENT_TIMESTAMP
+                    WHERE submission_idempotency_keys.completed_at IS NULL
+                    AND submission_idempotency_keys.endpoint = EXCLUDED.endpoint
+                    AND submission_idempotency_keys.created_at
+                        < CURRENT_TIMESTAMP - make_interval(secs => %s)
+                    RETURNING idempotency_key
+                """, (user_id, key, request.path, IDEMPOTENCY_CLAIM_TIMEOUT))
+                claimed = cur.fetchone() is not None
+                if not claimed:
+                    cur.execute("""
+                        SELECT endpoint, status_code, content_type, location, response_body, completed_at
+                        FROM submission_idempotency_keys
+                        WHERE user_id = %s AND idempotency_key = %s
+                    """, (user_id, key))
+                    stored = cur.fetchone()
+            conn.commit()
+
+        if claimed:
+            purge_idempotency_keys_if_due()
+
+        if not claimed:
+            if stored['endpoint'] != request.path:
+                return jsonify({
+                    'success': False,
+                    'message': f'{IDEMPOTENCY_KEY_HEADER} was already used for a different request'
+                }), 422
+            if stored['completed_at'] is None:
+                response = jsonify({
+                    'success': False,
+                    'message': 'This submission is still being processed',
+                    'error_type': 'request_in_progress'
+                })
+                response.status_code = 409
+                response.headers['Retry-After'] = '5'
+                return response
+
+            logger.info(f"Replaying stored response for {request.path} (idempotency key {key})")
+            response = make_response(stored['response_body'] or '', stored['status_code'])
+            if stored['content_type']:
+                response.headers['Content-Type'] = stored['content_type']
+            if stored['location']:
+                response.headers['Location'] = stored['location']
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            release_idempotency_key(user_id, key)
+            raise
+
+        if response.status_code >= 500 or response.is_streamed:
+            # Let a retry run the handler again
+            release_idempotency_key(user_id, key)
+            return response
+
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE submission_idempotency_keys
+                    SET status_code = %s, content_type = %s, location = %s,
+                        response_body = %s, completed_at = CURRENT_TIMESTAMP
+                    WHERE user_id = %s AND idempotency_key = %s
+                """, (
+                    response.status_code,
+                    response.headers.get('Content-Type'),
+                    response.headers.get('Location'),
+                    response.get_data(as_text=True),
+                    user_id,
+                    key
+                ))
+            conn.commit()
+        return response
+    return decorated_function
+
+def release_idempotency_key(user_id, key):
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM submission_idempotency_keys
+                    WHERE user_id = %s AND idempotency_key = %s AND completed_at IS NULL
+                """, (user_id, key))
+            conn.commit()
     except Exception as e:
-        logger.error(f"Error getting week sheets: {e}")
-        return []
+        logger.error(f"Failed to release idempotency key {key}: {e}")
 
 # Email notification functions
 def get_all_active_users():
@@ -525,95 +1886,442 @@ def create_simple_metrics_email_html(recipient_name):
     """
     return html_content
 
-def send_metrics_notification_async(recipients, subject, html_content, week_name, day_of_week):
-    """Send email notification asynchronously with PDF attachments."""
-    def send_email():
-        daily_pdf_path = None
-        weekly_pdf_path = None
-        
-        try:
-            with app.app_context():
-                # Create PDF attachments
-                daily_pdf_path = create_daily_metrics_pdf(week_name, day_of_week)
-                weekly_pdf_path = create_weekly_summary_pdf(week_name)
-                
-                # Create email message
-                msg = Message(
-                    subject=subject,
-                    recipients=recipients,
-                    html=html_content,
-                    sender=app.config['MAIL_DEFAULT_SENDER']
+def render_metrics_pdf_attachments(week_name, day_of_week, include_daily_pdf=True, include_weekly_pdf=True):
+    """Render the daily and weekly PDFs once and return them as in-memory attachments.
+
+    Returns a list of (filename, data) tuples that can be attached to any number
+    of messages without re-running the queries or the ReportLab layout.
+    """
+    attachments = []
+    if include_daily_pdf:
+        daily_pdf = get_metrics_pdf('daily', week_name, day_of_week)
+        if daily_pdf:
+            attachments.append((f"Daily_Metrics_{week_name}_{day_of_week}.pdf", daily_pdf))
+    if include_weekly_pdf:
+        weekly_pdf = get_metrics_pdf('weekly', week_name)
+        if weekly_pdf:
+            attachments.append((f"Weekly_Summary_{week_name}.pdf", weekly_pdf))
+    return attachments
+
+def attach_metrics_pdfs(msg, attachments):
+    """Attach pre-rendered PDF bytes to a Flask-Mail message."""
+    for filename, data in attachments:
+        msg.attach(
+            filename=filename,
+            content_type="application/pdf",
+            data=data
+        )
+
+# Email outbox
+# Notifications are written to a durable outbox table and delivered by a small,
+# fixed pool of background workers that reuse one SMTP connection per batch.
+EMAIL_OUTBOX_WORKERS = int(os.getenv('EMAIL_OUTBOX_WORKERS', 2))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_BASE = int(os.getenv('EMAIL_OUTBOX_RETRY_BASE', 30))  # seconds, doubled per attempt
+EMAIL_OUTBOX_RETRY_MAX = int(os.getenv('EMAIL_OUTBOX_RETRY_MAX', 3600))  # seconds
+EMAIL_OUTBOX_POLL_INTERVAL = int(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 30))  # seconds
+EMAIL_OUTBOX_STALE_AFTER = int(os.getenv('EMAIL_OUTBOX_STALE_AFTER', 600))  # reclaim 'sending' rows after this
+
+_email_outbox = {'pid': None, 'ready': False, 'wakeup': threading.Event(), 'lock': threading.Lock()}
+
+def ensure_email_outbox_table(cur):
+    """Create the email_outbox table if it doesn't exist."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id SERIAL PRIMARY KEY,
+            email_type VARCHAR(20) NOT NULL DEFAULT 'automatic',
+            recipient VARCHAR(255) NOT NULL,
+            subject TEXT NOT NULL,
+            html_content TEXT NOT NULL,
+            week_name VARCHAR(100),
+            day_of_week VARCHAR(20),
+            include_daily_pdf BOOLEAN NOT NULL DEFAULT true,
+            include_weekly_pdf BOOLEAN NOT NULL DEFAULT true,
+            sent_by VARCHAR(64),
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_at TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_pending
+        ON email_outbox (next_attempt_at)
+        WHERE status IN ('pending', 'sending')
+    """)
+    _email_outbox['ready'] = True
+
+def log_email_activity(email_type, week_name, day_of_week, recipient_count, status, sent_by=None, error_message=None):
+    """Record an email delivery outcome in email_activity_log."""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO email_activity_log 
+                    (type, week_name, day_of_week, recipient_count, status, sent_at, sent_by, error_message)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    email_type, week_name, day_of_week, recipient_count,
+                    status, datetime.now(), sent_by, error_message
+                ))
+            conn.commit()
+    except Exception as log_error:
+        logger.warning(f"Failed to log email activity: {log_error}")
+
+def enqueue_metrics_emails(messages, subject, week_name, day_of_week, email_type='automatic',
+                           include_daily_pdf=True, include_weekly_pdf=True, sent_by=None):
+    """Queue personalized metrics emails in the outbox and wake the workers.
+
+    ``messages`` is a list of (recipient_email, html_content) pairs. The PDF
+    attachments are rendered by the worker, once per batch, when the messages
+    are delivered.
+    """
+    if not messages:
+        return 0
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            if not _email_outbox['ready']:
+                ensure_email_outbox_table(cur)
+            execute_values(cur, """
+                INSERT INTO email_outbox
+                (email_type, recipient, subject, html_content, week_name, day_of_week,
+                 include_daily_pdf, include_weekly_pdf, sent_by)
+                VALUES %s
+            """, [
+                (email_type, recipient, subject, html_content, week_name, day_of_week,
+                 include_daily_pdf, include_weekly_pdf, sent_by)
+                for recipient, html_content in messages
+            ])
+        conn.commit()
+
+    start_email_outbox_workers()
+    _email_outbox['wakeup'].set()
+    return len(messages)
+
+def _claim_outbox_batch():
+    """Lock the next batch of due messages for this worker."""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                UPDATE email_outbox
+                SET status = 'sending', locked_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM email_outbox
+                    WHERE (status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP)
+                       OR (status = 'sending' AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+                    ORDER BY id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
                 )
-                
-                # Attach PDFs if they were created successfully
-                if daily_pdf_path and os.path.exists(daily_pdf_path):
-                    with open(daily_pdf_path, 'rb') as f:
-                        msg.attach(
-                            filename=f"Daily_Metrics_{week_name}_{day_of_week}.pdf",
-                            content_type="application/pdf",
-                            data=f.read()
-                        )
-                    logger.info(f"Attached daily metrics PDF for {week_name} {day_of_week}")
-                
-                if weekly_pdf_path and os.path.exists(weekly_pdf_path):
-                    with open(weekly_pdf_path, 'rb') as f:
-                        msg.attach(
-                            filename=f"Weekly_Summary_{week_name}.pdf",
-                            content_type="application/pdf",
-                            data=f.read()
-                        )
-                    logger.info(f"Attached weekly summary PDF for {week_name}")
-                
-                # Send email
-                mail.send(msg)
-                logger.info(f"Metrics notification email with PDF attachments sent successfully to {len(recipients)} recipients")
-                
-                # Log the email activity
-                try:
-                    with get_db_connection() as conn:
-                        with conn.cursor() as cur:
-                            cur.execute("""
-                                INSERT INTO email_activity_log 
-                                (type, week_name, day_of_week, recipient_count, status, sent_at)
-                                VALUES (%s, %s, %s, %s, %s, %s)
-                            """, (
-                                'automatic', week_name, day_of_week, len(recipients), 
-                                'sent', datetime.now()
-                            ))
-                        conn.commit()
-                except Exception as log_error:
-                    logger.warning(f"Failed to log email activity: {log_error}")
-                
+                RETURNING *
+            """, (EMAIL_OUTBOX_STALE_AFTER, EMAIL_OUTBOX_BATCH_SIZE))
+            rows = cur.fetchall()
+        conn.commit()
+    return sorted(rows, key=lambda row: row['id'])
+
+def _record_outbox_sent(row):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE email_outbox
+                SET status = 'sent', sent_at = CURRENT_TIMESTAMP, locked_at = NULL, last_error = NULL
+                WHERE id = %s
+            """, (row['id'],))
+        conn.commit()
+    log_email_activity(row['email_type'], row['week_name'], row['day_of_week'], 1, 'sent', row['sent_by'])
+
+def _record_outbox_failure(row, error):
+    """Schedule a retry with exponential backoff, or give up after the last attempt."""
+    final = row['attempts'] >= EMAIL_OUTBOX_MAX_ATTEMPTS
+    delay = min(EMAIL_OUTBOX_RETRY_BASE * (2 ** max(row['attempts'] - 1, 0)), EMAIL_OUTBOX_RETRY_MAX)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE email_outbox
+                SET status = %s, locked_at = NULL, last_error = %s,
+                    next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                WHERE id = %s
+            """, ('failed' if final else 'pending', str(error), delay, row['id']))
+        conn.commit()
+    if final:
+        logger.error(f"Giving up on email to {row['recipient']} after {row['attempts']} attempts: {error}")
+        log_email_activity(row['email_type'], row['week_name'], row['day_of_week'], 1, 'failed',
+                           row['sent_by'], str(error))
+    else:
+        logger.warning(f"Email to {row['recipient']} failed (attempt {row['attempts']}), retrying in {delay}s: {error}")
+
+def _mark_outbox_sent(row):
+    """Record a delivered message; never let a bookkeeping error reach the send loop.
+
+    A row left in 'sending' would be reclaimed and the email sent twice, so the
+    write is attempted again before giving up and logging loudly.
+    """
+    for attempt in range(2):
+        try:
+            _record_outbox_sent(row)
+            return True
+        except Exception as e:
+            error = e
+    logger.error(f"Email {row['id']} to {row['recipient']} was sent but could not be marked sent: {error}")
+    return False
+
+def _deliver_outbox_batch(rows):
+    """Send a claimed batch over as few SMTP connections as possible."""
+    # Render each distinct set of PDFs once per batch, before holding an SMTP connection
+    attachments_by_key = {}
+    for row in rows:
+        key = (row['week_name'], row['day_of_week'], row['include_daily_pdf'], row['include_weekly_pdf'])
+        if key in attachments_by_key:
+            continue
+        try:
+            attachments_by_key[key] = render_metrics_pdf_attachments(*key) if row['week_name'] else []
         except Exception as e:
-            logger.error(f"Failed to send metrics notification email: {e}")
-            # Log the failed attempt
+            logger.error(f"Failed to render metrics PDFs for {row['week_name']} {row['day_of_week']}: {e}")
+            attachments_by_key[key] = []
+
+    pending = list(rows)
+    while pending:
+        failed_row = None
+        try:
+            with mail.connect() as smtp:
+                while pending:
+                    row = pending.pop(0)
+                    key = (row['week_name'], row['day_of_week'], row['include_daily_pdf'], row['include_weekly_pdf'])
+                    msg = Message(
+                        subject=row['subject'],
+                        recipients=[row['recipient']],
+                        html=row['html_content'],
+                        sender=app.config['MAIL_DEFAULT_SENDER']
+                    )
+                    attach_metrics_pdfs(msg, attachments_by_key[key])
+                    try:
+                        smtp.send(msg)
+                    except Exception as e:
+                        # The connection may be unusable now - reconnect for the rest
+                        failed_row = row
+                        _record_outbox_failure(row, e)
+                        break
+                    _mark_outbox_sent(row)
+        except Exception as e:
+            if failed_row is None:
+                # Could not open the SMTP connection - retry everything left later
+                logger.error(f"SMTP connection failed: {e}")
+                for row in pending:
+                    _record_outbox_failure(row, e)
+                pending = []
+
+def _email_outbox_worker():
+    """Drain the outbox until it is empty, then wait for new work."""
+    while True:
+        try:
+            while True:
+                with app.app_context():
+                    rows = _claim_outbox_batch()
+                    if not rows:
+                        break
+                    _deliver_outbox_batch(rows)
+                    logger.info(f"Email outbox worker delivered a batch of {len(rows)} messages")
+        except Exception as e:
+            logger.error(f"Email outbox worker error: {e}")
+        _email_outbox['wakeup'].wait(EMAIL_OUTBOX_POLL_INTERVAL)
+        _email_outbox['wakeup'].clear()
+
+def start_email_outbox_workers():
+    """Start the bounded worker pool once per process (threads don't survive a fork)."""
+    if _email_outbox['pid'] == os.getpid():
+        return
+    with _email_outbox['lock']:
+        if _email_outbox['pid'] == os.getpid():
+            return
+        _email_outbox['pid'] = os.getpid()
+        for i in range(max(1, EMAIL_OUTBOX_WORKERS)):
+            worker = threading.Thread(target=_email_outbox_worker, name=f"email-outbox-{i}")
+            worker.daemon = True
+            worker.start()
+        logger.info(f"Started {max(1, EMAIL_OUTBOX_WORKERS)} email outbox workers")
+
+# Live notification stream
+# Triggers on the tables behind the notification feed NOTIFY the app_events
+# channel. Each worker process runs one LISTEN connection that rebuilds the feed
+# once per burst of events and fans it out to every open
+# /api/notifications/stream client, so database load follows the number of
+# events rather than the number of open tabs.
+# Under gthread every open stream holds a request thread for up to
+# SSE_MAX_STREAM_SECONDS, so only a quarter of WEB_THREADS (the Procfile's gunicorn
+# --threads, 8 by default, leaving 6 for forms and dashboards) may stream at once.
+# Raise WEB_THREADS together with SSE_MAX_CLIENTS if more tabs should stream;
+# refused clients fall back to polling /api/notifications.
+NOTIFICATION_CHANNEL = 'app_events'
+NOTIFICATION_TRIGGER_TABLES = ('submission_logs', 'issues', 'weekly_sheets', 'notifications')
+# Audit rows that never appear in the feed; inserting them must not trigger a rebuild
+NOTIFICATION_IGNORED_SUBMISSION_TYPES = ('login', 'logout', 'admin_login')
+WEB_THREADS = int(os.getenv('WEB_THREADS', '8'))
+SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', str(max(1, WEB_THREADS // 4))))
+SSE_HEARTBEAT_INTERVAL = int(os.getenv('SSE_HEARTBEAT_INTERVAL', '25'))
+SSE_MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', '600'))
+SSE_EVENT_DEBOUNCE = float(os.getenv('SSE_EVENT_DEBOUNCE', '1.0'))
+SSE_CLIENT_QUEUE_SIZE = 20
+
+_notification_stream = {
+    'pid': None,
+    'lock': threading.Lock(),
+    'clients': set(),
+    'feed': None,
+    'feed_built_at': 0.0
+}
+
+def ensure_notification_triggers(cur):
+    """Install the NOTIFY function and statement-level triggers on the feed tables."""
+    # Several workers may initialize at once; DDL on the same tables must not race
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('notify_app_event'))")
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_app_event() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{NOTIFICATION_CHANNEL}', json_build_object('table', TG_TABLE_NAME, 'op', TG_OP)::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    ignored_types = ', '.join(f"'{submission_type}'" for submission_type in NOTIFICATION_IGNORED_SUBMISSION_TYPES)
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_submission_log_insert() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM new_rows WHERE COALESCE(submission_type, '') NOT IN ({ignored_types})) THEN
+                PERFORM pg_notify('{NOTIFICATION_CHANNEL}', json_build_object('table', TG_TABLE_NAME, 'op', TG_OP)::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in NOTIFICATION_TRIGGER_TABLES:
+        # submission_logs inserts are filtered through a transition table (those triggers
+        # can only fire on one event), so logins and logouts don't rebuild the feed
+        filter_inserts = table == 'submission_logs'
+        trigger_name = f'{table}_notify_insert' if filter_inserts else f'{table}_notify_app_event'
+        cur.execute("""
+            SELECT to_regclass(%s) IS NOT NULL,
+                   EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(%s) AND tgname = %s)
+        """, (table, table, trigger_name))
+        table_exists, trigger_exists = cur.fetchone()
+        if not table_exists or trigger_exists:
+            continue
+        if filter_inserts:
+            cur.execute(f"DROP TRIGGER IF EXISTS {table}_notify_app_event ON {table}")
+            cur.execute(f"""
+                CREATE TRIGGER {table}_notify_insert
+                AFTER INSERT ON {table}
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_submission_log_insert()
+            """)
+        cur.execute(f"""
+            CREATE TRIGGER {table}_notify_app_event
+            AFTER {'UPDATE OR DELETE' if filter_inserts else 'INSERT OR UPDATE OR DELETE'} ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_app_event()
+        """)
+
+def _sse_message(event, payload):
+    return f"event: {event}\ndata: {app.json.dumps(payload)}\n\n"
+
+def _build_notification_feed_message():
+    """Render the current notification feed as an SSE message."""
+    notifications = fetch_recent_notifications()
+    return _sse_message('notifications', {
+        'success': True,
+        'notifications': notifications,
+        'count': len(notifications)
+    })
+
+def _broadcast_sse(message):
+    with _notification_stream['lock']:
+        clients = list(_notification_stream['clients'])
+    for client in clients:
+        try:
+            client.put_nowait(message)
+        except queue.Full:
+            # A client that stopped reading is dropped; it reconnects and gets a fresh feed
+            with _notification_stream['lock']:
+                _notification_stream['clients'].discard(client)
             try:
-                with get_db_connection() as conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO email_activity_log 
-                            (type, week_name, day_of_week, recipient_count, status, sent_at, error_message)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            'automatic', week_name, day_of_week, len(recipients), 
-                            'failed', datetime.now(), str(e)
-                        ))
-                    conn.commit()
-            except:
+                while True:
+                    client.get_nowait()
+            except queue.Empty:
                 pass
-        finally:
-            # Clean up temporary PDF files
-            for pdf_path in [daily_pdf_path, weekly_pdf_path]:
-                if pdf_path and os.path.exists(pdf_path):
+            client.put_nowait(None)
+
+def _publish_notification_changes(changes):
+    """Fan a burst of table changes (and the rebuilt feed) out to connected clients."""
+    with _notification_stream['lock']:
+        has_clients = bool(_notification_stream['clients'])
+    if not has_clients:
+        # Nobody to tell; the next client builds the feed when it connects
+        _notification_stream['feed'] = None
+        return
+    for change in changes:
+        _broadcast_sse(_sse_message('change', change))
+    with app.app_context():
+        feed = _build_notification_feed_message()
+    _notification_stream['feed'] = feed
+    _notification_stream['feed_built_at'] = time.monotonic()
+    _broadcast_sse(feed)
+
+def _notification_listener():
+    """LISTEN on the app_events channel, reconnecting with backoff."""
+    backoff = 1
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(**DATABASE_CONFIG)
+            conn.set_session(autocommit=True)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {NOTIFICATION_CHANNEL}")
+            logger.info(f"Listening for {NOTIFICATION_CHANNEL} notifications")
+            backoff = 1
+            # Anything that happened while (re)connecting is folded into a fresh feed
+            _publish_notification_changes([])
+            while True:
+                if not select.select([conn], [], [], 60)[0]:
+                    continue
+                conn.poll()
+                # Coalesce a burst (e.g. a submission writing several tables) into one rebuild
+                time.sleep(SSE_EVENT_DEBOUNCE)
+                conn.poll()
+                changes = []
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
                     try:
-                        os.unlink(pdf_path)
-                    except Exception as e:
-                        logger.warning(f"Failed to clean up PDF file {pdf_path}: {e}")
-    
-    # Start email sending in a separate thread to not block the main request
-    thread = threading.Thread(target=send_email)
-    thread.daemon = True
-    thread.start()
+                        change = json.loads(notify.payload)
+                    except ValueError:
+                        continue
+                    if change not in changes:
+                        changes.append(change)
+                if changes:
+                    _publish_notification_changes(changes)
+        except Exception as e:
+            logger.error(f"Notification listener error: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+        finally:
+            if conn is not None and not conn.closed:
+                conn.close()
+
+def start_notification_listener():
+    """Start the listener thread once per process (threads don't survive a fork)."""
+    if _notification_stream['pid'] == os.getpid():
+        return
+    with _notification_stream['lock']:
+        if _notification_stream['pid'] == os.getpid():
+            return
+        _notification_stream['pid'] = os.getpid()
+        _notification_stream['clients'] = set()
+        _notification_stream['feed'] = None
+        listener = threading.Thread(target=_notification_listener, name="notification-listener")
+        listener.daemon = True
+        listener.start()
 
 def send_metrics_notification(metrics_data, week_name, day_of_week, submitted_by):
     """Send metrics notification to users with enabled email preferences and PDF attachments."""
@@ -644,7 +2352,8 @@ def send_metrics_notification(metrics_data, week_name, day_of_week, submitted_by
         # Prepare email content with simplified message
         subject = "Daily and Weekly Bakery Metrics"
         
-        # Send individual emails to each user with their name
+        # Build an individual email for each user with their name
+        messages = []
         for user in users:
             # Get user's first name for personalization
             first_name = user.get('first_name', '').strip()
@@ -660,11 +2369,12 @@ def send_metrics_notification(metrics_data, week_name, day_of_week, submitted_by
                 user_name = email_name
             
             html_content = create_simple_metrics_email_html(user_name)
-            
-            # Send email asynchronously with PDF attachments
-            send_metrics_notification_async([user['email']], subject, html_content, week_name, day_of_week)
+            messages.append((user['email'], html_content))
         
-        logger.info(f"Initiated simplified metrics notification emails with PDF attachments to {len(users)} users with enabled preferences")
+        # Queue the emails; the outbox workers render the PDF attachments once and share them
+        enqueue_metrics_emails(messages, subject, week_name, day_of_week)
+        
+        logger.info(f"Queued simplified metrics notification emails with PDF attachments to {len(users)} users with enabled preferences")
         return True
         
     except Exception as e:
@@ -674,7 +2384,7 @@ def send_metrics_notification(metrics_data, week_name, day_of_week, submitted_by
 # PDF Generation Functions (Global)
 
 def create_daily_metrics_pdf(week_name, day_of_week):
-    """Create simple, well-formatted PDF table for daily metrics."""
+    """Create simple, well-formatted PDF table for daily metrics and return its bytes."""
     # Get data from both_shifts_metrics table for combined totals
     try:
         with get_db_connection() as conn:
@@ -729,12 +2439,12 @@ def create_daily_metrics_pdf(week_name, day_of_week):
     if not metrics_data:
         return None
     
-    # Create temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+    # Render into memory - nothing touches the disk
+    buffer = io.BytesIO()
     
     try:
         # Create PDF document with portrait orientation
-        doc = SimpleDocTemplate(temp_file.name, pagesize=letter,
+        doc = SimpleDocTemplate(buffer, pagesize=letter,
                               rightMargin=72, leftMargin=72,
                               topMargin=72, bottomMargin=72)
         
@@ -1032,19 +2742,14 @@ def create_daily_metrics_pdf(week_name, day_of_week):
         
         # Build PDF
         doc.build(elements)
-        return temp_file.name
+        return buffer.getvalue()
         
     except Exception as e:
         logger.error(f"Error creating daily metrics PDF: {e}")
-        # Clean up temp file on error
-        try:
-            os.unlink(temp_file.name)
-        except:
-            pass
         return None
 
 def create_weekly_summary_pdf(week_name):
-    """Create simple, well-formatted PDF table for weekly summary."""
+    """Create simple, well-formatted PDF table for weekly summary and return its bytes."""
     # Get data for each day of the week
     try:
         with get_db_connection() as conn:
@@ -1087,12 +2792,12 @@ def create_weekly_summary_pdf(week_name):
     if not weekly_data:
         return None
     
-    # Create temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+    # Render into memory - nothing touches the disk
+    buffer = io.BytesIO()
     
     try:
         # Create PDF document with portrait orientation
-        doc = SimpleDocTemplate(temp_file.name, pagesize=letter,
+        doc = SimpleDocTemplate(buffer, pagesize=letter,
                               rightMargin=72, leftMargin=72,
                               topMargin=72, bottomMargin=72)
         
@@ -1615,60 +3320,528 @@ def create_weekly_summary_pdf(week_name):
         
         # Build PDF
         doc.build(elements)
-        return temp_file.name
+        return buffer.getvalue()
         
     except Exception as e:
         logger.error(f"Error creating weekly summary PDF: {e}")
-        # Clean up temp file on error
+        return None
+
+# PDF cache
+# Rendered PDFs are stored on local disk under a key derived from the week, the
+# day and a fingerprint of every row (and KPI target) the report is built from,
+# so any new submission or target change produces a new key. Least recently
+# used files are evicted once the directory grows past PDF_CACHE_MAX_BYTES.
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'bakery_metrics_pdf_cache'))
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', 50 * 1024 * 1024))  # 0 disables the cache
+
+_pdf_cache_lock = threading.Lock()
+
+def metrics_pdf_fingerprint(week_name, day_of_week=None):
+    """Hash the metrics rows and KPI targets a week (or single day) report depends on."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT md5(COALESCE(string_agg(
+                    concat_ws('|', ws.id, ws.day_of_week, ws.submitted_by, ws.created_at,
+                              fs::text, ss::text, bs::text),
+                    ';' ORDER BY ws.created_at, ws.id), ''))
+                FROM week_submissions ws
+                LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
+                LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
+                LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
+                WHERE ws.week_name = %s AND (%s IS NULL OR ws.day_of_week = %s)
+            """, (week_name, day_of_week, day_of_week))
+            rows_hash = cur.fetchone()[0]
+
+            targets_hash = ''
+            cur.execute("SELECT to_regclass('kpi_targets') IS NOT NULL")
+            if cur.fetchone()[0]:
+                cur.execute("""
+                    SELECT md5(COALESCE(string_agg(kt::text, ';' ORDER BY kt.id), ''))
+                    FROM kpi_targets kt
+                """)
+                targets_hash = cur.fetchone()[0]
+    return f"{rows_hash}:{targets_hash}"
+
+def _pdf_cache_week_prefix(week_name):
+    return hashlib.sha1(week_name.encode('utf-8')).hexdigest()[:16]
+
+def _pdf_cache_path(kind, week_name, day_of_week, fingerprint):
+    content_key = hashlib.sha256(f"{kind}|{day_of_week or ''}|{fingerprint}".encode('utf-8')).hexdigest()[:32]
+    return os.path.join(PDF_CACHE_DIR, f"{_pdf_cache_week_prefix(week_name)}_{kind}_{content_key}.pdf")
+
+def _pdf_cache_read(path):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)  # Mark as recently used
+        return data
+    except OSError:
+        return None
+
+def _pdf_cache_write(path, data):
+    try:
+        os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+        # Write atomically so concurrent workers never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write PDF cache entry {path}: {e}")
+        return
+
+    with _pdf_cache_lock:
+        try:
+            entries = []
+            for entry in os.scandir(PDF_CACHE_DIR):
+                if entry.is_file() and entry.name.endswith('.pdf'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, old_path in sorted(entries):
+                if total <= PDF_CACHE_MAX_BYTES:
+                    break
+                try:
+                    os.unlink(old_path)
+                    total -= size
+                except OSError:
+                    pass
+        except OSError as e:
+            logger.warning(f"Failed to evict PDF cache entries: {e}")
+
+def invalidate_pdf_cache(week_name=None):
+    """Drop cached PDFs for one week, or for every week when week_name is None."""
+    prefix = _pdf_cache_week_prefix(week_name) + '_' if week_name else ''
+    with _pdf_cache_lock:
+        try:
+            for entry in os.scandir(PDF_CACHE_DIR):
+                if entry.name.endswith('.pdf') and entry.name.startswith(prefix):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to invalidate PDF cache: {e}")
+
+def get_metrics_pdf(kind, week_name, day_of_week=None):
+    """Return the bytes of the 'daily' or 'weekly' metrics PDF, using the disk cache."""
+    day_key = day_of_week if kind == 'daily' else None
+
+    path = None
+    if PDF_CACHE_MAX_BYTES > 0:
+        try:
+            path = _pdf_cache_path(kind, week_name, day_key, metrics_pdf_fingerprint(week_name, day_key))
+        except Exception as e:
+            logger.warning(f"Could not fingerprint {kind} PDF for {week_name}: {e}")
+        if path:
+            data = _pdf_cache_read(path)
+            if data:
+                logger.info(f"PDF cache hit for {kind} report {week_name} {day_key or ''}".rstrip())
+                return data
+
+    if kind == 'daily':
+        data = create_daily_metrics_pdf(week_name, day_of_week)
+    else:
+        data = create_weekly_summary_pdf(week_name)
+    if not data:
+        return None
+
+    if path:
+        _pdf_cache_write(path, data)
+    return data
+
+# Image uploads
+# Report images are streamed to a spool file and recorded as a job, and the report gets
+# a placeholder URL (/api/report-images/<job id>) that serves the spooled file until the
+# upload finishes. A small pool of background workers claims jobs from the durable
+# image_upload_jobs table and hands them to the configured storage backend: Google
+# Drive, uploaded in resumable chunks whose session survives restarts, or the local
+# filesystem. A finished job writes its final URL into fm_report_images.
+# Before the original is stored, the worker derives a small thumbnail and a screen-sized
+# display variant with Pillow and stores them through the same backend, so report views
+# never have to download full-resolution phone photos just to render a page.
+IMAGE_STORAGE_BACKEND = os.getenv('IMAGE_STORAGE_BACKEND', 'drive' if GOOGLE_DRIVE_FOLDER_ID else 'local')
+IMAGE_UPLOAD_SPOOL_DIR = os.getenv('IMAGE_UPLOAD_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'bakery_metrics_image_spool'))
+IMAGE_LOCAL_STORAGE_DIR = os.getenv('IMAGE_LOCAL_STORAGE_DIR', os.path.join(app.root_path, 'uploads', 'images'))
+IMAGE_UPLOAD_CHUNK_SIZE = int(os.getenv('IMAGE_UPLOAD_CHUNK_SIZE', str(5 * 1024 * 1024)))  # multiple of 256 KiB
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv('IMAGE_UPLOAD_MAX_BYTES', str(25 * 1024 * 1024)))
+IMAGE_UPLOAD_WORKERS = int(os.getenv('IMAGE_UPLOAD_WORKERS', 1))
+IMAGE_UPLOAD_MAX_ATTEMPTS = int(os.getenv('IMAGE_UPLOAD_MAX_ATTEMPTS', 5))
+IMAGE_UPLOAD_RETRY_BASE = int(os.getenv('IMAGE_UPLOAD_RETRY_BASE', 30))  # seconds, doubled per attempt
+IMAGE_UPLOAD_POLL_INTERVAL = int(os.getenv('IMAGE_UPLOAD_POLL_INTERVAL', 60))  # seconds
+IMAGE_UPLOAD_STALE_AFTER = int(os.getenv('IMAGE_UPLOAD_STALE_AFTER', 900))  # reclaim 'uploading' jobs after this
+IMAGE_UPLOAD_MIMETYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/heic': '.heic'
+}
+
+# Longest edge in pixels for each derived variant
+IMAGE_VARIANT_SIZES = {
+    'thumbnail': int(os.getenv('IMAGE_THUMBNAIL_SIZE', 320)),
+    'display': int(os.getenv('IMAGE_DISPLAY_SIZE', 1600))
+}
+IMAGE_VARIANT_FORMAT = os.getenv('IMAGE_VARIANT_FORMAT', 'WEBP').upper()  # WEBP or JPEG
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', 80))
+IMAGE_VARIANT_FORMATS = {'WEBP': ('image/webp', '.webp'), 'JPEG': ('image/jpeg', '.jpg')}
+if IMAGE_VARIANT_FORMAT not in IMAGE_VARIANT_FORMATS:
+    logger.warning(f"Unsupported IMAGE_VARIANT_FORMAT '{IMAGE_VARIANT_FORMAT}', using WEBP")
+    IMAGE_VARIANT_FORMAT = 'WEBP'
+# Largest image the worker will decode; a 50 MP RGB frame is ~150 MB in memory, which is
+# already more than a phone photo needs. Bigger files are stored without variants.
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 50_000_000))
+PILImage.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+
+_image_uploads = {'pid': None, 'wakeup': threading.Event(), 'lock': threading.Lock()}
+
+def ensure_image_upload_jobs_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS image_upload_jobs (
+            id SERIAL PRIMARY KEY,
+            report_id VARCHAR(64),
+            image_name VARCHAR(255) NOT NULL,
+            mimetype VARCHAR(100) NOT NULL,
+            size_bytes BIGINT NOT NULL,
+            spool_path TEXT NOT NULL,
+            backend VARCHAR(20) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            resumable_uri TEXT,
+            bytes_uploaded BIGINT NOT NULL DEFAULT 0,
+            final_url TEXT,
+            thumbnail_url TEXT,
+            display_url TEXT,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_at TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_image_upload_jobs_pending
+        ON image_upload_jobs (next_attempt_at)
+        WHERE status IN ('pending', 'uploading')
+    """)
+    cur.execute("""
+        ALTER TABLE image_upload_jobs
+        ADD COLUMN IF NOT EXISTS thumbnail_url TEXT,
+        ADD COLUMN IF NOT EXISTS display_url TEXT
+    """)
+    cur.execute("SELECT to_regclass('fm_report_images') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("""
+            ALTER TABLE fm_report_images
+            ADD COLUMN IF NOT EXISTS thumbnail_url TEXT,
+            ADD COLUMN IF NOT EXISTS display_url TEXT
+        """)
+
+class LocalImageStorage:
+    """Copies images under IMAGE_LOCAL_STORAGE_DIR, served by /uploads/images/<name>."""
+
+    def upload(self, job, save_progress):
+        os.makedirs(IMAGE_LOCAL_STORAGE_DIR, exist_ok=True)
+        filename = f"{job['id']}_{secure_filename(job['image_name']) or 'image'}"
+        tmp_path = os.path.join(IMAGE_LOCAL_STORAGE_DIR, f".{filename}.tmp")
+        shutil.copyfile(job['spool_path'], tmp_path)
+        os.replace(tmp_path, os.path.join(IMAGE_LOCAL_STORAGE_DIR, filename))
+        return f"/uploads/images/{filename}"
+
+class DriveImageStorage:
+    """Resumable, chunked upload into GOOGLE_DRIVE_FOLDER_ID, shared as anyone-with-link."""
+
+    def upload(self, job, save_progress):
+        try:
+            from googleapiclient.http import MediaFileUpload
+        except ImportError as e:
+            raise GoogleAPIUnavailable(f'Google API libraries not available: {e}')
+
+        drive_service = get_google_service('drive', 'v3')
+        media = MediaFileUpload(job['spool_path'], mimetype=job['mimetype'],
+                                chunksize=IMAGE_UPLOAD_CHUNK_SIZE, resumable=True)
+        upload_request = drive_service.files().create(
+            body={'name': f"{uuid.uuid4()}_{job['image_name']}", 'parents': [GOOGLE_DRIVE_FOLDER_ID]},
+            media_body=media,
+            fields='id'
+        )
+        if job['resumable_uri']:
+            # Continue the session of an interrupted attempt after its last acknowledged chunk
+            upload_request.resumable_uri = job['resumable_uri']
+            upload_request.resumable_progress = job['bytes_uploaded']
+
+        uploaded_file = None
+        while uploaded_file is None:
+            status, uploaded_file = upload_request.next_chunk(num_retries=3)
+            if status is not None:
+                save_progress(upload_request.resumable_uri, status.resumable_progress)
+
+        drive_service.permissions().create(
+            fileId=uploaded_file['id'],
+            body={'type': 'anyone', 'role': 'reader'}
+        ).execute()
+        return f"https://drive.google.com/uc?id={uploaded_file['id']}"
+
+# Storage backends by IMAGE_STORAGE_BACKEND name; register others here
+IMAGE_STORAGE_BACKENDS = {
+    'local': LocalImageStorage,
+    'drive': DriveImageStorage
+}
+
+def image_placeholder_url(job_id):
+    return f"/api/report-images/{job_id}"
+
+def enqueue_image_upload(image_file, report_id=None):
+    """Spool an uploaded image and queue it for the storage backend.
+
+    Returns the job id and the placeholder URL recorded for the report. Raises
+    ValueError for unsupported or oversized files.
+    """
+    if image_file.mimetype not in IMAGE_UPLOAD_MIMETYPES:
+        raise ValueError(f'Unsupported image type: {image_file.mimetype or "unknown"}')
+    if IMAGE_STORAGE_BACKEND not in IMAGE_STORAGE_BACKENDS:
+        raise ValueError(f'Unknown image storage backend: {IMAGE_STORAGE_BACKEND}')
+
+    os.makedirs(IMAGE_UPLOAD_SPOOL_DIR, exist_ok=True)
+    fd, spool_path = tempfile.mkstemp(dir=IMAGE_UPLOAD_SPOOL_DIR, suffix=IMAGE_UPLOAD_MIMETYPES[image_file.mimetype])
+    try:
+        size = 0
+        with os.fdopen(fd, 'wb') as spool:
+            while True:
+                chunk = image_file.stream.read(1024 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > IMAGE_UPLOAD_MAX_BYTES:
+                    raise ValueError(f'Image exceeds the {IMAGE_UPLOAD_MAX_BYTES // (1024 * 1024)} MB limit')
+                spool.write(chunk)
+
+        image_name = (image_file.filename or 'image')[:255]
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO image_upload_jobs (report_id, image_name, mimetype, size_bytes, spool_path, backend)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    RETURNING id
+                """, (str(report_id) if report_id is not None else None, image_name,
+                      image_file.mimetype, size, spool_path, IMAGE_STORAGE_BACKEND))
+                job_id = cur.fetchone()[0]
+                if report_id is not None:
+                    cur.execute("""
+                        INSERT INTO fm_report_images (report_id, image_url, image_name)
+                        VALUES (%s, %s, %s)
+                    """, (report_id, image_placeholder_url(job_id), image_name))
+            conn.commit()
+    except Exception:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+        raise
+
+    start_image_upload_workers()
+    _image_uploads['wakeup'].set()
+    return {'job_id': job_id, 'url': image_placeholder_url(job_id), 'status': 'pending'}
+
+def image_variant_path(spool_path, variant):
+    return f"{spool_path}.{variant}{IMAGE_VARIANT_FORMATS[IMAGE_VARIANT_FORMAT][1]}"
+
+def build_image_variants(spool_path):
+    """Write downscaled copies of a spooled image next to it.
+
+    Returns {variant: path}, largest first, or {} when Pillow cannot read the image
+    (e.g. HEIC without a plugin) or it exceeds IMAGE_MAX_PIXELS; the original is
+    still uploaded in that case.
+    """
+    largest = max(IMAGE_VARIANT_SIZES.values())
+    try:
+        with PILImage.open(spool_path) as original:
+            # Pillow only refuses images over twice MAX_IMAGE_PIXELS, so enforce the limit itself
+            if original.width * original.height > IMAGE_MAX_PIXELS:
+                raise PILImage.DecompressionBombError(
+                    f'{original.width}x{original.height} exceeds {IMAGE_MAX_PIXELS} pixels')
+            # JPEG decoders can scale down while decoding, which is far cheaper than resizing
+            original.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(original)
+            has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+            if IMAGE_VARIANT_FORMAT == 'WEBP' and has_alpha:
+                image = image.convert('RGBA')
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            paths = {}
+            # Shrink progressively so each variant is resampled from the previous one
+            for variant, size in sorted(IMAGE_VARIANT_SIZES.items(), key=lambda item: -item[1]):
+                if max(image.size) > size:
+                    image = image.copy()
+                    image.thumbnail((size, size), PILImage.LANCZOS)
+                path = image_variant_path(spool_path, variant)
+                tmp_path = f"{path}.tmp"
+                if IMAGE_VARIANT_FORMAT == 'WEBP':
+                    image.save(tmp_path, 'WEBP', quality=IMAGE_VARIANT_QUALITY, method=4)
+                else:
+                    image.save(tmp_path, 'JPEG', quality=IMAGE_VARIANT_QUALITY, optimize=True, progressive=True)
+                os.replace(tmp_path, path)
+                paths[variant] = path
+            return paths
+    except (UnidentifiedImageError, PILImage.DecompressionBombError, OSError, ValueError) as e:
+        logger.warning(f"Could not derive image variants for {spool_path}: {e}")
+        return {}
+
+def upload_image_variants(job, storage):
+    """Derive and store the thumbnail and display variants once per job.
+
+    The resulting URLs are saved on the job as soon as they exist, so a retry after
+    the original fails does not redo this work.
+    """
+    if job['thumbnail_url'] or job['display_url']:
+        return {'thumbnail': job['thumbnail_url'], 'display': job['display_url']}
+
+    mimetype, extension = IMAGE_VARIANT_FORMATS[IMAGE_VARIANT_FORMAT]
+    stem = os.path.splitext(job['image_name'])[0] or 'image'
+    urls = {}
+    for variant, path in build_image_variants(job['spool_path']).items():
+        variant_job = {
+            'id': job['id'],
+            'spool_path': path,
+            'image_name': f"{stem}_{variant}{extension}",
+            'mimetype': mimetype,
+            'resumable_uri': None,
+            'bytes_uploaded': 0
+        }
+        # Variants are small enough to go up in a single chunk, so progress isn't tracked
+        urls[variant] = storage.upload(variant_job, lambda uri, uploaded: None)
+
+    if urls:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE image_upload_jobs SET thumbnail_url = %s, display_url = %s
+                    WHERE id = %s
+                """, (urls.get('thumbnail'), urls.get('display'), job['id']))
+            conn.commit()
+    return {'thumbnail': urls.get('thumbnail'), 'display': urls.get('display')}
+
+def upload_image_to_drive(image_file, report_id=None):
+    """Queue an image for upload and return the URL to record for it right away."""
+    return enqueue_image_upload(image_file, report_id)['url']
+
+def _claim_image_upload_job():
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                UPDATE image_upload_jobs
+                SET status = 'uploading', locked_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM image_upload_jobs
+                    WHERE (status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP)
+                       OR (status = 'uploading' AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+                    ORDER BY id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+            """, (IMAGE_UPLOAD_STALE_AFTER,))
+            job = cur.fetchone()
+        conn.commit()
+    return job
+
+def _save_image_upload_progress(job_id, resumable_uri, bytes_uploaded):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE image_upload_jobs
+                SET resumable_uri = %s, bytes_uploaded = %s, locked_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (resumable_uri, bytes_uploaded, job_id))
+        conn.commit()
+
+def _record_image_upload_done(job, final_url, variant_urls):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE image_upload_jobs
+                SET status = 'done', final_url = %s, completed_at = CURRENT_TIMESTAMP,
+                    locked_at = NULL, last_error = NULL
+                WHERE id = %s
+            """, (final_url, job['id']))
+            if job['report_id'] is not None:
+                cur.execute("""
+                    UPDATE fm_report_images
+                    SET image_url = %s, thumbnail_url = %s, display_url = %s
+                    WHERE image_url = %s
+                """, (final_url, variant_urls['thumbnail'], variant_urls['display'],
+                      image_placeholder_url(job['id'])))
+        conn.commit()
+    for path in [job['spool_path']] + [image_variant_path(job['spool_path'], v) for v in IMAGE_VARIANT_SIZES]:
         try:
-            os.unlink(temp_file.name)
-        except:
+            os.remove(path)
+        except OSError:
             pass
-        return None
+    logger.info(f"Image upload {job['id']} finished: {final_url}")
+
+def _record_image_upload_failure(job, error):
+    """Retry with exponential backoff, or give up after the last attempt."""
+    final = job['attempts'] >= IMAGE_UPLOAD_MAX_ATTEMPTS or not os.path.exists(job['spool_path'])
+    delay = IMAGE_UPLOAD_RETRY_BASE * (2 ** max(job['attempts'] - 1, 0))
+    # An expired or unknown resumable session has to start over
+    restart = getattr(getattr(error, 'resp', None), 'status', None) in (404, 410)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE image_upload_jobs
+                SET status = %s, locked_at = NULL, last_error = %s,
+                    next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                    resumable_uri = CASE WHEN %s THEN NULL ELSE resumable_uri END,
+                    bytes_uploaded = CASE WHEN %s THEN 0 ELSE bytes_uploaded END
+                WHERE id = %s
+            """, ('failed' if final else 'pending', str(error), delay, restart, restart, job['id']))
+        conn.commit()
+    if final:
+        logger.error(f"Giving up on image upload {job['id']} after {job['attempts']} attempts: {error}")
+    else:
+        logger.warning(f"Image upload {job['id']} failed (attempt {job['attempts']}), retrying in {delay}s: {error}")
 
-# Google Drive image upload function (keeping existing functionality)
-def upload_image_to_drive(image_file):
-    """Upload image to Google Drive and return public URL."""
-    try:
-        # Import Google API components only when needed
+def _image_upload_worker():
+    """Upload queued images one at a time until none are due, then wait for new work."""
+    while True:
         try:
-            from googleapiclient.discovery import build
-            from googleapiclient.http import MediaIoBaseUpload
-            from oauth2client.service_account import ServiceAccountCredentials
-        except ImportError as import_error:
-            logger.error(f"Google API libraries not available: {import_error}")
-            raise Exception("Google Drive upload functionality is not available due to missing dependencies")
-        
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        creds_path = os.getenv('GOOGLE_CREDENTIALS_PATH', '/etc/secrets/credentials.json')
-        creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-        drive_service = build('drive', 'v3', credentials=creds)
-
-        file_metadata = {
-            'name': f"{uuid.uuid4()}_{image_file.filename}",
-            'parents': [GOOGLE_DRIVE_FOLDER_ID]
-        }
-
-        image_stream = io.BytesIO(image_file.read())
-        media = MediaIoBaseUpload(image_stream, mimetype=image_file.mimetype)
-
-        uploaded_file = drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
-
-        # Make the image public
-        drive_service.permissions().create(
-            fileId=uploaded_file['id'],
-            body={'type': 'anyone', 'role': 'reader'}
-        ).execute()
-
-        return f"https://drive.google.com/uc?id={uploaded_file['id']}"
-
-    except Exception as e:
-        logger.error(f"Image upload error: {e}")
-        raise
+            while True:
+                with app.app_context():
+                    job = _claim_image_upload_job()
+                    if not job:
+                        break
+                    try:
+                        storage = IMAGE_STORAGE_BACKENDS[job['backend']]()
+                        variant_urls = upload_image_variants(job, storage)
+                        final_url = storage.upload(
+                            job,
+                            lambda uri, uploaded: _save_image_upload_progress(job['id'], uri, uploaded)
+                        )
+                    except Exception as e:
+                        _record_image_upload_failure(job, e)
+                        continue
+                    _record_image_upload_done(job, final_url, variant_urls)
+        except Exception as e:
+            logger.error(f"Image upload worker error: {e}")
+        _image_uploads['wakeup'].wait(IMAGE_UPLOAD_POLL_INTERVAL)
+        _image_uploads['wakeup'].clear()
+
+def start_image_upload_workers():
+    """Start the upload workers once per process (threads don't survive a fork)."""
+    if _image_uploads['pid'] == os.getpid():
+        return
+    with _image_uploads['lock']:
+        if _image_uploads['pid'] == os.getpid():
+            return
+        _image_uploads['pid'] = os.getpid()
+        for i in range(max(1, IMAGE_UPLOAD_WORKERS)):
+            worker = threading.Thread(target=_image_upload_worker, name=f"image-upload-{i}")
+            worker.daemon = True
+            worker.start()
+        logger.info(f"Started {max(1, IMAGE_UPLOAD_WORKERS)} image upload workers")
 
 # Routes
 @app.route('/')
@@ -1812,6 +3985,7 @@ def login():
 
     # Set session variables
     session['user_id'] = str(user['id'])
+    invalidate_password_change_flag()
     session['email'] = user['email']
     
     # Handle case where last_name might contain email (data integrity issue)
@@ -1846,21 +4020,15 @@ def login():
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cur:
-                    # Check if password_change_required column exists and set it
-                    cur.execute("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name = 'users' AND column_name = 'password_change_required'
-                    """)
-                    column_exists = cur.fetchone()
-                    
-                    if column_exists:
+                    # Set the password_change_required flag if the column exists
+                    if users_have_password_change_column(cur):
                         cur.execute("""
                             UPDATE users 
                             SET password_change_required = true, updated_at = CURRENT_TIMESTAMP 
                             WHERE id = %s
                         """, (user['id'],))
                         conn.commit()
+                        cache_password_change_flag(True)
         except Exception as e:
             logger.error(f"Error setting password_change_required flag: {e}")
         
@@ -2204,6 +4372,7 @@ def create_firebase_session():
         
         # Create Flask session
         session['user_id'] = str(user['id'])
+        invalidate_password_change_flag()
         session['email'] = user['email'] if user['email'] else None
         session['phone'] = user['phone']
         session['user_full_name'] = f"{user['first_name']} {user['last_name']}"
@@ -2286,6 +4455,7 @@ def admin_login():
 
     # Set admin session
     session['user_id'] = str(user['id'])
+    invalidate_password_change_flag()
     session['email'] = user['email']
     
     # Handle case where last_name might contain email (data integrity issue)
@@ -2600,14 +4770,7 @@ def first_time_password_setup():
                 new_password_hash = hash_password(new_password)
                 
                 # Check if password_change_required column exists and update accordingly
-                cur.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'users' AND column_name = 'password_change_required'
-                """)
-                column_exists = cur.fetchone()
-                
-                if column_exists:
+                if users_have_password_change_column(cur):
                     cur.execute("""
                         UPDATE users SET 
                             password_hash = %s, 
@@ -2634,7 +4797,8 @@ def first_time_password_setup():
                     'First-time password setup completed'
                 )
 
-                # Clear session to force re-authentication with new password
+                # Clear session (and the cached password change flag) to force re-authentication
+                invalidate_password_change_flag()
                 session.clear()
                 
                 # Redirect to congratulatory success page
@@ -2690,14 +4854,7 @@ def set_password():
                 new_password_hash = hash_password(new_password)
                 
                 # Check if password_change_required column exists
-                cur.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'users' AND column_name = 'password_change_required'
-                """)
-                column_exists = cur.fetchone()
-                
-                if column_exists:
+                if users_have_password_change_column(cur):
                     # Column exists, update password and mark as completed
                     cur.execute("""
                         UPDATE users SET 
@@ -2719,7 +4876,8 @@ def set_password():
 
                 flash("Password updated successfully! Please log in again with your new password.", "success")
                 
-                # Clear session to force re-authentication
+                # Clear session (and the cached password change flag) to force re-authentication
+                invalidate_password_change_flag()
                 session.clear()
                 
                 # Redirect to login page
@@ -2759,6 +4917,7 @@ def form():
 @app.route('/submit', methods=['POST'])
 @login_required
 @password_change_required
+@idempotent_submission
 def submit():
     user_id = session.get('user_id')
     user_name = session.get('user_full_name')
@@ -2974,6 +5133,7 @@ def submit():
                 logger.info("Committing database transaction")
                 conn.commit()
                 logger.info("Database transaction committed successfully")
+                week_data_changed(week_name)
 
                 message = "✅ Submission successful." if updated else "⚠️ No new data submitted."
                 
@@ -3092,6 +5252,7 @@ def inventory():
 
 @app.route('/submit-inventory', methods=['POST'])
 @login_required
+@idempotent_submission
 def submit_inventory():
     user_id = session.get('user_id')
     user_email = session.get('email')
@@ -3593,7 +5754,7 @@ def send_manual_email_alert():
                 "message": "Admin access required"
             }), 403
         
-        # Capture user_id from session before starting background thread
+        # Capture user_id from session to attribute the queued emails
         current_user_id = session.get('user_id')
         
         data = request.get_json()
@@ -3699,113 +5860,33 @@ def send_manual_email_alert():
         # Create email content with simplified format
         subject = "Daily and Weekly Bakery Metrics"
         
-        # Send email with PDF attachments
-        def send_email():
-            daily_pdf_path = None
-            weekly_pdf_path = None
+        # Build a personalized email for each recipient
+        messages = []
+        for user in recipient_users:
+            # Get user's full name or use first name as fallback
+            first_name = user.get('first_name', '').strip()
+            last_name = user.get('last_name', '').strip()
             
-            try:
-                with app.app_context():
-                    # Create PDF attachments if requested
-                    if include_daily_pdf:
-                        daily_pdf_path = create_daily_metrics_pdf(week_name, day_of_week)
-                    if include_weekly_pdf:
-                        weekly_pdf_path = create_weekly_summary_pdf(week_name)
-                    
-                    # Send personalized emails to each recipient
-                    for user in recipient_users:
-                        # Get user's full name or use first name as fallback
-                        first_name = user.get('first_name', '').strip()
-                        last_name = user.get('last_name', '').strip()
-                        
-                        if first_name:
-                            recipient_name = first_name
-                        elif first_name and last_name:
-                            recipient_name = f"{first_name} {last_name}".strip()
-                        else:
-                            # Fallback to extracting name from email if no name is available
-                            email_name = user['email'].split('@')[0].replace('.', ' ').replace('_', ' ').title()
-                            recipient_name = email_name
-                        
-                        # Create personalized email content
-                        html_content = create_simple_metrics_email_html(recipient_name)
-                        
-                        # Create email message for this specific recipient
-                        msg = Message(
-                            subject=subject,
-                            recipients=[user['email']],
-                            html=html_content,
-                            sender=app.config['MAIL_DEFAULT_SENDER']
-                        )
-                        
-                        # Attach PDFs if they were created successfully
-                        if daily_pdf_path and os.path.exists(daily_pdf_path):
-                            with open(daily_pdf_path, 'rb') as f:
-                                msg.attach(
-                                    filename=f"Daily_Metrics_{week_name}_{day_of_week}.pdf",
-                                    content_type="application/pdf",
-                                    data=f.read()
-                                )
-                            logger.info(f"Attached daily metrics PDF for {week_name} {day_of_week}")
-                        
-                        if weekly_pdf_path and os.path.exists(weekly_pdf_path):
-                            with open(weekly_pdf_path, 'rb') as f:
-                                msg.attach(
-                                    filename=f"Weekly_Summary_{week_name}.pdf",
-                                    content_type="application/pdf",
-                                    data=f.read()
-                                )
-                            logger.info(f"Attached weekly summary PDF for {week_name}")
-                        
-                        # Send email to this recipient
-                        mail.send(msg)
-                        logger.info(f"Manual email alert sent to {user['email']} (as {recipient_name})")
-                    
-                    logger.info(f"Manual email alert sent successfully to {len(recipient_users)} recipients")
-                    
-                    # Log the email activity
-                    with get_db_connection() as conn:
-                        with conn.cursor() as cur:
-                            cur.execute("""
-                                INSERT INTO email_activity_log 
-                                (type, week_name, day_of_week, recipient_count, status, sent_at, sent_by)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            """, (
-                                'manual', week_name, day_of_week, len(recipient_users), 
-                                'sent', datetime.now(), current_user_id
-                            ))
-                        conn.commit()
-                    
-            except Exception as e:
-                logger.error(f"Failed to send manual email alert: {e}")
-                # Log the failed attempt
-                try:
-                    with get_db_connection() as conn:
-                        with conn.cursor() as cur:
-                            cur.execute("""
-                                INSERT INTO email_activity_log 
-                                (type, week_name, day_of_week, recipient_count, status, sent_at, sent_by, error_message)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                            """, (
-                                'manual', week_name, day_of_week, len(recipient_users), 
-                                'failed', datetime.now(), current_user_id, str(e)
-                            ))
-                        conn.commit()
-                except:
-                    pass
-            finally:
-                # Clean up temporary PDF files
-                for pdf_path in [daily_pdf_path, weekly_pdf_path]:
-                    if pdf_path and os.path.exists(pdf_path):
-                        try:
-                            os.unlink(pdf_path)
-                        except Exception as e:
-                            logger.warning(f"Failed to clean up PDF file {pdf_path}: {e}")
-        
-        # Start email sending in a separate thread
-        thread = threading.Thread(target=send_email)
-        thread.daemon = True
-        thread.start()
+            if first_name:
+                recipient_name = first_name
+            elif first_name and last_name:
+                recipient_name = f"{first_name} {last_name}".strip()
+            else:
+                # Fallback to extracting name from email if no name is available
+                email_name = user['email'].split('@')[0].replace('.', ' ').replace('_', ' ').title()
+                recipient_name = email_name
+            
+            messages.append((user['email'], create_simple_metrics_email_html(recipient_name)))
+        
+        # Queue the emails; the outbox workers attach the requested PDFs and send them
+        enqueue_metrics_emails(
+            messages, subject, week_name, day_of_week,
+            email_type='manual',
+            include_daily_pdf=include_daily_pdf,
+            include_weekly_pdf=include_weekly_pdf,
+            sent_by=current_user_id
+        )
+        logger.info(f"Manual email alert queued for {len(recipient_users)} recipients")
         
         return jsonify({
             "success": True,
@@ -3822,22 +5903,16 @@ def send_manual_email_alert():
 @app.route('/api/email-activity-log', methods=['GET'])
 @admin_required
 def get_email_activity_log():
-    """Get email activity log with pagination."""
+    """Get email activity log with keyset pagination."""
     try:
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 5))
-        offset = (page - 1) * per_page
+        # Get pagination parameters; page is only echoed back for display
+        page = max(1, int(request.args.get('page', 1)))
+        per_page, cursor, _ = keyset_request_args(default_limit=5, max_limit=100, limit_arg='per_page')
         
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get total count
-                cur.execute("SELECT COUNT(*) as total FROM email_activity_log")
-                total_result = cur.fetchone()
-                total_count = total_result['total'] if total_result else 0
-                
-                # Get paginated activities with user names
-                cur.execute("""
+                # Get the page of activities with user names
+                activities, pagination = fetch_keyset_page(cur, """
                     SELECT 
                         eal.id,
                         eal.type as email_type,
@@ -3853,11 +5928,8 @@ def get_email_activity_log():
                         u.email as sent_by_email
                     FROM email_activity_log eal
                     LEFT JOIN users u ON eal.sent_by = u.id
-                    ORDER BY eal.sent_at DESC
-                    LIMIT %s OFFSET %s
-                """, (per_page, offset))
-                
-                activities = cur.fetchall()
+                """, (), ('eal.sent_at', 'eal.id'), per_page, cursor,
+                    row_key=lambda row: (row['sent_date'], row['id']), include_total=True)
                 
                 # Convert to list of dictionaries with proper formatting
                 activity_list = []
@@ -3910,10 +5982,8 @@ def get_email_activity_log():
                         'sent_by_email': activity['sent_by_email']
                     })
                 
-                # Calculate pagination info
-                total_pages = (total_count + per_page - 1) // per_page
-                has_next = page < total_pages
-                has_prev = page > 1
+                # Calculate pagination info (totals are planner estimates)
+                total_count, total_pages = keyset_page_totals(pagination, page, per_page, len(activity_list))
                 
                 return jsonify({
                     "success": True,
@@ -3923,11 +5993,17 @@ def get_email_activity_log():
                         "per_page": per_page,
                         "total": total_count,
                         "total_pages": total_pages,
-                        "has_next": has_next,
-                        "has_prev": has_prev
+                        "has_next": pagination['has_more'],
+                        "has_prev": page > 1,
+                        "next_cursor": pagination['next_cursor']
                     }
                 })
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error getting email activity log: {e}")
         return jsonify({
@@ -4244,10 +6320,12 @@ def admin_to_report():
 @admin_required
 def get_submission_logs():
     try:
+        limit, cursor, include_total = keyset_request_args(default_limit=1000, max_limit=1000)
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
+                logs, pagination = fetch_keyset_page(cur, """
                     SELECT 
+                        sl.id,
                         sl.user_name as name,
                         sl.user_email as email,
                         sl.created_at as timestamp,
@@ -4257,21 +6335,22 @@ def get_submission_logs():
                         sl.submission_type,
                         sl.success
                     FROM submission_logs sl
-                    ORDER BY sl.created_at DESC
-                    LIMIT 1000
-                """)
-                logs = cur.fetchall()
+                """, (), ('sl.created_at', 'sl.id'), limit, cursor,
+                    row_key=lambda row: (row['timestamp'], row['id']), include_total=include_total)
 
                 # Format timestamps for frontend
                 formatted_logs = []
                 for log in logs:
                     formatted_log = dict(log)
+                    formatted_log.pop('id', None)
                     if formatted_log['timestamp']:
                         formatted_log['timestamp'] = formatted_log['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
                     formatted_logs.append(formatted_log)
 
-                return jsonify({"logs": formatted_logs})
+                return jsonify({"logs": formatted_logs, "pagination": pagination})
 
+    except ValueError as e:
+        return jsonify({"logs": [], "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching submission logs: {e}")
         return jsonify({"logs": [], "error": str(e)})
@@ -4279,6 +6358,8 @@ def get_submission_logs():
 @app.route('/api/weekly-metrics')
 @login_required
 @password_change_required
+@conditional_get(weekly_rollup_version)
+@cached_response(week_cache_tags())
 def get_weekly_metrics():
     """API endpoint for weekly metrics data with filtering support"""
     week = request.args.get('week', 'latest')
@@ -4298,192 +6379,33 @@ def get_weekly_metrics():
 
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get combined metrics data from the both_shifts_metrics table (auto-calculated)
-                query = """
-                    SELECT
-                        ws.day_of_week,
-                        -- Combined auto-calculated data from both_shifts_metrics
-                        bs.die_cut1_oee_pct as combined_die_cut1_oee_pct,
-                        bs.die_cut2_oee_pct as combined_die_cut2_oee_pct,
-                        bs.oee_avg_pct as combined_oee_avg,
-                        bs.die_cut1_lbs as combined_die_cut1_pounds,
-                        bs.die_cut2_lbs as combined_die_cut2_pounds,
-                        bs.pounds_total as combined_pounds_total,
-                        bs.die_cut1_waste_lb as combined_die_cut1_waste_lbs,
-                        bs.die_cut2_waste_lb as combined_die_cut2_waste_lbs,
-                        bs.die_cut1_waste_pct as combined_die_cut1_waste_pct,
-                        bs.die_cut2_waste_pct as combined_die_cut2_waste_pct,
-                        bs.waste_avg_pct as combined_waste_avg,
-                        -- Individual shift data for detailed breakdown
-                        fs.die_cut1_oee_pct as first_die_cut1_oee_pct,
-                        fs.die_cut2_oee_pct as first_die_cut2_oee_pct,
-                        fs.die_cut1_lbs as first_die_cut1_pounds,
-                        fs.die_cut2_lbs as first_die_cut2_pounds,
-                        fs.die_cut1_waste_lb as first_die_cut1_waste_lbs,
-                        fs.die_cut2_waste_lb as first_die_cut2_waste_lbs,
-                        ss.die_cut1_oee_pct as second_die_cut1_oee_pct,
-                        ss.die_cut2_oee_pct as second_die_cut2_oee_pct,
-                        ss.die_cut1_lbs as second_die_cut1_pounds,
-                        ss.die_cut2_lbs as second_die_cut2_pounds,
-                        ss.die_cut1_waste_lb as second_die_cut1_waste_lbs,
-                        ss.die_cut2_waste_lb as second_die_cut2_waste_lbs,
-                        ss.waste_avg_pct as second_shift_waste_db_avg,
-                        ss.oee_avg_pct as second_shift_oee_db_avg
-                    FROM week_submissions ws
-                    LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
-                    LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
-                    LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
-                    WHERE ws.week_name = %s
-                    ORDER BY
-                        CASE ws.day_of_week
-                            WHEN 'Monday' THEN 1
-                            WHEN 'Tuesday' THEN 2
-                            WHEN 'Wednesday' THEN 3
-                            WHEN 'Thursday' THEN 4
-                            WHEN 'Friday' THEN 5
-                        END
-                """
-                
-                cur.execute(query, [week])
-                metrics_data = cur.fetchall()
-
-                # Organize data for response
-                days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-                
-                # Initialize data structures with float values
-                oee_data = [0.0] * 5
-                waste_data = [0.0] * 5
-                oee_first_shift = [0.0] * 5
-                waste_first_shift = [0.0] * 5
-                oee_second_shift = [0.0] * 5
-                waste_second_shift = [0.0] * 5
-                pounds_first_shift = [0.0] * 5
-                pounds_second_shift = [0.0] * 5
-
-                # Process metrics data using auto-calculated values where available
-                for metric in metrics_data:
-                    if metric['day_of_week'] not in days:
-                        continue
-                        
-                    day_idx = days.index(metric['day_of_week'])
-                    
-                    # Use auto-calculated combined values from both_shifts_metrics if available
-                    if metric['combined_oee_avg'] is not None:
-                        # Use the database's auto-calculated combined OEE average
-                        oee_data[day_idx] = float(metric['combined_oee_avg'])
-                    else:
-                        # Fallback to manual calculation if combined data not available
-                        first_oee1 = float(metric['first_die_cut1_oee_pct'] or 0)
-                        first_oee2 = float(metric['first_die_cut2_oee_pct'] or 0)
-                        second_oee1 = float(metric['second_die_cut1_oee_pct'] or 0)
-                        second_oee2 = float(metric['second_die_cut2_oee_pct'] or 0)
-                        
-                        first_avg_oee = (first_oee1 + first_oee2) / 2 if first_oee1 > 0 and first_oee2 > 0 else (first_oee1 or first_oee2)
-                        second_avg_oee = (second_oee1 + second_oee2) / 2 if second_oee1 > 0 and second_oee2 > 0 else (second_oee1 or second_oee2)
-                        combined_oee = (first_avg_oee + second_avg_oee) / 2 if first_avg_oee > 0 and second_avg_oee > 0 else (first_avg_oee or second_avg_oee)
-                        oee_data[day_idx] = combined_oee
-                    
-                    # Use auto-calculated combined waste percentage if available
-                    if metric['combined_waste_avg'] is not None:
-                        waste_data[day_idx] = float(metric['combined_waste_avg'])
-                        logger.info(f"🔧 DEBUG Weekly Metrics - Day: {metric['day_of_week']}, Using DB combined_waste: {metric['combined_waste_avg']}%")
-                    else:
-                        # Fallback to manual calculation
-                        first_pounds1 = float(metric['first_die_cut1_pounds'] or 0)
-                        first_pounds2 = float(metric['first_die_cut2_pounds'] or 0)
-                        second_pounds1 = float(metric['second_die_cut1_pounds'] or 0)
-                        second_pounds2 = float(metric['second_die_cut2_pounds'] or 0)
-                        first_waste1 = float(metric['first_die_cut1_waste_lbs'] or 0)
-                        first_waste2 = float(metric['first_die_cut2_waste_lbs'] or 0)
-                        second_waste1 = float(metric['second_die_cut1_waste_lbs'] or 0)
-                        second_waste2 = float(metric['second_die_cut2_waste_lbs'] or 0)
-                        
-                        first_total_pounds = first_pounds1 + first_pounds2
-                        second_total_pounds = second_pounds1 + second_pounds2
-                        first_total_waste = first_waste1 + first_waste2
-                        second_total_waste = second_waste1 + second_waste2
-                        
-                        first_waste_pct = (first_total_waste / first_total_pounds * 100) if first_total_pounds > 0 else 0
-                        second_waste_pct = (second_total_waste / second_total_pounds * 100) if second_total_pounds > 0 else 0
-                        combined_waste = (first_waste_pct + second_waste_pct) / 2 if first_waste_pct > 0 and second_waste_pct > 0 else (first_waste_pct or second_waste_pct)
-                        waste_data[day_idx] = combined_waste
-                    
-                    # Calculate individual shift data for breakdown charts
-                    first_oee1 = float(metric['first_die_cut1_oee_pct'] or 0)
-                    first_oee2 = float(metric['first_die_cut2_oee_pct'] or 0)
-                    second_oee1 = float(metric['second_die_cut1_oee_pct'] or 0)
-                    second_oee2 = float(metric['second_die_cut2_oee_pct'] or 0)
-                    
-                    first_avg_oee = (first_oee1 + first_oee2) / 2 if first_oee1 > 0 and first_oee2 > 0 else (first_oee1 or first_oee2)
-                    second_avg_oee = (second_oee1 + second_oee2) / 2 if second_oee1 > 0 and second_oee2 > 0 else (second_oee1 or second_oee2)
-                    
-                    oee_first_shift[day_idx] = first_avg_oee
-                    oee_second_shift[day_idx] = second_avg_oee
-                    
-                    # Calculate production totals
-                    first_pounds1 = float(metric['first_die_cut1_pounds'] or 0)
-                    first_pounds2 = float(metric['first_die_cut2_pounds'] or 0)
-                    second_pounds1 = float(metric['second_die_cut1_pounds'] or 0)
-                    second_pounds2 = float(metric['second_die_cut2_pounds'] or 0)
-                    
-                    pounds_first_shift[day_idx] = first_pounds1 + first_pounds2
-                    pounds_second_shift[day_idx] = second_pounds1 + second_pounds2
-                    
-                    # Calculate waste percentages for individual shifts
-                    first_waste1 = float(metric['first_die_cut1_waste_lbs'] or 0)
-                    first_waste2 = float(metric['first_die_cut2_waste_lbs'] or 0)
-                    second_waste1 = float(metric['second_die_cut1_waste_lbs'] or 0)
-                    second_waste2 = float(metric['second_die_cut2_waste_lbs'] or 0)
-                    
-                    first_total_pounds = first_pounds1 + first_pounds2
-                    second_total_pounds = second_pounds1 + second_pounds2
-                    first_total_waste = first_waste1 + first_waste2
-                    second_total_waste = second_waste1 + second_waste2
-                    
-                    first_waste_pct = (first_total_waste / first_total_pounds * 100) if first_total_pounds > 0 else 0
-                    second_waste_pct = (second_total_waste / second_total_pounds * 100) if second_total_pounds > 0 else 0
-                    
-                    # Get database auto-calculated second shift waste for comparison
-                    db_second_waste = metric.get('second_shift_waste_db_avg')
-                    
-                    # DEBUG: Log second shift waste calculations for accuracy verification
-                    logger.info(f"🔧 DEBUG Second Shift Waste - Day: {metric['day_of_week']}, "
-                               f"DC1_waste: {second_waste1}lbs, DC2_waste: {second_waste2}lbs, "
-                               f"Total_waste: {second_total_waste}lbs, Total_pounds: {second_total_pounds}lbs, "
-                               f"Manual_Calc_%: {second_waste_pct:.3f}, DB_Auto_Calc_%: {db_second_waste}, "
-                               f"Difference: {abs(second_waste_pct - float(db_second_waste or 0)):.3f} percentage points")
-                    
-                    waste_first_shift[day_idx] = first_waste_pct
-                    waste_second_shift[day_idx] = second_waste_pct
+            rollup = load_weekly_rollup(conn, week)
+        if rollup is None:
+            return jsonify({'error': 'Week not found'}), 404
 
-                # Calculate averages
-                def calculate_avg(data_list):
-                    non_zero_values = [x for x in data_list if x != 0]
-                    return round(sum(non_zero_values) / len(non_zero_values), 2) if non_zero_values else 0
+        series = rollup['series']
+        avg_oee = rollup['oee_avg']
+        avg_waste = rollup['waste_avg']
+        total_production = rollup['total_production']
 
-                # Calculate derived metrics
-                total_production = sum(pounds_first_shift) + sum(pounds_second_shift)
-                avg_oee = calculate_avg(oee_data)
-                avg_waste = calculate_avg(waste_data)
-
-                return jsonify({
-                    'week': week,
-                    'oee': [round(x, 1) for x in oee_data],
-                    'waste': [round(x, 2) for x in waste_data],
-                    'oeeAvg': avg_oee,
-                    'wasteAvg': avg_waste,
-                    'oeeFirstShift': [round(x, 1) for x in oee_first_shift],
-                    'wasteFirstShift': [round(x, 2) for x in waste_first_shift],
-                    'oeeSecondShift': [round(x, 1) for x in oee_second_shift],
-                    'wasteSecondShift': [round(x, 2) for x in waste_second_shift],
-                    'downtimeRatio': round(100 - avg_oee * 0.948, 1) if avg_oee > 0 else 0,
-                    'productionRate': round(min(avg_oee * 1.03, 100), 1) if avg_oee > 0 else 0,
-                    'totalProduction': round(total_production, 1)
-                })
+        return jsonify({
+            'week': week,
+            'oee': [round(x, 1) for x in series['oee']],
+            'waste': [round(x, 2) for x in series['waste']],
+            'oeeAvg': avg_oee,
+            'wasteAvg': avg_waste,
+            'oeeFirstShift': [round(x, 1) for x in series['oee_first_shift']],
+            'wasteFirstShift': [round(x, 2) for x in series['waste_first_shift']],
+            'oeeSecondShift': [round(x, 1) for x in series['oee_second_shift']],
+            'wasteSecondShift': [round(x, 2) for x in series['waste_second_shift']],
+            'downtimeRatio': round(100 - avg_oee * 0.948, 1) if avg_oee > 0 else 0,
+            'productionRate': round(min(avg_oee * 1.03, 100), 1) if avg_oee > 0 else 0,
+            'totalProduction': round(total_production, 1)
+        })
 
     except Exception as e:
         logger.error(f"Weekly metrics error: {e}")
+        skip_response_cache()
         # Return empty data structure instead of error to show clean empty dashboard
         return jsonify({
             'week': week or 'No Week',
@@ -4600,6 +6522,7 @@ def inventory_overview_data():
 @app.route('/api/dashboard-kpis')
 @login_required
 @password_change_required
+@cached_response()
 def get_dashboard_kpis():
     """API endpoint for additional dashboard KPIs with filtering support and trend calculations"""
     date_range = request.args.get('date_range', 'current_week')
@@ -4612,211 +6535,164 @@ def get_dashboard_kpis():
     
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get current week and previous week from weekly_sheets
-                cur.execute("""
-                    SELECT DISTINCT sheet_name as week_name, week_start, week_end
-                    FROM weekly_sheets
-                    WHERE is_active = true
-                    ORDER BY week_start DESC
-                    LIMIT 2
-                """)
-                weeks = cur.fetchall()
-                
-                current_week = weeks[0]['week_name'] if weeks else None
-                previous_week = weeks[1]['week_name'] if len(weeks) > 1 else None
+            # Current and previous week by start date
+            weeks = get_recent_week_sheets(2)
+                
+            current_week = weeks[0] if weeks else None
+            previous_week = weeks[1] if len(weeks) > 1 else None
+                
+            # Per-week KPIs come from the precomputed rollups
+            rollups = load_weekly_rollups(conn, [current_week, previous_week])
+            empty_kpis = {'avg_oee': 0, 'avg_waste': 0, 'total_production': 0}
+            current_data = rollups[current_week]['kpis'] if current_week in rollups else empty_kpis
+            previous_data = rollups[previous_week]['kpis'] if previous_week in rollups else empty_kpis
+                
+            # Calculate trends (week-over-week changes)
+            def calculate_trend(current, previous):
+                """Calculate percentage change from previous to current"""
+                if previous == 0:
+                    return 0.0 if current == 0 else 100.0
+                return round(((current - previous) / previous) * 100, 1)
+                
+            # Calculate trend indicators
+            oee_trend = calculate_trend(current_data['avg_oee'], previous_data['avg_oee'])
+            waste_trend = calculate_trend(current_data['avg_waste'], previous_data['avg_waste'])
+            production_trend = calculate_trend(current_data['total_production'], previous_data['total_production'])
+                
+            # Define performance targets/goals
+            GOALS = {
+                'oee_target': 70.0,          # 70% OEE target
+                'waste_target': 2.5,         # 2.5% waste target
+                'production_target': 15000,   # 15,000 lbs weekly target
+                'availability_target': 95.0,  # 95% availability target
+                'performance_target': 90.0,   # 90% performance target
+                'quality_target': 97.5        # 97.5% quality target (100 - 2.5% waste)
+            }
                 
-                def get_week_kpis(week_name):
-                    """Helper function to get KPIs for a specific week using both_shifts_metrics table"""
-                    if not week_name:
-                        return {'avg_oee': 0, 'avg_waste': 0, 'total_production': 0}
-                    
-                    # Get auto-calculated data from both_shifts_metrics table
-                    query = """
-                        SELECT
-                            bs.oee_avg_pct,
-                            bs.waste_avg_pct,
-                            bs.pounds_total
-                        FROM week_submissions ws
-                        LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
-                        WHERE ws.week_name = %s
-                        AND bs.oee_avg_pct IS NOT NULL
-                    """
+            # Calculate additional KPIs
+            avg_oee = current_data['avg_oee']
+            avg_waste = current_data['avg_waste']
+            total_production = current_data['total_production']
+                
+            # Calculate derived KPIs
+            availability = max(100 - (avg_waste * 2.5), 0) if avg_waste > 0 else 0
+            performance = min(avg_oee, 100) if avg_oee > 0 else 0
+            quality = max(100 - avg_waste, 0) if avg_waste > 0 else 0
+            downtime_ratio = max(100 - availability, 0) if availability > 0 else 0
+            production_rate = min(avg_oee * 1.03, 100) if avg_oee > 0 else 0
+                
+            # Calculate performance vs goals indicators
+            def get_goal_indicator(current_value, target_value, higher_is_better=True):
+                """Calculate goal performance indicator"""
+                if target_value == 0:
+                    return {'status': 'unknown', 'percentage': 0, 'variance': 0}
                     
-                    cur.execute(query, [week_name])
-                    results = cur.fetchall()
+                if higher_is_better:
+                    percentage = (current_value / target_value) * 100
+                    variance = current_value - target_value
+                else:  # Lower is better (like waste)
+                    percentage = (target_value / max(current_value, 0.1)) * 100
+                    variance = target_value - current_value
                     
-                    if not results:
-                        return {'avg_oee': 0, 'avg_waste': 0, 'total_production': 0}
-                    
-                    total_oee = 0
-                    total_waste = 0
-                    total_production = 0
-                    count = len(results)
-                    
-                    for row in results:
-                        total_oee += float(row['oee_avg_pct'] or 0)
-                        total_waste += float(row['waste_avg_pct'] or 0)
-                        total_production += float(row['pounds_total'] or 0)
-                    
-                    avg_oee = total_oee / count if count > 0 else 0
-                    avg_waste = total_waste / count if count > 0 else 0
+                if percentage >= 100:
+                    status = 'above_target'
+                elif percentage >= 90:
+                    status = 'on_target'
+                elif percentage >= 75:
+                    status = 'below_target'
+                else:
+                    status = 'critical'
                     
-                    return {
-                        'avg_oee': avg_oee,
-                        'avg_waste': avg_waste,
-                        'total_production': total_production
-                    }
-                
-                # Get current and previous week data
-                current_data = get_week_kpis(current_week)
-                previous_data = get_week_kpis(previous_week)
-                
-                # Calculate trends (week-over-week changes)
-                def calculate_trend(current, previous):
-                    """Calculate percentage change from previous to current"""
-                    if previous == 0:
-                        return 0.0 if current == 0 else 100.0
-                    return round(((current - previous) / previous) * 100, 1)
-                
-                # Calculate trend indicators
-                oee_trend = calculate_trend(current_data['avg_oee'], previous_data['avg_oee'])
-                waste_trend = calculate_trend(current_data['avg_waste'], previous_data['avg_waste'])
-                production_trend = calculate_trend(current_data['total_production'], previous_data['total_production'])
-                
-                # Define performance targets/goals
-                GOALS = {
-                    'oee_target': 70.0,          # 70% OEE target
-                    'waste_target': 2.5,         # 2.5% waste target
-                    'production_target': 15000,   # 15,000 lbs weekly target
-                    'availability_target': 95.0,  # 95% availability target
-                    'performance_target': 90.0,   # 90% performance target
-                    'quality_target': 97.5        # 97.5% quality target (100 - 2.5% waste)
+                return {
+                    'status': status,
+                    'percentage': round(percentage, 1),
+                    'variance': round(variance, 2)
                 }
                 
-                # Calculate additional KPIs
-                avg_oee = current_data['avg_oee']
-                avg_waste = current_data['avg_waste']
-                total_production = current_data['total_production']
-                
-                # Calculate derived KPIs
-                availability = max(100 - (avg_waste * 2.5), 0) if avg_waste > 0 else 0
-                performance = min(avg_oee, 100) if avg_oee > 0 else 0
-                quality = max(100 - avg_waste, 0) if avg_waste > 0 else 0
-                downtime_ratio = max(100 - availability, 0) if availability > 0 else 0
-                production_rate = min(avg_oee * 1.03, 100) if avg_oee > 0 else 0
-                
-                # Calculate performance vs goals indicators
-                def get_goal_indicator(current_value, target_value, higher_is_better=True):
-                    """Calculate goal performance indicator"""
-                    if target_value == 0:
-                        return {'status': 'unknown', 'percentage': 0, 'variance': 0}
+            # Calculate downtime trend
+            prev_availability = max(100 - (previous_data['avg_waste'] * 2.5), 0) if previous_data['avg_waste'] > 0 else 0
+            prev_downtime_ratio = max(100 - prev_availability, 0) if prev_availability > 0 else 0
+            downtime_trend = calculate_trend(downtime_ratio, prev_downtime_ratio)
+                
+            # Calculate production rate trend
+            prev_production_rate = min(previous_data['avg_oee'] * 1.03, 100) if previous_data['avg_oee'] > 0 else 0
+            production_rate_trend = calculate_trend(production_rate, prev_production_rate)
+                
+            # Calculate goal indicators
+            oee_goal = get_goal_indicator(avg_oee, GOALS['oee_target'], True)
+            waste_goal = get_goal_indicator(avg_waste, GOALS['waste_target'], False)
+            production_goal = get_goal_indicator(total_production, GOALS['production_target'], True)
+            availability_goal = get_goal_indicator(availability, GOALS['availability_target'], True)
+            performance_goal = get_goal_indicator(performance, GOALS['performance_target'], True)
+            quality_goal = get_goal_indicator(quality, GOALS['quality_target'], True)
+
+            kpis = {
+                'avgOEE': round(avg_oee, 1),
+                    # Provide the average waste percentage directly to the dashboard. This represents the percentage
+                    # of waste relative to total production and is used when calculating waste performance targets.
+                    'avgWaste': round(avg_waste, 1),
+                    # Keep totalWaste (in lbs) for other dashboard components if needed. It represents the total
+                    # waste pounds (production * waste percent / 100) and is not used for the waste target gauge.
+                    'totalWaste': round(total_production * avg_waste / 100, 1) if avg_waste and total_production else 0,
+                    'downtimeRatio': round(downtime_ratio, 1),
+                    'productionRate': round(production_rate, 1),
+                    'availability': round(availability, 1),
+                    'performance': round(performance, 1),
+                    'quality': round(quality, 1),
+                    'plannedDowntime': 0,  # Will be calculated from actual downtime data when available
+                    'unplannedDowntime': round(max(downtime_ratio, 0), 1),
+                    'totalProduction': round(total_production, 1),
                     
-                    if higher_is_better:
-                        percentage = (current_value / target_value) * 100
-                        variance = current_value - target_value
-                    else:  # Lower is better (like waste)
-                        percentage = (target_value / max(current_value, 0.1)) * 100
-                        variance = target_value - current_value
-                    
-                    if percentage >= 100:
-                        status = 'above_target'
-                    elif percentage >= 90:
-                        status = 'on_target'
-                    elif percentage >= 75:
-                        status = 'below_target'
-                    else:
-                        status = 'critical'
+                # Goal targets
+                'goals': {
+                    'oee_target': GOALS['oee_target'],
+                    'waste_target': GOALS['waste_target'],
+                    'production_target': GOALS['production_target'],
+                    'availability_target': GOALS['availability_target'],
+                    'performance_target': GOALS['performance_target'],
+                    'quality_target': GOALS['quality_target']
+                },
                     
-                    return {
-                        'status': status,
-                        'percentage': round(percentage, 1),
-                        'variance': round(variance, 2)
-                    }
-                
-                # Calculate downtime trend
-                prev_availability = max(100 - (previous_data['avg_waste'] * 2.5), 0) if previous_data['avg_waste'] > 0 else 0
-                prev_downtime_ratio = max(100 - prev_availability, 0) if prev_availability > 0 else 0
-                downtime_trend = calculate_trend(downtime_ratio, prev_downtime_ratio)
-                
-                # Calculate production rate trend
-                prev_production_rate = min(previous_data['avg_oee'] * 1.03, 100) if previous_data['avg_oee'] > 0 else 0
-                production_rate_trend = calculate_trend(production_rate, prev_production_rate)
-                
-                # Calculate goal indicators
-                oee_goal = get_goal_indicator(avg_oee, GOALS['oee_target'], True)
-                waste_goal = get_goal_indicator(avg_waste, GOALS['waste_target'], False)
-                production_goal = get_goal_indicator(total_production, GOALS['production_target'], True)
-                availability_goal = get_goal_indicator(availability, GOALS['availability_target'], True)
-                performance_goal = get_goal_indicator(performance, GOALS['performance_target'], True)
-                quality_goal = get_goal_indicator(quality, GOALS['quality_target'], True)
-
-                kpis = {
-                    'avgOEE': round(avg_oee, 1),
-                        # Provide the average waste percentage directly to the dashboard. This represents the percentage
-                        # of waste relative to total production and is used when calculating waste performance targets.
-                        'avgWaste': round(avg_waste, 1),
-                        # Keep totalWaste (in lbs) for other dashboard components if needed. It represents the total
-                        # waste pounds (production * waste percent / 100) and is not used for the waste target gauge.
-                        'totalWaste': round(total_production * avg_waste / 100, 1) if avg_waste and total_production else 0,
-                        'downtimeRatio': round(downtime_ratio, 1),
-                        'productionRate': round(production_rate, 1),
-                        'availability': round(availability, 1),
-                        'performance': round(performance, 1),
-                        'quality': round(quality, 1),
-                        'plannedDowntime': 0,  # Will be calculated from actual downtime data when available
-                        'unplannedDowntime': round(max(downtime_ratio, 0), 1),
-                        'totalProduction': round(total_production, 1),
+                # Goal performance indicators
+                'goalIndicators': {
+                    'oee': oee_goal,
+                    'waste': waste_goal,
+                    'production': production_goal,
+                    'availability': availability_goal,
+                    'performance': performance_goal,
+                    'quality': quality_goal
+                },
                     
-                    # Goal targets
-                    'goals': {
-                        'oee_target': GOALS['oee_target'],
-                        'waste_target': GOALS['waste_target'],
-                        'production_target': GOALS['production_target'],
-                        'availability_target': GOALS['availability_target'],
-                        'performance_target': GOALS['performance_target'],
-                        'quality_target': GOALS['quality_target']
+                # Trend indicators (preserved from original)
+                'trends': {
+                    'oee': {
+                        'value': oee_trend,
+                        'direction': 'up' if oee_trend > 0 else 'down' if oee_trend < 0 else 'stable',
+                        'icon': 'trending-up' if oee_trend > 0 else 'trending-down' if oee_trend < 0 else 'minus'
                     },
-                    
-                    # Goal performance indicators
-                    'goalIndicators': {
-                        'oee': oee_goal,
-                        'waste': waste_goal,
-                        'production': production_goal,
-                        'availability': availability_goal,
-                        'performance': performance_goal,
-                        'quality': quality_goal
+                    'waste': {
+                        'value': waste_trend,
+                        'direction': 'down' if waste_trend < 0 else 'up' if waste_trend > 0 else 'stable',  # Lower waste is good
+                        'icon': 'trending-down' if waste_trend < 0 else 'trending-up' if waste_trend > 0 else 'minus'
                     },
-                    
-                    # Trend indicators (preserved from original)
-                    'trends': {
-                        'oee': {
-                            'value': oee_trend,
-                            'direction': 'up' if oee_trend > 0 else 'down' if oee_trend < 0 else 'stable',
-                            'icon': 'trending-up' if oee_trend > 0 else 'trending-down' if oee_trend < 0 else 'minus'
-                        },
-                        'waste': {
-                            'value': waste_trend,
-                            'direction': 'down' if waste_trend < 0 else 'up' if waste_trend > 0 else 'stable',  # Lower waste is good
-                            'icon': 'trending-down' if waste_trend < 0 else 'trending-up' if waste_trend > 0 else 'minus'
-                        },
-                        'downtime': {
-                            'value': downtime_trend,
-                            'direction': 'up' if downtime_trend > 0 else 'down' if downtime_trend < 0 else 'stable',
-                            'icon': 'minus' if downtime_trend == 0 else 'trending-up' if downtime_trend > 0 else 'trending-down'
-                        },
-                        'production': {
-                            'value': production_rate_trend,
-                            'direction': 'up' if production_rate_trend > 0 else 'down' if production_rate_trend < 0 else 'stable',
-                            'icon': 'trending-up' if production_rate_trend > 0 else 'trending-down' if production_rate_trend < 0 else 'minus'
-                        }
+                    'downtime': {
+                        'value': downtime_trend,
+                        'direction': 'up' if downtime_trend > 0 else 'down' if downtime_trend < 0 else 'stable',
+                        'icon': 'minus' if downtime_trend == 0 else 'trending-up' if downtime_trend > 0 else 'trending-down'
+                    },
+                    'production': {
+                        'value': production_rate_trend,
+                        'direction': 'up' if production_rate_trend > 0 else 'down' if production_rate_trend < 0 else 'stable',
+                        'icon': 'trending-up' if production_rate_trend > 0 else 'trending-down' if production_rate_trend < 0 else 'minus'
                     }
                 }
+            }
                 
-                return jsonify(kpis)
+            return jsonify(kpis)
                 
     except Exception as e:
         logger.error(f"Dashboard KPIs error: {e}")
+        skip_response_cache()
         # Return zero values on error instead of hardcoded fallbacks
         return jsonify({
             'avgOEE': 0,
@@ -5015,6 +6891,16 @@ def get_system_info():
         }), 500
 
 
+@app.route('/api/cache-stats')
+@admin_required
+def get_cache_stats():
+    """Hit/miss counters for the dashboard response cache (this worker process)"""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'response_cache': response_cache.stats()
+    })
+
 # New API endpoint to retrieve a list of recent activities for the dashboard.
 # This endpoint consolidates events from week_submissions, weekly_sheets, and inventory_transactions tables.
 # It returns the most recent 10 activities with a type, human-readable description, and a relative time.
@@ -5093,171 +6979,279 @@ def get_recent_activities():
         }), 500
 
 
-@app.route('/api/notifications', methods=['GET'])
-@login_required
-def get_notifications():
-    """API endpoint for real-time notifications from database events"""
+# Notification feed sources: (type, table, source filter, feed created_at column, feed query).
+# Feed queries take a {window} slot for the optional since/until watermark bounds.
+NOTIFICATION_SOURCES = [
+    ('form_submission', 'submission_logs', "submission_type = 'metrics'", 'created_at', """
+        SELECT 
+            'form_submission' as type,
+            id,
+            CASE 
+                WHEN success = true THEN 'Metrics submitted for ' || COALESCE(day_of_week, 'Unknown day')
+                ELSE 'Submission failed: ' || COALESCE(message, 'Unknown error')
+            END as description,
+            created_at,
+            success
+        FROM submission_logs 
+        WHERE submission_type = 'metrics' 
+        AND created_at >= CURRENT_TIMESTAMP - INTERVAL '7 days'
+        {window}
+        ORDER BY created_at DESC 
+        LIMIT 8
+    """),
+    ('issue_report', 'issues', None, 'created_at', """
+        SELECT 
+            'issue_report' as type,
+            id,
+            'Issue reported: ' || line || ' - ' || LEFT(title, 40) || 
+            CASE WHEN LENGTH(title) > 40 THEN '...' ELSE '' END as description,
+            created_at,
+            true as success
+        FROM issues 
+        WHERE created_at >= CURRENT_TIMESTAMP - INTERVAL '14 days'
+        {window}
+        ORDER BY created_at DESC 
+        LIMIT 6
+    """),
+    ('inventory_alert', 'inventory_transactions', None, 'it.created_at', """
+        SELECT 
+            'inventory_alert' as type,
+            it.id,
+            'Inventory ' || transaction_type || ': ' || ii.item_name as description,
+            it.created_at,
+            true as success
+        FROM inventory_transactions it
+        JOIN inventory_items ii ON it.item_id = ii.id
+        WHERE it.created_at >= CURRENT_TIMESTAMP - INTERVAL '7 days'
+        {window}
+        ORDER BY it.created_at DESC 
+        LIMIT 5
+    """),
+    # KPI threshold alerts (OEE below 70%, waste above 3.75%)
+    ('kpi_alert', 'both_shifts_metrics', "(oee_avg_pct < 70 OR waste_avg_pct > 3.75)", 'bs.created_at', """
+        SELECT 
+            'kpi_alert' as type,
+            bs.id,
+            CASE 
+                WHEN bs.oee_avg_pct < 70 THEN 
+                    'OEE below target: ' || ROUND(bs.oee_avg_pct, 1) || '% vs goal 70%'
+                WHEN bs.waste_avg_pct > 3.75 THEN 
+                    'Waste above target: ' || ROUND(bs.waste_avg_pct, 2) || '% vs goal 3.75%'
+            END as description,
+            bs.created_at,
+            false as success
+        FROM both_shifts_metrics bs
+        JOIN week_submissions ws ON bs.week_submission_id = ws.id
+        WHERE bs.created_at >= CURRENT_TIMESTAMP - INTERVAL '14 days'
+        AND (bs.oee_avg_pct < 70 OR bs.waste_avg_pct > 3.75)
+        {window}
+        ORDER BY bs.created_at DESC 
+        LIMIT 4
+    """),
+    ('week_update', 'weekly_sheets', None, 'created_at', """
+        SELECT 
+            'week_update' as type,
+            id,
+            'New week sheet created: ' || sheet_name as description,
+            created_at,
+            true as success
+        FROM weekly_sheets 
+        WHERE created_at >= CURRENT_TIMESTAMP - INTERVAL '30 days'
+        {window}
+        ORDER BY created_at DESC 
+        LIMIT 3
+    """),
+]
+
+# How far below each watermark a since-query looks again for rows that committed late
+NOTIFICATION_CURSOR_OVERLAP = int(os.getenv('NOTIFICATION_CURSOR_OVERLAP', '120'))  # seconds
+
+def ensure_notification_indexes(cur):
+    """created_at indexes so feed watermarks and since-queries are index probes."""
+    indexes = [
+        ('idx_submission_logs_type_created_at', 'submission_logs', '(submission_type, created_at)'),
+        ('idx_issues_created_at', 'issues', '(created_at)'),
+        ('idx_inventory_transactions_created_at', 'inventory_transactions', '(created_at)'),
+        ('idx_both_shifts_metrics_created_at', 'both_shifts_metrics', '(created_at)'),
+        ('idx_weekly_sheets_created_at', 'weekly_sheets', '(created_at)'),
+        ('idx_notifications_user_created_at', 'notifications', '(user_id, created_at)'),
+    ]
+    for index_name, table, columns in indexes:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        if cur.fetchone()[0]:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} {columns}")
+
+def fetch_notification_watermarks(cur):
+    """Latest created_at of every feed source, in a single round trip."""
+    columns = []
+    for source_type, table, source_filter, _, _ in NOTIFICATION_SOURCES:
+        where = f" WHERE {source_filter}" if source_filter else ""
+        columns.append(f"(SELECT MAX(created_at) FROM {table}{where}) AS {source_type}")
+    cur.execute("SELECT " + ", ".join(columns))
+    return dict(cur.fetchone())
+
+def encode_notification_cursor(positions):
+    """Opaque cursor carrying each source's watermark and the ids already delivered near it.
+
+    ``positions`` maps a source type to {'at': datetime, 'seen': {id: created_at}}. Ids are
+    kept as strings, since sources mix integer and UUID keys.
+    """
+    payload = {
+        key: {
+            'at': position['at'].isoformat(),
+            'seen': [[str(row_id), created_at.isoformat()] for row_id, created_at in sorted(position['seen'].items())]
+        }
+        for key, position in positions.items() if position['at'] is not None
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, sort_keys=True).encode('utf-8')).decode('ascii')
+
+def decode_notification_cursor(cursor):
+    """Inverse of encode_notification_cursor; raises ValueError for malformed cursors."""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                notifications = []
-                
-                # 1. Recent form submissions (last 7 days)
-                cur.execute("""
-                    SELECT 
-                        'form_submission' as type,
-                        CASE 
-                            WHEN success = true THEN 'Metrics submitted for ' || COALESCE(day_of_week, 'Unknown day')
-                            ELSE 'Submission failed: ' || COALESCE(message, 'Unknown error')
-                        END as description,
-                        created_at,
-                        success
-                    FROM submission_logs 
-                    WHERE submission_type = 'metrics' 
-                    AND created_at >= CURRENT_TIMESTAMP - INTERVAL '7 days'
-                    ORDER BY created_at DESC 
-                    LIMIT 8
-                """)
-                
-                for row in cur.fetchall():
-                    notifications.append({
-                        'type': row['type'],
-                        'description': row['description'],
-                        'created_at': row['created_at'],
-                        'success': row['success']
-                    })
-                
-                # 2. Recent issues (last 14 days)
-                cur.execute("""
-                    SELECT 
-                        'issue_report' as type,
-                        'Issue reported: ' || line || ' - ' || LEFT(title, 40) || 
-                        CASE WHEN LENGTH(title) > 40 THEN '...' ELSE '' END as description,
-                        created_at,
-                        true as success
-                    FROM issues 
-                    WHERE created_at >= CURRENT_TIMESTAMP - INTERVAL '14 days'
-                    ORDER BY created_at DESC 
-                    LIMIT 6
-                """)
-                
-                for row in cur.fetchall():
-                    notifications.append({
-                        'type': row['type'],
-                        'description': row['description'],
-                        'created_at': row['created_at'],
-                        'success': row['success']
-                    })
-                
-                # 3. Inventory alerts (recent transactions)
-                cur.execute("""
-                    SELECT 
-                        'inventory_alert' as type,
-                        'Inventory ' || transaction_type || ': ' || ii.item_name as description,
-                        it.created_at,
-                        true as success
-                    FROM inventory_transactions it
-                    JOIN inventory_items ii ON it.item_id = ii.id
-                    WHERE it.created_at >= CURRENT_TIMESTAMP - INTERVAL '7 days'
-                    ORDER BY it.created_at DESC 
-                    LIMIT 5
-                """)
-                
-                for row in cur.fetchall():
-                    notifications.append({
-                        'type': row['type'],
-                        'description': row['description'],
-                        'created_at': row['created_at'],
-                        'success': row['success']
-                    })
-                
-                # 4. KPI threshold alerts (OEE below 70%, waste above 3.75%)
-                cur.execute("""
-                    SELECT 
-                        'kpi_alert' as type,
-                        CASE 
-                            WHEN bs.oee_avg_pct < 70 THEN 
-                                'OEE below target: ' || ROUND(bs.oee_avg_pct, 1) || '% vs goal 70%'
-                            WHEN bs.waste_avg_pct > 3.75 THEN 
-                                'Waste above target: ' || ROUND(bs.waste_avg_pct, 2) || '% vs goal 3.75%'
-                        END as description,
-                        bs.created_at,
-                        false as success
-                    FROM both_shifts_metrics bs
-                    JOIN week_submissions ws ON bs.week_submission_id = ws.id
-                    WHERE bs.created_at >= CURRENT_TIMESTAMP - INTERVAL '14 days'
-                    AND (bs.oee_avg_pct < 70 OR bs.waste_avg_pct > 3.75)
-                    ORDER BY bs.created_at DESC 
-                    LIMIT 4
-                """)
-                
-                for row in cur.fetchall():
-                    notifications.append({
-                        'type': row['type'],
-                        'description': row['description'],
-                        'created_at': row['created_at'],
-                        'success': row['success']
-                    })
-                
-                # 5. Week updates (new week sheets created)
-                cur.execute("""
-                    SELECT 
-                        'week_update' as type,
-                        'New week sheet created: ' || sheet_name as description,
-                        created_at,
-                        true as success
-                    FROM weekly_sheets 
-                    WHERE created_at >= CURRENT_TIMESTAMP - INTERVAL '30 days'
-                    ORDER BY created_at DESC 
-                    LIMIT 3
-                """)
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        positions = {}
+        for key, value in payload.items():
+            if isinstance(value, str):
+                # Cursors issued before ids were tracked carry only the watermark
+                positions[key] = {'at': datetime.fromisoformat(value), 'seen': {}}
+            else:
+                positions[key] = {
+                    'at': datetime.fromisoformat(value['at']),
+                    'seen': {str(row_id): datetime.fromisoformat(created_at) for row_id, created_at in value['seen']}
+                }
+        return positions
+    except (TypeError, AttributeError, KeyError, UnicodeError, binascii.Error, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid notification cursor: {e}")
+
+def format_notification_time_ago(notifications):
+    """Add a human readable time_ago to each notification."""
+    now = datetime.now()
+    
+    for notification in notifications:
+        created_at = notification['created_at']
+        if hasattr(created_at, 'tzinfo') and created_at.tzinfo is not None:
+            naive_created = created_at.replace(tzinfo=None)
+        else:
+            naive_created = created_at
+        
+        diff = now - naive_created
+        seconds = diff.total_seconds()
+        
+        if seconds < 60:
+            time_ago = 'just now'
+        elif seconds < 3600:
+            minutes = int(seconds / 60)
+            time_ago = f"{minutes} minute{'s' if minutes != 1 else ''} ago"
+        elif seconds < 86400:
+            hours = int(seconds / 3600)
+            time_ago = f"{hours} hour{'s' if hours != 1 else ''} ago"
+        else:
+            days = int(seconds / 86400)
+            time_ago = f"{days} day{'s' if days != 1 else ''} ago"
+        
+        notification['time_ago'] = time_ago
+    return notifications
+
+def fetch_recent_notifications(since=None, until=None, source_types=None, exclude_ids=None):
+    """Recent submissions, issues, inventory activity, KPI alerts and new weeks, newest first.
+
+    since/until map a source type to an exclusive lower / inclusive upper created_at
+    bound; source_types restricts the query to the given sources and exclude_ids maps
+    a source type to row ids (as strings) that were already delivered.
+    """
+    since = since or {}
+    until = until or {}
+    exclude_ids = exclude_ids or {}
+    notifications = []
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            for source_type, _, _, created_at, query in NOTIFICATION_SOURCES:
+                if source_types is not None and source_type not in source_types:
+                    continue
+                # Bounds are bound with mogrify; the feed queries contain literal % signs
+                window = []
+                if since.get(source_type) is not None:
+                    window.append(cur.mogrify(f"AND {created_at} > %s", (since[source_type],)).decode())
+                if until.get(source_type) is not None:
+                    window.append(cur.mogrify(f"AND {created_at} <= %s", (until[source_type],)).decode())
+                cur.execute(query.format(window=' '.join(window)))
                 
                 for row in cur.fetchall():
+                    if str(row['id']) in exclude_ids.get(source_type, ()):
+                        continue
                     notifications.append({
+                        'id': row['id'],
                         'type': row['type'],
                         'description': row['description'],
                         'created_at': row['created_at'],
                         'success': row['success']
                     })
-                
-                # Sort all notifications by created_at descending and limit to 25
-                notifications.sort(key=lambda x: x['created_at'], reverse=True)
-                notifications = notifications[:25]
-                
-                # Calculate time ago for each notification
-                from datetime import datetime
-                now = datetime.now()
-                
-                for notification in notifications:
-                    created_at = notification['created_at']
-                    if hasattr(created_at, 'tzinfo') and created_at.tzinfo is not None:
-                        naive_created = created_at.replace(tzinfo=None)
-                    else:
-                        naive_created = created_at
-                    
-                    diff = now - naive_created
-                    seconds = diff.total_seconds()
-                    
-                    if seconds < 60:
-                        time_ago = 'just now'
-                    elif seconds < 3600:
-                        minutes = int(seconds / 60)
-                        time_ago = f"{minutes} minute{'s' if minutes != 1 else ''} ago"
-                    elif seconds < 86400:
-                        hours = int(seconds / 3600)
-                        time_ago = f"{hours} hour{'s' if hours != 1 else ''} ago"
-                    else:
-                        days = int(seconds / 86400)
-                        time_ago = f"{days} day{'s' if days != 1 else ''} ago"
-                    
-                    notification['time_ago'] = time_ago
-                
-                return jsonify({
-                    'success': True,
-                    'notifications': notifications,
-                    'count': len(notifications)
-                })
-                
+    
+    # Sort all notifications by created_at descending and limit to 25
+    notifications.sort(key=lambda x: x['created_at'], reverse=True)
+    return format_notification_time_ago(notifications[:25])
+
+@app.route('/api/notifications', methods=['GET'])
+@login_required
+def get_notifications():
+    """API endpoint for real-time notifications from database events
+
+    Pass the returned cursor back as ?since=<cursor> to receive only newer events.
+    """
+    since_arg = request.args.get('since', '').strip()
+    try:
+        since = decode_notification_cursor(since_arg) if since_arg else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid notification cursor',
+            'error': 'invalid_cursor'
+        }), 400
+
+    try:
+        overlap = timedelta(seconds=NOTIFICATION_CURSOR_OVERLAP)
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                watermarks = fetch_notification_watermarks(cur)
+
+            if since is None:
+                notifications = fetch_recent_notifications(until=watermarks)
+            else:
+                # created_at is stamped when a transaction starts, so a row can commit after
+                # newer rows were already read. Each source is re-read from an overlap window
+                # below its watermark, skipping the ids the cursor already delivered.
+                changed = [
+                    source_type for source_type, mark in watermarks.items()
+                    if mark is not None and (source_type not in since or mark > since[source_type]['at'] - overlap)
+                ]
+                notifications = fetch_recent_notifications(
+                    since={key: position['at'] - overlap for key, position in since.items()},
+                    until=watermarks,
+                    source_types=changed,
+                    exclude_ids={key: position['seen'] for key, position in since.items()}
+                ) if changed else []
+
+        # Sources with no rows yet keep the caller's position
+        positions = {key: {'at': position['at'], 'seen': dict(position['seen'])}
+                     for key, position in (since or {}).items()}
+        for source_type, mark in watermarks.items():
+            if mark is not None:
+                positions.setdefault(source_type, {'at': mark, 'seen': {}})['at'] = mark
+        for notification in notifications:
+            positions[notification['type']]['seen'][str(notification['id'])] = notification['created_at']
+        for position in positions.values():
+            # Only ids that can still fall inside the next overlap window are kept
+            position['seen'] = {row_id: created_at for row_id, created_at in position['seen'].items()
+                                if created_at > position['at'] - overlap}
+
+        return jsonify({
+            'success': True,
+            'notifications': notifications,
+            'count': len(notifications),
+            'incremental': since is not None,
+            'cursor': encode_notification_cursor(positions)
+        })
+        
     except Exception as e:
         logger.error(f"Notifications error: {e}")
         return jsonify({
@@ -5267,6 +7261,56 @@ def get_notifications():
             'error': str(e)
         }), 500
 
+@app.route('/api/notifications/stream', methods=['GET'])
+@login_required
+def notifications_stream():
+    """Server-Sent Events stream of the notification feed, pushed when it changes"""
+    start_notification_listener()
+
+    client = queue.Queue(maxsize=SSE_CLIENT_QUEUE_SIZE)
+    with _notification_stream['lock']:
+        if len(_notification_stream['clients']) >= SSE_MAX_CLIENTS:
+            return jsonify({
+                'success': False,
+                'message': 'Too many open notification streams, use /api/notifications instead'
+            }), 503
+        _notification_stream['clients'].add(client)
+
+    try:
+        # Reuse the last broadcast feed while its relative times are still accurate
+        initial_feed = _notification_stream['feed']
+        if initial_feed is None or time.monotonic() - _notification_stream['feed_built_at'] > 60:
+            initial_feed = _build_notification_feed_message()
+    except Exception as e:
+        with _notification_stream['lock']:
+            _notification_stream['clients'].discard(client)
+        logger.error(f"Notification stream error: {e}")
+        return jsonify({'success': False, 'message': 'Failed to load notifications'}), 500
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield initial_feed
+            # Streams are recycled periodically so a worker thread is never held forever
+            deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    message = client.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            with _notification_stream['lock']:
+                _notification_stream['clients'].discard(client)
+
+    response = app.response_class(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 
 
 
@@ -5367,317 +7411,149 @@ def api_comprehensive_report():
     
     logger.info(f"Comprehensive report API call: week={week}, day={day}, shift={shift}, metric={metric_type}")
     
-    # Get the latest week from week_submissions if needed
     if week == "latest":
-        try:
-            with get_db_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    cur.execute("""
-                        SELECT sheet_name as week_name
-                        FROM weekly_sheets
-                        WHERE is_active = true
-                        ORDER BY created_at DESC
-                        LIMIT 1
-                    """)
-                    result = cur.fetchone()
-                    week = result['week_name'] if result else None
-        except Exception as e:
-            logger.error(f"Error getting latest week: {e}")
-            week = None
+        week = get_latest_week_sheet()
     
     if not week:
         return jsonify({'error': 'No valid week found'}), 404
     
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Use the correct schema - get data from week_submissions and shift metrics tables
-                query_conditions = ["ws.week_name = %s"]
-                query_params = [week]
-                
-                if day != 'All':
-                    query_conditions.append("ws.day_of_week = %s")
-                    query_params.append(day)
-                
-                where_clause = " AND ".join(query_conditions)
-                
-                # Get combined metrics data from the current database schema
-                cur.execute(f"""
-                    SELECT
-                        ws.day_of_week,
-                        -- Combined auto-calculated data from both_shifts_metrics
-                        bs.die_cut1_oee_pct as combined_die_cut1_oee_pct,
-                        bs.die_cut2_oee_pct as combined_die_cut2_oee_pct,
-                        bs.oee_avg_pct as combined_oee_avg,
-                        bs.die_cut1_lbs as combined_die_cut1_pounds,
-                        bs.die_cut2_lbs as combined_die_cut2_pounds,
-                        bs.pounds_total as combined_pounds_total,
-                        bs.die_cut1_waste_lb as combined_die_cut1_waste_lbs,
-                        bs.die_cut2_waste_lb as combined_die_cut2_waste_lbs,
-                        bs.die_cut1_waste_pct as combined_die_cut1_waste_pct,
-                        bs.die_cut2_waste_pct as combined_die_cut2_waste_pct,
-                        bs.waste_avg_pct as combined_waste_avg,
-                        -- Individual shift data for detailed breakdown
-                        fs.die_cut1_oee_pct as first_die_cut1_oee_pct,
-                        fs.die_cut2_oee_pct as first_die_cut2_oee_pct,
-                        fs.die_cut1_lbs as first_die_cut1_pounds,
-                        fs.die_cut2_lbs as first_die_cut2_pounds,
-                        fs.die_cut1_waste_lb as first_die_cut1_waste_lbs,
-                        fs.die_cut2_waste_lb as first_die_cut2_waste_lbs,
-                        ss.die_cut1_oee_pct as second_die_cut1_oee_pct,
-                        ss.die_cut2_oee_pct as second_die_cut2_oee_pct,
-                        ss.die_cut1_lbs as second_die_cut1_pounds,
-                        ss.die_cut2_lbs as second_die_cut2_pounds,
-                        ss.die_cut1_waste_lb as second_die_cut1_waste_lbs,
-                        ss.die_cut2_waste_lb as second_die_cut2_waste_lbs
-                    FROM week_submissions ws
-                    LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
-                    LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
-                    LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
-                    WHERE {where_clause}
-                    ORDER BY
-                        CASE ws.day_of_week
-                            WHEN 'Monday' THEN 1
-                            WHEN 'Tuesday' THEN 2
-                            WHEN 'Wednesday' THEN 3
-                            WHEN 'Thursday' THEN 4
-                            WHEN 'Friday' THEN 5
-                        END
-                """, query_params)
-                
-                metrics_data = cur.fetchall()
-                
-                # Process data for response
-                days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-                
-                # Initialize data structures with float values
-                oee_data = [0.0] * 5
-                waste_data = [0.0] * 5
-                oee_first_shift = [0.0] * 5
-                waste_first_shift = [0.0] * 5
-                oee_second_shift = [0.0] * 5
-                waste_second_shift = [0.0] * 5
-                pounds_first_shift = [0.0] * 5
-                pounds_second_shift = [0.0] * 5
-
-                # Process metrics data using auto-calculated values where available
-                for metric in metrics_data:
-                    if metric['day_of_week'] not in days:
-                        continue
-                        
-                    day_idx = days.index(metric['day_of_week'])
-                    
-                    # Use auto-calculated combined values from both_shifts_metrics if available
-                    if metric['combined_oee_avg'] is not None:
-                        # Use the database's auto-calculated combined OEE average
-                        oee_data[day_idx] = float(metric['combined_oee_avg'])
-                    else:
-                        # Fallback to manual calculation if combined data not available
-                        first_oee1 = float(metric['first_die_cut1_oee_pct'] or 0)
-                        first_oee2 = float(metric['first_die_cut2_oee_pct'] or 0)
-                        second_oee1 = float(metric['second_die_cut1_oee_pct'] or 0)
-                        second_oee2 = float(metric['second_die_cut2_oee_pct'] or 0)
-                        
-                        first_avg_oee = (first_oee1 + first_oee2) / 2 if first_oee1 > 0 and first_oee2 > 0 else (first_oee1 or first_oee2)
-                        second_avg_oee = (second_oee1 + second_oee2) / 2 if second_oee1 > 0 and second_oee2 > 0 else (second_oee1 or second_oee2)
-                        combined_oee = (first_avg_oee + second_avg_oee) / 2 if first_avg_oee > 0 and second_avg_oee > 0 else (first_avg_oee or second_avg_oee)
-                        oee_data[day_idx] = combined_oee
-                    
-                    # Use auto-calculated combined waste percentage if available
-                    if metric['combined_waste_avg'] is not None:
-                        waste_data[day_idx] = float(metric['combined_waste_avg'])
-                        logger.info(f"🔧 DEBUG Combined Waste - Day: {metric['day_of_week']}, Using DB auto-calculated: {metric['combined_waste_avg']}%")
-                    else:
-                        # Fallback to manual calculation
-                        first_pounds1 = float(metric['first_die_cut1_pounds'] or 0)
-                        first_pounds2 = float(metric['first_die_cut2_pounds'] or 0)
-                        second_pounds1 = float(metric['second_die_cut1_pounds'] or 0)
-                        second_pounds2 = float(metric['second_die_cut2_pounds'] or 0)
-                        first_waste1 = float(metric['first_die_cut1_waste_lbs'] or 0)
-                        first_waste2 = float(metric['first_die_cut2_waste_lbs'] or 0)
-                        second_waste1 = float(metric['second_die_cut1_waste_lbs'] or 0)
-                        second_waste2 = float(metric['second_die_cut2_waste_lbs'] or 0)
-                        
-                        first_total_pounds = first_pounds1 + first_pounds2
-                        second_total_pounds = second_pounds1 + second_pounds2
-                        first_total_waste = first_waste1 + first_waste2
-                        second_total_waste = second_waste1 + second_waste2
-                        
-                        first_waste_pct = (first_total_waste / first_total_pounds * 100) if first_total_pounds > 0 else 0
-                        second_waste_pct = (second_total_waste / second_total_pounds * 100) if second_total_pounds > 0 else 0
-                        combined_waste = (first_waste_pct + second_waste_pct) / 2 if first_waste_pct > 0 and second_waste_pct > 0 else (first_waste_pct or second_waste_pct)
-                        waste_data[day_idx] = combined_waste
-                    
-                    # Calculate individual shift data for breakdown charts
-                    first_oee1 = float(metric['first_die_cut1_oee_pct'] or 0)
-                    first_oee2 = float(metric['first_die_cut2_oee_pct'] or 0)
-                    second_oee1 = float(metric['second_die_cut1_oee_pct'] or 0)
-                    second_oee2 = float(metric['second_die_cut2_oee_pct'] or 0)
-                    
-                    first_avg_oee = (first_oee1 + first_oee2) / 2 if first_oee1 > 0 and first_oee2 > 0 else (first_oee1 or first_oee2)
-                    second_avg_oee = (second_oee1 + second_oee2) / 2 if second_oee1 > 0 and second_oee2 > 0 else (second_oee1 or second_oee2)
-                    
-                    oee_first_shift[day_idx] = first_avg_oee
-                    oee_second_shift[day_idx] = second_avg_oee
-                    
-                    # Calculate production totals
-                    first_pounds1 = float(metric['first_die_cut1_pounds'] or 0)
-                    first_pounds2 = float(metric['first_die_cut2_pounds'] or 0)
-                    second_pounds1 = float(metric['second_die_cut1_pounds'] or 0)
-                    second_pounds2 = float(metric['second_die_cut2_pounds'] or 0)
-                    
-                    pounds_first_shift[day_idx] = first_pounds1 + first_pounds2
-                    pounds_second_shift[day_idx] = second_pounds1 + second_pounds2
-                    
-                    # Calculate waste percentages for individual shifts
-                    first_waste1 = float(metric['first_die_cut1_waste_lbs'] or 0)
-                    first_waste2 = float(metric['first_die_cut2_waste_lbs'] or 0)
-                    second_waste1 = float(metric['second_die_cut1_waste_lbs'] or 0)
-                    second_waste2 = float(metric['second_die_cut2_waste_lbs'] or 0)
-                    
-                    first_total_pounds = first_pounds1 + first_pounds2
-                    second_total_pounds = second_pounds1 + second_pounds2
-                    first_total_waste = first_waste1 + first_waste2
-                    second_total_waste = second_waste1 + second_waste2
-                    
-                    first_waste_pct = (first_total_waste / first_total_pounds * 100) if first_total_pounds > 0 else 0
-                    second_waste_pct = (second_total_waste / second_total_pounds * 100) if second_total_pounds > 0 else 0
-                    
-                    # DEBUG: Log second shift waste calculations for accuracy verification
-                    logger.info(f"🔧 DEBUG Second Shift Waste - Day: {metric['day_of_week']}, "
-                               f"DC1_waste: {second_waste1}, DC2_waste: {second_waste2}, "
-                               f"Total_waste: {second_total_waste}, Total_pounds: {second_total_pounds}, "
-                               f"Calculated_%: {second_waste_pct}, DB_avg_%: {metric.get('second_shift_avg_waste', 'N/A')}")
-                    
-                    waste_first_shift[day_idx] = first_waste_pct
-                    waste_second_shift[day_idx] = second_waste_pct
-
-                # Calculate averages
-                def calculate_avg(data_list):
-                    non_zero_values = [x for x in data_list if x != 0]
-                    return round(sum(non_zero_values) / len(non_zero_values), 2) if non_zero_values else 0
-
-                # Calculate derived metrics
-                total_production = sum(pounds_first_shift) + sum(pounds_second_shift)
-                avg_oee = calculate_avg(oee_data)
-                avg_waste = calculate_avg(waste_data)
-
-                # Calculate efficiency score (0-10 scale based on OEE, waste, production)
-                efficiency_score = 0
-                if avg_oee > 0:
-                    oee_score = (avg_oee / 100) * 4  # Max 4 points for OEE
-                    waste_score = max(0, (1 - avg_waste / 3.75)) * 3  # Max 3 points for waste (3.75% target)
-                    production_score = min((total_production / 15000), 1) * 3  # Max 3 points for production
-                    efficiency_score = min(10, oee_score + waste_score + production_score)
-                
-                # Get individual line data for detailed table (use most recent data)
-                line_data = {
-                    'oee1': 0.0, 'oee2': 0.0, 'pounds1': 0.0, 'pounds2': 0.0, 'waste1': 0.0, 'waste2': 0.0,
-                    'oee1Avg': 0.0, 'oee2Avg': 0.0, 'pounds1Avg': 0.0, 'pounds2Avg': 0.0, 'waste1Avg': 0.0, 'waste2Avg': 0.0
-                }
-                
-                # Calculate line-specific metrics by averaging across available days
-                oee1_values = []
-                oee2_values = []
-                pounds1_values = []
-                pounds2_values = []
-                waste1_values = []
-                waste2_values = []
-                
-                for metric in metrics_data:
-                    if metric['combined_die_cut1_oee_pct'] is not None:
-                        oee1_values.append(float(metric['combined_die_cut1_oee_pct']))
-                    if metric['combined_die_cut2_oee_pct'] is not None:
-                        oee2_values.append(float(metric['combined_die_cut2_oee_pct']))
-                    if metric['combined_die_cut1_pounds'] is not None:
-                        pounds1_values.append(float(metric['combined_die_cut1_pounds']))
-                    if metric['combined_die_cut2_pounds'] is not None:
-                        pounds2_values.append(float(metric['combined_die_cut2_pounds']))
-                    if metric['combined_die_cut1_waste_lbs'] is not None:
-                        waste1_values.append(float(metric['combined_die_cut1_waste_lbs']))
-                    if metric['combined_die_cut2_waste_lbs'] is not None:
-                        waste2_values.append(float(metric['combined_die_cut2_waste_lbs']))
-                
-                line_data['oee1'] = calculate_avg(oee1_values)
-                line_data['oee2'] = calculate_avg(oee2_values)
-                line_data['pounds1'] = sum(pounds1_values)
-                line_data['pounds2'] = sum(pounds2_values)
-                line_data['waste1'] = sum(waste1_values)
-                line_data['waste2'] = sum(waste2_values)
-                
-                # Averages are same as current values in this case
-                line_data['oee1Avg'] = line_data['oee1']
-                line_data['oee2Avg'] = line_data['oee2']
-                line_data['pounds1Avg'] = line_data['pounds1']
-                line_data['pounds2Avg'] = line_data['pounds2']
-                line_data['waste1Avg'] = line_data['waste1']
-                line_data['waste2Avg'] = line_data['waste2']
-                
-                # Find best and worst performing days
-                oee_best_idx = oee_data.index(max(oee_data)) if max(oee_data) > 0 else 0
-                oee_worst_idx = oee_data.index(min([x for x in oee_data if x > 0])) if any(x > 0 for x in oee_data) else 0
-                
-                waste_best_idx = waste_data.index(min([x for x in waste_data if x > 0])) if any(x > 0 for x in waste_data) else 0
-                waste_worst_idx = waste_data.index(max(waste_data)) if max(waste_data) > 0 else 0
-                
-                # Build comprehensive response
-                response_data = {
-                    # Basic info
-                    'week': week,
-                    'period': day,
-                    'shift': shift,
-                    
-                    # Key metrics for cards
-                    'oeeCurrentValue': avg_oee,
-                    'wasteCurrentValue': avg_waste,
-                    'productionCurrentValue': round(total_production, 0),
-                    'efficiencyCurrentValue': round(efficiency_score, 1),
-                    
-                    # Chart data
-                    'oeeChartData': [round(x, 1) for x in oee_data],
-                    'wasteChartData': [round(x, 2) for x in waste_data],
-                    'oeeFirstShift': [round(x, 1) for x in oee_first_shift],
-                    'oeeSecondShift': [round(x, 1) for x in oee_second_shift],
-                    'wasteFirstShift': [round(x, 2) for x in waste_first_shift],
-                    'wasteSecondShift': [round(x, 2) for x in waste_second_shift],
-                    'poundsFirstShift': [round(x, 1) for x in pounds_first_shift],
-                    'poundsSecondShift': [round(x, 1) for x in pounds_second_shift],
-                    
-                    # Chart insights
-                    'oeeBestDay': f"{days[oee_best_idx]} - {oee_data[oee_best_idx]:.1f}%",
-                    'oeeWorstDay': f"{days[oee_worst_idx]} - {oee_data[oee_worst_idx]:.1f}%",
-                    'wasteBestDay': f"{days[waste_best_idx]} - {waste_data[waste_best_idx]:.2f}%",
-                    'wasteWorstDay': f"{days[waste_worst_idx]} - {waste_data[waste_worst_idx]:.2f}%",
-                    
-                    # Detailed table data
-                    'oee1': round(line_data['oee1'], 1),
-                    'oee2': round(line_data['oee2'], 1),
-                    'oeeTotal': avg_oee,
-                    'pounds1': round(line_data['pounds1'], 0),
-                    'pounds2': round(line_data['pounds2'], 0),
-                    'poundsTotal': round(total_production, 0),
-                    'waste1': f"{round(line_data['waste1'], 1)} lbs",
-                    'waste2': f"{round(line_data['waste2'], 1)} lbs",
-                    'wasteTotal': f"{avg_waste}%",
-                    'oee1Avg': round(line_data['oee1Avg'], 1),
-                    'oee2Avg': round(line_data['oee2Avg'], 1),
-                    'oeeTotalAvg': avg_oee,
-                    'pounds1Avg': round(line_data['pounds1Avg'], 0),
-                    'pounds2Avg': round(line_data['pounds2Avg'], 0),
-                    'poundsTotalAvg': round(total_production, 0),
-                    'waste1Avg': f"{round(line_data['waste1Avg'], 1)} lbs",
-                    'waste2Avg': f"{round(line_data['waste2Avg'], 1)} lbs",
-                    'wasteTotalAvg': f"{avg_waste}%",
-                    
-                    # Status calculations
-                    'oeeStatus': 'On Target' if avg_oee >= 70 else 'Below Target',
-                    'wasteStatus': 'Below Target' if avg_waste <= 3.75 else 'Above Target',
-                    'productionStatus': 'Normal',
-                    'efficiencyStatus': 'Good' if efficiency_score >= 7 else 'Fair'
-                }
-                
-                return jsonify(response_data)
-                
+            rollup = load_weekly_rollup(conn, week)
+        if rollup is None:
+            return jsonify({'error': 'Week not found'}), 404
+
+        series = rollup['series']
+        line_rows = rollup['line_rows']
+        if day != 'All':
+            # Keep only the selected day's values
+            series = {
+                key: [value if WEEKDAYS[idx] == day else 0.0 for idx, value in enumerate(values)]
+                for key, values in series.items()
+            }
+            line_rows = [line_row for line_row in line_rows if line_row['day'] == day]
+
+        # Calculate derived metrics
+        total_production = sum(series['pounds_first_shift']) + sum(series['pounds_second_shift'])
+        avg_oee = _nonzero_avg(series['oee'])
+        avg_waste = _nonzero_avg(series['waste'])
+
+        # Calculate efficiency score (0-10 scale based on OEE, waste, production)
+        efficiency_score = 0
+        if avg_oee > 0:
+            oee_score = (avg_oee / 100) * 4  # Max 4 points for OEE
+            waste_score = max(0, (1 - avg_waste / 3.75)) * 3  # Max 3 points for waste (3.75% target)
+            production_score = min((total_production / 15000), 1) * 3  # Max 3 points for production
+            efficiency_score = min(10, oee_score + waste_score + production_score)
+        
+        # Get individual line data for detailed table (use most recent data)
+        line_data = {
+            'oee1': 0.0, 'oee2': 0.0, 'pounds1': 0.0, 'pounds2': 0.0, 'waste1': 0.0, 'waste2': 0.0,
+            'oee1Avg': 0.0, 'oee2Avg': 0.0, 'pounds1Avg': 0.0, 'pounds2Avg': 0.0, 'waste1Avg': 0.0, 'waste2Avg': 0.0
+        }
+        
+        # Calculate line-specific metrics by averaging across available days
+        oee1_values = []
+        oee2_values = []
+        pounds1_values = []
+        pounds2_values = []
+        waste1_values = []
+        waste2_values = []
+        
+        for line_row in line_rows:
+            if line_row['oee1'] is not None:
+                oee1_values.append(line_row['oee1'])
+            if line_row['oee2'] is not None:
+                oee2_values.append(line_row['oee2'])
+            if line_row['pounds1'] is not None:
+                pounds1_values.append(line_row['pounds1'])
+            if line_row['pounds2'] is not None:
+                pounds2_values.append(line_row['pounds2'])
+            if line_row['waste1'] is not None:
+                waste1_values.append(line_row['waste1'])
+            if line_row['waste2'] is not None:
+                waste2_values.append(line_row['waste2'])
+        
+        line_data['oee1'] = _nonzero_avg(oee1_values)
+        line_data['oee2'] = _nonzero_avg(oee2_values)
+        line_data['pounds1'] = sum(pounds1_values)
+        line_data['pounds2'] = sum(pounds2_values)
+        line_data['waste1'] = sum(waste1_values)
+        line_data['waste2'] = sum(waste2_values)
+        
+        # Averages are same as current values in this case
+        line_data['oee1Avg'] = line_data['oee1']
+        line_data['oee2Avg'] = line_data['oee2']
+        line_data['pounds1Avg'] = line_data['pounds1']
+        line_data['pounds2Avg'] = line_data['pounds2']
+        line_data['waste1Avg'] = line_data['waste1']
+        line_data['waste2Avg'] = line_data['waste2']
+        
+        # Find best and worst performing days
+        oee_best_idx = series['oee'].index(max(series['oee'])) if max(series['oee']) > 0 else 0
+        oee_worst_idx = series['oee'].index(min([x for x in series['oee'] if x > 0])) if any(x > 0 for x in series['oee']) else 0
+        
+        waste_best_idx = series['waste'].index(min([x for x in series['waste'] if x > 0])) if any(x > 0 for x in series['waste']) else 0
+        waste_worst_idx = series['waste'].index(max(series['waste'])) if max(series['waste']) > 0 else 0
+        
+        # Build comprehensive response
+        response_data = {
+            # Basic info
+            'week': week,
+            'period': day,
+            'shift': shift,
+            
+            # Key metrics for cards
+            'oeeCurrentValue': avg_oee,
+            'wasteCurrentValue': avg_waste,
+            'productionCurrentValue': round(total_production, 0),
+            'efficiencyCurrentValue': round(efficiency_score, 1),
+            
+            # Chart data
+            'oeeChartData': [round(x, 1) for x in series['oee']],
+            'wasteChartData': [round(x, 2) for x in series['waste']],
+            'oeeFirstShift': [round(x, 1) for x in series['oee_first_shift']],
+            'oeeSecondShift': [round(x, 1) for x in series['oee_second_shift']],
+            'wasteFirstShift': [round(x, 2) for x in series['waste_first_shift']],
+            'wasteSecondShift': [round(x, 2) for x in series['waste_second_shift']],
+            'poundsFirstShift': [round(x, 1) for x in series['pounds_first_shift']],
+            'poundsSecondShift': [round(x, 1) for x in series['pounds_second_shift']],
+            
+            # Chart insights
+            'oeeBestDay': f"{WEEKDAYS[oee_best_idx]} - {series['oee'][oee_best_idx]:.1f}%",
+            'oeeWorstDay': f"{WEEKDAYS[oee_worst_idx]} - {series['oee'][oee_worst_idx]:.1f}%",
+            'wasteBestDay': f"{WEEKDAYS[waste_best_idx]} - {series['waste'][waste_best_idx]:.2f}%",
+            'wasteWorstDay': f"{WEEKDAYS[waste_worst_idx]} - {series['waste'][waste_worst_idx]:.2f}%",
+            
+            # Detailed table data
+            'oee1': round(line_data['oee1'], 1),
+            'oee2': round(line_data['oee2'], 1),
+            'oeeTotal': avg_oee,
+            'pounds1': round(line_data['pounds1'], 0),
+            'pounds2': round(line_data['pounds2'], 0),
+            'poundsTotal': round(total_production, 0),
+            'waste1': f"{round(line_data['waste1'], 1)} lbs",
+            'waste2': f"{round(line_data['waste2'], 1)} lbs",
+            'wasteTotal': f"{avg_waste}%",
+            'oee1Avg': round(line_data['oee1Avg'], 1),
+            'oee2Avg': round(line_data['oee2Avg'], 1),
+            'oeeTotalAvg': avg_oee,
+            'pounds1Avg': round(line_data['pounds1Avg'], 0),
+            'pounds2Avg': round(line_data['pounds2Avg'], 0),
+            'poundsTotalAvg': round(total_production, 0),
+            'waste1Avg': f"{round(line_data['waste1Avg'], 1)} lbs",
+            'waste2Avg': f"{round(line_data['waste2Avg'], 1)} lbs",
+            'wasteTotalAvg': f"{avg_waste}%",
+            
+            # Status calculations
+            'oeeStatus': 'On Target' if avg_oee >= 70 else 'Below Target',
+            'wasteStatus': 'Below Target' if avg_waste <= 3.75 else 'Above Target',
+            'productionStatus': 'Normal',
+            'efficiencyStatus': 'Good' if efficiency_score >= 7 else 'Fair'
+        }
+        
+        return jsonify(response_data)
+        
     except Exception as e:
         logger.error(f"Comprehensive report API error: {e}")
         return jsonify({'error': f'Unable to generate report: {str(e)}'}), 500
@@ -5698,143 +7574,29 @@ def get_weekly_metrics_charts():
     
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get combined metrics data from the both_shifts_metrics table
-                query = """
-                    SELECT
-                        ws.day_of_week,
-                        -- First shift specific data
-                        fs.die_cut1_oee_pct as first_shift_oee,
-                        fs.die_cut2_oee_pct as first_shift_oee2,
-                        fs.die_cut1_lbs + fs.die_cut2_lbs as first_shift_total_lbs,
-                        fs.die_cut1_waste_lb + fs.die_cut2_waste_lb as first_shift_total_waste,
-                        fs.oee_avg_pct as first_shift_avg_oee,
-                        fs.waste_avg_pct as first_shift_avg_waste,
-                        -- Second shift specific data
-                        ss.die_cut1_oee_pct as second_shift_oee,
-                        ss.die_cut2_oee_pct as second_shift_oee2,
-                        ss.die_cut1_lbs + ss.die_cut2_lbs as second_shift_total_lbs,
-                        ss.die_cut1_waste_lb + ss.die_cut2_waste_lb as second_shift_total_waste,
-                        ss.oee_avg_pct as second_shift_avg_oee,
-                        ss.waste_avg_pct as second_shift_avg_waste,
-                        -- Combined (both shifts) data
-                        bs.oee_avg_pct as total_oee,
-                        bs.waste_avg_pct as total_waste,
-                        bs.pounds_total as total_production
-                    FROM week_submissions ws
-                    LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
-                    LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
-                    LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
-                    WHERE ws.week_name = %s
-                    ORDER BY
-                        CASE ws.day_of_week
-                            WHEN 'Monday' THEN 1
-                            WHEN 'Tuesday' THEN 2
-                            WHEN 'Wednesday' THEN 3
-                            WHEN 'Thursday' THEN 4
-                            WHEN 'Friday' THEN 5
-                        END
-                """
-                
-                cur.execute(query, [week])
-                metrics_data = cur.fetchall()
-                
-                # Initialize data structures for all 5 weekdays
-                days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-                
-                # Initialize arrays with default values
-                first_shift_data = {
-                    'oee': [0.0] * 5,
-                    'waste': [0.0] * 5,
-                    'production': [0.0] * 5
-                }
-                
-                second_shift_data = {
-                    'oee': [0.0] * 5,
-                    'waste': [0.0] * 5,
-                    'production': [0.0] * 5
-                }
-                
-                both_shifts_data = {
-                    'oee': [0.0] * 5,
-                    'waste': [0.0] * 5,
-                    'production': [0.0] * 5
-                }
-                
-                # Process metrics data
-                for metric in metrics_data:
-                    if metric['day_of_week'] not in days:
-                        continue
-                        
-                    day_idx = days.index(metric['day_of_week'])
-                    
-                    # First shift data
-                    if metric['first_shift_avg_oee'] is not None:
-                        first_shift_data['oee'][day_idx] = float(metric['first_shift_avg_oee'])
-                    if metric['first_shift_avg_waste'] is not None:
-                        first_shift_data['waste'][day_idx] = float(metric['first_shift_avg_waste'])
-                    if metric['first_shift_total_lbs'] is not None:
-                        first_shift_data['production'][day_idx] = float(metric['first_shift_total_lbs'])
-                    
-                    # Second shift data
-                    if metric['second_shift_avg_oee'] is not None:
-                        second_shift_data['oee'][day_idx] = float(metric['second_shift_avg_oee'])
-                    if metric['second_shift_avg_waste'] is not None:
-                        second_shift_data['waste'][day_idx] = float(metric['second_shift_avg_waste'])
-                        logger.info(f"🔧 DEBUG Chart API Second Shift - Day: {metric['day_of_week']}, DB_waste_%: {metric['second_shift_avg_waste']}")
-                    if metric['second_shift_total_lbs'] is not None:
-                        second_shift_data['production'][day_idx] = float(metric['second_shift_total_lbs'])
-                    
-                    # Both shifts combined data
-                    if metric['total_oee'] is not None:
-                        both_shifts_data['oee'][day_idx] = float(metric['total_oee'])
-                    if metric['total_waste'] is not None:
-                        both_shifts_data['waste'][day_idx] = float(metric['total_waste'])
-                    if metric['total_production'] is not None:
-                        both_shifts_data['production'][day_idx] = float(metric['total_production'])
-                
-                # Calculate averages for summary
-                def safe_avg(values):
-                    non_zero = [v for v in values if v > 0]
-                    return round(sum(non_zero) / len(non_zero), 2) if non_zero else 0
-                
-                response_data = {
-                    'week': week,
-                    'days': days,
-                    'first_shift': {
-                        'oee': [round(v, 1) for v in first_shift_data['oee']],
-                        'waste': [round(v, 2) for v in first_shift_data['waste']],
-                        'production': [round(v, 1) for v in first_shift_data['production']],
-                        'averages': {
-                            'oee': safe_avg(first_shift_data['oee']),
-                            'waste': safe_avg(first_shift_data['waste']),
-                            'production': safe_avg(first_shift_data['production'])
-                        }
-                    },
-                    'second_shift': {
-                        'oee': [round(v, 1) for v in second_shift_data['oee']],
-                        'waste': [round(v, 2) for v in second_shift_data['waste']],
-                        'production': [round(v, 1) for v in second_shift_data['production']],
-                        'averages': {
-                            'oee': safe_avg(second_shift_data['oee']),
-                            'waste': safe_avg(second_shift_data['waste']),
-                            'production': safe_avg(second_shift_data['production'])
-                        }
-                    },
-                    'both_shifts': {
-                        'oee': [round(v, 1) for v in both_shifts_data['oee']],
-                        'waste': [round(v, 2) for v in both_shifts_data['waste']],
-                        'production': [round(v, 1) for v in both_shifts_data['production']],
-                        'averages': {
-                            'oee': safe_avg(both_shifts_data['oee']),
-                            'waste': safe_avg(both_shifts_data['waste']),
-                            'production': safe_avg(both_shifts_data['production'])
-                        }
-                    }
-                }
-                
-                return jsonify(response_data)
-                
+            rollup = load_weekly_rollup(conn, week)
+        if rollup is None:
+            return jsonify({'error': 'Week not found'}), 404
+
+        def shift_payload(shift_data):
+            return {
+                'oee': [round(v, 1) for v in shift_data['oee']],
+                'waste': [round(v, 2) for v in shift_data['waste']],
+                'production': [round(v, 1) for v in shift_data['production']],
+                'averages': shift_data['averages']
+            }
+
+        charts = rollup['charts']
+        response_data = {
+            'week': week,
+            'days': WEEKDAYS,
+            'first_shift': shift_payload(charts['first_shift']),
+            'second_shift': shift_payload(charts['second_shift']),
+            'both_shifts': shift_payload(charts['both_shifts'])
+        }
+        
+        return jsonify(response_data)
+        
     except Exception as e:
         logger.error(f"Weekly metrics charts error: {e}")
         # Return empty data structure on error
@@ -6025,6 +7787,199 @@ def get_both_shifts_records():
         logger.error(f"📊 ERROR: Both shifts records error: {e}")
         return jsonify([]), 500
 
+# Metrics export
+# Exports read through a server-side (named) cursor in EXPORT_FETCH_SIZE batches and
+# write each batch straight to the response (CSV) or to a write-only workbook that
+# openpyxl spools to disk (XLSX), so memory stays flat however many years are exported.
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', '2000'))
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Weeks start on Monday, so a submission's production date is its week start plus the weekday offset
+EXPORT_PRODUCTION_DATE_SQL = (
+    "(wsh.week_start + (array_position(ARRAY['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'], "
+    "TRIM(ws.day_of_week)) - 1))"
+)
+
+METRICS_EXPORT_COLUMNS = {
+    'common': [
+        ('Production Date', EXPORT_PRODUCTION_DATE_SQL),
+        ('Week', 'ws.week_name'),
+        ('Day', 'TRIM(ws.day_of_week)'),
+        ('Submitted By', 'ws.submitted_by'),
+        ('Submitted At', 'bs.created_at'),
+    ],
+    'first': [
+        ('First Shift Die-Cut 1 OEE %', 'fs.die_cut1_oee_pct'),
+        ('First Shift Die-Cut 2 OEE %', 'fs.die_cut2_oee_pct'),
+        ('First Shift OEE %', 'fs.oee_avg_pct'),
+        ('First Shift Die-Cut 1 lbs', 'fs.die_cut1_lbs'),
+        ('First Shift Die-Cut 2 lbs', 'fs.die_cut2_lbs'),
+        ('First Shift Die-Cut 1 Waste lbs', 'fs.die_cut1_waste_lb'),
+        ('First Shift Die-Cut 2 Waste lbs', 'fs.die_cut2_waste_lb'),
+        ('First Shift Die-Cut 1 Waste %', 'fs.die_cut1_waste_pct'),
+        ('First Shift Die-Cut 2 Waste %', 'fs.die_cut2_waste_pct'),
+        ('First Shift Waste %', 'fs.waste_avg_pct'),
+    ],
+    'second': [
+        ('Second Shift Die-Cut 1 OEE %', 'ss.die_cut1_oee_pct'),
+        ('Second Shift Die-Cut 2 OEE %', 'ss.die_cut2_oee_pct'),
+        ('Second Shift OEE %', 'ss.oee_avg_pct'),
+        ('Second Shift Die-Cut 1 lbs', 'ss.die_cut1_lbs'),
+        ('Second Shift Die-Cut 2 lbs', 'ss.die_cut2_lbs'),
+        ('Second Shift Die-Cut 1 Waste lbs', 'ss.die_cut1_waste_lb'),
+        ('Second Shift Die-Cut 2 Waste lbs', 'ss.die_cut2_waste_lb'),
+        ('Second Shift Die-Cut 1 Waste %', 'ss.die_cut1_waste_pct'),
+        ('Second Shift Die-Cut 2 Waste %', 'ss.die_cut2_waste_pct'),
+        ('Second Shift Waste %', 'ss.waste_avg_pct'),
+    ],
+    'both': [
+        ('Die-Cut 1 OEE %', 'bs.die_cut1_oee_pct'),
+        ('Die-Cut 2 OEE %', 'bs.die_cut2_oee_pct'),
+        ('Total OEE %', 'bs.oee_avg_pct'),
+        ('Die-Cut 1 lbs', 'bs.die_cut1_lbs'),
+        ('Die-Cut 2 lbs', 'bs.die_cut2_lbs'),
+        ('Total Production lbs', 'bs.pounds_total'),
+        ('Die-Cut 1 Waste lbs', 'bs.die_cut1_waste_lb'),
+        ('Die-Cut 2 Waste lbs', 'bs.die_cut2_waste_lb'),
+        ('Die-Cut 1 Waste %', 'bs.die_cut1_waste_pct'),
+        ('Die-Cut 2 Waste %', 'bs.die_cut2_waste_pct'),
+        ('Total Waste %', 'bs.waste_avg_pct'),
+    ],
+}
+
+def build_metrics_export_query(args):
+    """(headers, query, params) for a metrics export; raises ValueError for invalid filters."""
+    shift = args.get('shift', 'all').strip().lower()
+    if shift in ('all', 'both', ''):
+        groups = ['common', 'first', 'second', 'both']
+    elif shift in ('first', 'first shift'):
+        groups = ['common', 'first']
+    elif shift in ('second', 'second shift'):
+        groups = ['common', 'second']
+    else:
+        raise ValueError(f"Invalid shift: {shift}")
+    columns = [column for group in groups for column in METRICS_EXPORT_COLUMNS[group]]
+
+    conditions = []
+    params = []
+    if shift in ('first', 'first shift'):
+        conditions.append("fs.id IS NOT NULL")
+    elif shift in ('second', 'second shift'):
+        conditions.append("ss.id IS NOT NULL")
+
+    week = args.get('week', '').strip()
+    if week and week.lower() != 'all':
+        conditions.append("ws.week_name = %s")
+        params.append(week)
+
+    day = args.get('day', '').strip()
+    if day and day.lower() != 'all':
+        if day not in WEEKDAYS:
+            raise ValueError(f"Invalid day: {day}")
+        conditions.append("TRIM(ws.day_of_week) = %s")
+        params.append(day)
+
+    for arg, operator in (('start_date', '>='), ('end_date', '<=')):
+        value = args.get(arg, '').strip()
+        if value:
+            try:
+                params.append(datetime.strptime(value, '%Y-%m-%d').date())
+            except ValueError:
+                raise ValueError(f"Invalid {arg}, expected YYYY-MM-DD")
+            conditions.append(f"{EXPORT_PRODUCTION_DATE_SQL} {operator} %s")
+
+    query = f"""
+        SELECT {', '.join(expression for _, expression in columns)}
+        FROM both_shifts_metrics bs
+        JOIN week_submissions ws ON bs.week_submission_id = ws.id
+        LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
+        LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
+        LEFT JOIN LATERAL (
+            SELECT week_start FROM weekly_sheets WHERE sheet_name = ws.week_name LIMIT 1
+        ) wsh ON TRUE
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY bs.created_at, bs.id
+    """
+    return [header for header, _ in columns], query, params
+
+def iter_export_batches(query, params):
+    """Yield row batches from a server-side cursor on a connection held for the whole export."""
+    with _checkout_db_connection() as conn:
+        with conn.cursor(name=f"metrics_export_{uuid.uuid4().hex}") as cur:
+            cur.itersize = EXPORT_FETCH_SIZE
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    break
+                yield rows
+
+def _export_cell(value):
+    # Excel has no timezone support
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+def stream_csv_export(headers, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue()
+
+def stream_xlsx_export(headers, batches, sheet_title='Metrics'):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(headers)
+    for rows in batches:
+        for row in rows:
+            sheet.append([_export_cell(value) for value in row])
+
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+@app.route('/api/exports/metrics', methods=['GET'])
+@admin_or_supervisor_required
+def export_metrics():
+    """Stream historical shift metrics as CSV or XLSX, filtered by date range, week, day and shift"""
+    export_format = request.args.get('format', 'csv').strip().lower()
+    if export_format not in ('csv', 'xlsx'):
+        return jsonify({'success': False, 'message': 'format must be csv or xlsx'}), 400
+
+    try:
+        headers, query, params = build_metrics_export_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    logger.info(f"Metrics export ({export_format}) requested by {session.get('user_full_name')} with filters {dict(request.args)}")
+
+    filename = f"bakery-metrics-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    batches = iter_export_batches(query, params)
+    if export_format == 'csv':
+        body = stream_csv_export(headers, batches)
+        mimetype = 'text/csv'
+    else:
+        body = stream_xlsx_export(headers, batches)
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    response = app.response_class(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/both-shifts-record/<record_id>', methods=['GET'])
 @login_required
 def get_both_shifts_record_by_id(record_id):
@@ -6141,6 +8096,49 @@ def get_both_shifts_record_by_id(record_id):
 
 
 
+@app.route('/api/reports/pdf/<report_type>', methods=['GET'])
+@login_required
+@password_change_required
+def download_metrics_pdf(report_type):
+    """Download the daily or weekly metrics PDF, rendered in memory (or served from the PDF cache)."""
+    week_name = request.args.get('week')
+    day_of_week = request.args.get('day')
+    
+    if report_type not in ('daily', 'weekly'):
+        return jsonify({'success': False, 'message': 'Report type must be daily or weekly'}), 400
+    
+    if not week_name:
+        return jsonify({'success': False, 'message': 'Week parameter is required'}), 400
+    
+    valid_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    if report_type == 'daily' and day_of_week not in valid_days:
+        return jsonify({'success': False, 'message': 'A valid day parameter is required for the daily report'}), 400
+    
+    try:
+        pdf_data = get_metrics_pdf(report_type, week_name, day_of_week)
+        if not pdf_data:
+            return jsonify({
+                'success': False,
+                'message': f"No metrics data found for {week_name}{' - ' + day_of_week if report_type == 'daily' else ''}"
+            }), 404
+        
+        if report_type == 'daily':
+            filename = f"Daily_Metrics_{week_name}_{day_of_week}.pdf"
+        else:
+            filename = f"Weekly_Summary_{week_name}.pdf"
+        
+        return send_file(
+            io.BytesIO(pdf_data),
+            mimetype='application/pdf',
+            as_attachment=request.args.get('inline') != 'true',
+            download_name=filename,
+            max_age=0
+        )
+        
+    except Exception as e:
+        logger.error(f"Error generating {report_type} PDF download: {e}")
+        return jsonify({'success': False, 'message': 'Failed to generate PDF'}), 500
+
 # Foreign Material Report API Routes
 @app.route('/load-reports')
 @login_required
@@ -6154,15 +8152,14 @@ def load_reports():
 @login_required
 def get_report_names():
     try:
+        limit, cursor, _ = keyset_request_args(default_limit=100)
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT report_name, report_date 
+                reports, pagination = fetch_keyset_page(cur, """
+                    SELECT id, created_at, report_name, report_date 
                     FROM foreign_material_reports 
-                    WHERE report_name IS NOT NULL AND report_name != ''
-                    ORDER BY created_at DESC
-                """)
-                reports = cur.fetchall()
+                """, (), ('created_at', 'id'), limit, cursor,
+                    conditions=["report_name IS NOT NULL AND report_name != ''"])
 
                 report_list = []
                 for report in reports:
@@ -6171,12 +8168,25 @@ def get_report_names():
                     if name and date:
                         report_list.append(f"{name}-{date}")
 
-                return jsonify({"status": "success", "reports": report_list})
+                return jsonify({"status": "success", "reports": report_list,
+                                "next_cursor": pagination['next_cursor']})
 
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         logger.error(f"Get report names error: {e}")
         return jsonify({"status": "error", "message": str(e)})
 
+def report_image_variants(image):
+    """Thumbnail, display and original URLs for an fm_report_images row."""
+    url = image['image_url']
+    if url and url.startswith(image_placeholder_url('')):
+        return {'name': image['image_name'], 'url': url,
+                'thumbnail_url': f"{url}?variant=thumbnail", 'display_url': f"{url}?variant=display"}
+    return {'name': image['image_name'], 'url': url,
+            'thumbnail_url': image['thumbnail_url'] or image['display_url'] or url,
+            'display_url': image['display_url'] or url}
+
 @app.route('/get-report-data', methods=['GET'])
 @login_required
 def get_report_data():
@@ -6203,17 +8213,20 @@ def get_report_data():
 
                 # Get associated images
                 cur.execute("""
-                    SELECT image_url, image_name 
+                    SELECT image_url, image_name, thumbnail_url, display_url
                     FROM fm_report_images 
                     WHERE report_id = %s
                     ORDER BY uploaded_at
                 """, (report['id'],))
                 
-                images = [img['image_url'] for img in cur.fetchall()]
+                image_rows = cur.fetchall()
                 
-                # Convert report to dict and add images
+                # Convert report to dict and add images. Views should render thumbnail_url
+                # and only fetch display_url/url on demand; images still on their way to
+                # storage resolve their variants through the placeholder route.
                 report_dict = dict(report)
-                report_dict['images'] = images
+                report_dict['images'] = [img['image_url'] for img in image_rows]
+                report_dict['image_variants'] = [report_image_variants(img) for img in image_rows]
                 
                 # Format dates and times for frontend
                 if report_dict['report_date']:
@@ -6228,8 +8241,80 @@ def get_report_data():
         return jsonify({"status": "error", "message": str(e)})
     
     
+@app.route('/api/foreign-material-reports/<report_id>/images', methods=['POST'])
+@login_required
+def upload_report_images(report_id):
+    """Queue images for a foreign material report; they upload in the background."""
+    files = [f for f in request.files.getlist('images') if f and f.filename]
+    if not files:
+        return jsonify({'success': False, 'message': 'No images provided'}), 400
+
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id FROM foreign_material_reports WHERE id::text = %s", (report_id,))
+                report = cur.fetchone()
+        if not report:
+            return jsonify({'success': False, 'message': 'Report not found'}), 404
+
+        queued = []
+        for image_file in files:
+            job = enqueue_image_upload(image_file, report[0])
+            queued.append({'name': image_file.filename, **job,
+                           'thumbnail_url': f"{job['url']}?variant=thumbnail",
+                           'display_url': f"{job['url']}?variant=display"})
+        return jsonify({'success': True, 'images': queued,
+                        'message': f'{len(queued)} image(s) queued for upload'}), 202
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Report image upload error: {e}")
+        return jsonify({'success': False, 'message': 'Failed to queue images'}), 500
+
+@app.route('/api/report-images/<int:job_id>', methods=['GET'])
+@login_required
+def get_report_image(job_id):
+    """Placeholder URL for a queued image: the spooled copy until the upload finishes.
+
+    ?variant=thumbnail|display selects a downscaled copy, falling back to the
+    original when the variant doesn't exist (yet).
+    """
+    variant = request.args.get('variant')
+    if variant is not None and variant not in IMAGE_VARIANT_SIZES:
+        return jsonify({'success': False, 'message': f'Unknown image variant: {variant}'}), 400
+
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT status, final_url, thumbnail_url, display_url, spool_path, mimetype
+                FROM image_upload_jobs WHERE id = %s
+            """, (job_id,))
+            job = cur.fetchone()
+    if not job:
+        return jsonify({'success': False, 'message': 'Image not found'}), 404
+    if job['status'] == 'done' and job['final_url']:
+        return redirect((variant and job[f'{variant}_url']) or job['final_url'])
+
+    path, mimetype = job['spool_path'], job['mimetype']
+    if variant and os.path.exists(image_variant_path(job['spool_path'], variant)):
+        path = image_variant_path(job['spool_path'], variant)
+        mimetype = IMAGE_VARIANT_FORMATS[IMAGE_VARIANT_FORMAT][0]
+    if not os.path.exists(path):
+        return jsonify({'success': False, 'message': 'Image not available'}), 404
+    response = send_file(path, mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Upload-Status'] = job['status']
+    return response
+
+@app.route('/uploads/images/<path:filename>', methods=['GET'])
+@login_required
+def serve_uploaded_image(filename):
+    """Images stored by the local storage backend."""
+    return send_from_directory(IMAGE_LOCAL_STORAGE_DIR, filename, max_age=86400)
+
 @app.route('/api/submit-issue', methods=['POST'])
 @login_required
+@idempotent_submission
 def submit_issue():
     """API endpoint for submitting machine and quality issues"""
     try:
@@ -6371,18 +8456,31 @@ def get_issues():
             where_conditions.append("i.submitted_by ILIKE %s")
             query_params.append(f"%{submitter_filter}%")
         
-        # Add WHERE clause if there are conditions
-        if where_conditions:
-            base_query += " WHERE " + " AND ".join(where_conditions)
-        
-        # Add ORDER BY clause
-        base_query += " ORDER BY i.created_at DESC"
+        limit, cursor, include_total = keyset_request_args(default_limit=100)
+        page = max(1, int(request.args.get('page', 1)))
         
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(base_query, query_params)
-                
-                issues = cur.fetchall()
+                issues, pagination = fetch_keyset_page(
+                    cur, base_query, query_params, ('i.created_at', 'i.id'), limit, cursor,
+                    conditions=where_conditions, include_total=include_total)
+                if include_total:
+                    pagination['page'] = page
+                    pagination['total'], pagination['total_pages'] = keyset_page_totals(
+                        pagination, page, limit, len(issues))
+                
+                # Summary cards cover every issue, whatever page or filters are shown
+                stats = None
+                if request.args.get('stats') == '1':
+                    cur.execute("""
+                        SELECT
+                            COUNT(*) AS total,
+                            COUNT(*) FILTER (WHERE line = 'Die-Cut 1') AS die_cut_1,
+                            COUNT(*) FILTER (WHERE line = 'Die-Cut 2') AS die_cut_2,
+                            COUNT(*) FILTER (WHERE report_date >= CURRENT_DATE - 7) AS recent
+                        FROM issues
+                    """)
+                    stats = dict(cur.fetchone())
                 
                 # Format the data for frontend
                 formatted_issues = []
@@ -6400,12 +8498,21 @@ def get_issues():
                         'created_by_name': issue['created_by_name'] or 'Unknown'
                     })
                 
-                return jsonify({
+                response = {
                     'success': True,
                     'data': formatted_issues,
-                    'count': len(formatted_issues)
-                })
+                    'count': len(formatted_issues),
+                    'pagination': pagination
+                }
+                if stats is not None:
+                    response['stats'] = stats
+                return jsonify(response)
                 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Get issues error: {e}")
         return jsonify({
@@ -6745,6 +8852,7 @@ def api_create_week():
                 """, (week_id, sheet_name, start_date, end_date))
                 
                 conn.commit()
+                invalidate_week_list()
                 
                 # Log the creation
                 user_id = session.get('user_id')
@@ -6846,6 +8954,9 @@ def api_delete_week(week_id):
                     }), 500
                 
                 conn.commit()
+                invalidate_pdf_cache(week_info[0])
+                invalidate_response_cache(week_info[0])
+                invalidate_week_list()
                 
                 # Log the deletion
                 user_id = session.get('user_id')
@@ -6971,51 +9082,18 @@ def get_production_insights():
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 
-                # 1. Get performance metrics for comparison
-                cur.execute("""
-                    SELECT
-                        ws.day_of_week,
-                        -- First shift data
-                        fs.die_cut1_oee_pct as first_dc1_oee,
-                        fs.die_cut2_oee_pct as first_dc2_oee,
-                        fs.die_cut1_lbs as first_dc1_lbs,
-                        fs.die_cut2_lbs as first_dc2_lbs,
-                        fs.die_cut1_waste_lb as first_dc1_waste,
-                        fs.die_cut2_waste_lb as first_dc2_waste,
-                        fs.oee_avg_pct as first_oee_avg,
-                        fs.waste_avg_pct as first_waste_avg,
-                        -- Second shift data
-                        ss.die_cut1_oee_pct as second_dc1_oee,
-                        ss.die_cut2_oee_pct as second_dc2_oee,
-                        ss.die_cut1_lbs as second_dc1_lbs,
-                        ss.die_cut2_lbs as second_dc2_lbs,
-                        ss.die_cut1_waste_lb as second_dc1_waste,
-                        ss.die_cut2_waste_lb as second_dc2_waste,
-                        ss.oee_avg_pct as second_oee_avg,
-                        ss.waste_avg_pct as second_waste_avg,
-                        -- Combined data
-                        bs.oee_avg_pct as combined_oee_avg,
-                        bs.waste_avg_pct as combined_waste_avg,
-                        bs.pounds_total as combined_pounds_total
-                    FROM week_submissions ws
-                    LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
-                    LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
-                    LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
-                    WHERE ws.created_at >= %s
-                    ORDER BY ws.created_at DESC
-                """, (start_date,))
-                
-                metrics_data = cur.fetchall()
+                # 1. Get performance statistics for comparison, aggregated in the database
+                metrics_summary = fetch_production_summary(cur, start_date)
+                weekly_trend = fetch_weekly_production_trend(cur, start_date)
                 
-                # 2. Get recent issues by line and shift (use report_date for more accurate filtering)
+                # 2. Get recent issue counts by line and shift (use report_date for more accurate filtering)
                 cur.execute("""
                     SELECT
                         line,
                         shift,
                         COUNT(*) as issue_count,
-                        array_agg(DISTINCT title) as issue_titles,
-                        array_agg(DISTINCT issue_details) as recent_details,
-                        array_agg(DISTINCT report_date::text) as report_dates
+                        COUNT(DISTINCT title) as distinct_titles,
+                        MAX(report_date) as last_report_date
                     FROM issues
                     WHERE report_date >= %s OR created_at >= %s
                     GROUP BY line, shift
@@ -7042,7 +9120,7 @@ def get_production_insights():
                 inventory_data = cur.fetchall()
                 
                 # 4. Calculate insights
-                insights = calculate_production_insights(metrics_data, issues_data, inventory_data)
+                insights = calculate_production_insights(metrics_summary, weekly_trend, issues_data, inventory_data)
                 
                 return jsonify({
                     'success': True,
@@ -7058,37 +9136,159 @@ def get_production_insights():
             'message': 'Error generating production insights'
         }), 500
 
-def calculate_production_insights(metrics_data, issues_data, inventory_data):
-    """Calculate production insights from real data"""
+# Columnar analytics
+# The insight generators load their rows into NumPy columns once (missing values as
+# NaN) and answer means, totals and per-group statistics with vectorized reductions,
+# so a year of submissions costs no more Python work than a week. Production insights
+# aggregate in SQL instead (below).
+class MetricFrame:
+    """Metric rows (dicts) held as float columns plus label columns."""
+
+    def __init__(self, rows, numeric_columns=(), label_columns=()):
+        self.size = len(rows)
+        self.columns = {
+            name: np.array([row[name] for row in rows], dtype=float).reshape(self.size)
+            for name in numeric_columns
+        }
+        self.labels = {
+            name: np.array([row[name] for row in rows], dtype=object).reshape(self.size)
+            for name in label_columns
+        }
+
+    def values(self, name, exclude_zero=False):
+        """Non-missing values of a column (optionally without zeros)."""
+        column = self.columns[name]
+        mask = ~np.isnan(column)
+        if exclude_zero:
+            mask &= column != 0
+        return column[mask]
+
+    def mean(self, name, exclude_zero=False):
+        values = self.values(name, exclude_zero)
+        return float(values.mean()) if values.size else 0.0
+
+    def total(self, name):
+        return float(np.nansum(self.columns[name]))
+
+    def group_stats(self, value_column, label_column, exclude_zero=False):
+        """{label: {'mean', 'total', 'count'}} per label, in order of first appearance.
+
+        Rows with an empty label or a missing value are skipped; with value_column=None
+        every row counts as 1, which makes 'total' a row count.
+        """
+        labels = self.labels[label_column]
+        if value_column is None:
+            values = np.ones(self.size)
+        else:
+            values = self.columns[value_column]
+        mask = ~np.isnan(values) & labels.astype(bool)
+        if exclude_zero:
+            mask &= values != 0
+        if not mask.any():
+            return {}
+
+        keys, first_index, inverse = np.unique(labels[mask].astype(str), return_index=True, return_inverse=True)
+        totals = np.bincount(inverse, weights=values[mask], minlength=keys.size)
+        counts = np.bincount(inverse, minlength=keys.size)
+        return {
+            str(keys[i]): {'mean': float(totals[i] / counts[i]), 'total': float(totals[i]), 'count': int(counts[i])}
+            for i in np.argsort(first_index)
+        }
+
+# Production insights aggregate in SQL: the period's per-line statistics come back as
+# one row and the week-over-week series as one row per week, whatever the period length.
+PRODUCTION_INSIGHT_LINE_SHIFTS = [
+    ('Die-Cut 1-firstshift', 'first_dc1_oee', 'fs.die_cut1_oee_pct'),
+    ('Die-Cut 1-secondshift', 'second_dc1_oee', 'ss.die_cut1_oee_pct'),
+    ('Die-Cut 2-firstshift', 'first_dc2_oee', 'fs.die_cut2_oee_pct'),
+    ('Die-Cut 2-secondshift', 'second_dc2_oee', 'ss.die_cut2_oee_pct'),
+]
+PRODUCTION_INSIGHT_WASTE_COLUMNS = ['fs.die_cut1_waste_lb', 'fs.die_cut2_waste_lb', 'ss.die_cut1_waste_lb', 'ss.die_cut2_waste_lb']
+
+def fetch_production_summary(cur, start_date):
+    """Per line/shift OEE average, count and percentiles plus period totals and OEE trend, as one row."""
+    period_columns = ", ".join(
+        f"{expression} AS {alias}" for _, alias, expression in PRODUCTION_INSIGHT_LINE_SHIFTS
+    )
+    statistics = ", ".join(
+        f"AVG({alias}) AS {alias}_avg, COUNT({alias}) AS {alias}_count, "
+        f"percentile_cont(0.5) WITHIN GROUP (ORDER BY {alias}) AS {alias}_p50, "
+        f"percentile_cont(0.9) WITHIN GROUP (ORDER BY {alias}) AS {alias}_p90"
+        for _, alias, _ in PRODUCTION_INSIGHT_LINE_SHIFTS
+    )
+    waste = " + ".join(f"COALESCE({column}, 0)" for column in PRODUCTION_INSIGHT_WASTE_COLUMNS)
+    cur.execute(f"""
+        WITH period AS (
+            SELECT
+                {period_columns},
+                {waste} AS waste_lbs,
+                bs.pounds_total AS pounds_total,
+                bs.oee_avg_pct AS combined_oee,
+                ROW_NUMBER() OVER (ORDER BY ws.created_at, ws.id) AS seq
+            FROM week_submissions ws
+            LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
+            LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
+            LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
+            WHERE ws.created_at >= %s
+        )
+        SELECT
+            COUNT(*) AS data_points,
+            {statistics},
+            COALESCE(SUM(waste_lbs), 0) AS total_waste_lbs,
+            COALESCE(SUM(pounds_total), 0) AS total_production_lbs,
+            regr_slope(combined_oee, seq) AS oee_trend
+        FROM period
+    """, (start_date,))
+    return cur.fetchone()
+
+def fetch_weekly_production_trend(cur, start_date):
+    """Weekly OEE, waste and production with week-over-week deltas, oldest week first."""
+    cur.execute("""
+        WITH weeks AS (
+            SELECT
+                ws.week_name,
+                MIN(ws.created_at) AS first_submitted,
+                COUNT(*) AS submissions,
+                AVG(bs.oee_avg_pct) AS avg_oee,
+                AVG(bs.waste_avg_pct) AS avg_waste,
+                COALESCE(SUM(bs.pounds_total), 0) AS total_lbs
+            FROM week_submissions ws
+            LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
+            WHERE ws.created_at >= %s
+            GROUP BY ws.week_name
+        )
+        SELECT
+            week_name,
+            submissions,
+            avg_oee,
+            avg_waste,
+            total_lbs,
+            avg_oee - LAG(avg_oee) OVER w AS oee_delta,
+            avg_waste - LAG(avg_waste) OVER w AS waste_delta,
+            total_lbs - LAG(total_lbs) OVER w AS lbs_delta
+        FROM weeks
+        WINDOW w AS (ORDER BY first_submitted)
+        ORDER BY first_submitted
+    """, (start_date,))
+    return cur.fetchall()
+
+def _rounded(value, digits=1):
+    return round(float(value), digits) if value is not None else None
+
+def calculate_production_insights(metrics_summary, weekly_trend, issues_data, inventory_data):
+    """Calculate production insights from the period's aggregated statistics"""
     
-    # Initialize results
-    line_performance = {
-        'Die-Cut 1': {'first': [], 'second': []},
-        'Die-Cut 2': {'first': [], 'second': []}
+    # Average OEE per line and shift
+    performance_averages = {
+        key: {
+            'average': _rounded(metrics_summary[f'{alias}_avg']) or 0,
+            'count': metrics_summary[f'{alias}_count'],
+            'median': _rounded(metrics_summary[f'{alias}_p50']),
+            'p90': _rounded(metrics_summary[f'{alias}_p90'])
+        }
+        for key, alias, _ in PRODUCTION_INSIGHT_LINE_SHIFTS
     }
     
-    # Process metrics data
-    for metric in metrics_data:
-        if metric['first_dc1_oee'] is not None:
-            line_performance['Die-Cut 1']['first'].append(float(metric['first_dc1_oee']))
-        if metric['first_dc2_oee'] is not None:
-            line_performance['Die-Cut 2']['first'].append(float(metric['first_dc2_oee']))
-        if metric['second_dc1_oee'] is not None:
-            line_performance['Die-Cut 1']['second'].append(float(metric['second_dc1_oee']))
-        if metric['second_dc2_oee'] is not None:
-            line_performance['Die-Cut 2']['second'].append(float(metric['second_dc2_oee']))
-    
-    # Calculate averages
-    performance_averages = {}
-    for line in line_performance:
-        for shift in line_performance[line]:
-            key = f"{line}-{shift}shift"
-            values = line_performance[line][shift]
-            performance_averages[key] = {
-                'average': round(sum(values) / len(values), 1) if values else 0,
-                'count': len(values)
-            }
-    
     # Find top performer and needs attention
     all_performances = [(k, v['average']) for k, v in performance_averages.items() if v['average'] > 0]
     all_performances.sort(key=lambda x: x[1], reverse=True)
@@ -7123,21 +9323,9 @@ def calculate_production_insights(metrics_data, issues_data, inventory_data):
             'metric': f"{worst[1]}% average OEE"
         }
     
-    # Calculate waste reduction savings
-    total_waste_lbs = 0
-    total_production_lbs = 0
-    
-    for metric in metrics_data:
-        if metric['combined_pounds_total']:
-            total_production_lbs += float(metric['combined_pounds_total'])
-        # Calculate waste from individual shifts
-        for shift_prefix in ['first', 'second']:
-            dc1_waste = metric.get(f'{shift_prefix}_dc1_waste')
-            dc2_waste = metric.get(f'{shift_prefix}_dc2_waste')
-            if dc1_waste:
-                total_waste_lbs += float(dc1_waste)
-            if dc2_waste:
-                total_waste_lbs += float(dc2_waste)
+    # Calculate waste reduction savings from both shifts' waste on both lines
+    total_waste_lbs = float(metrics_summary['total_waste_lbs'])
+    total_production_lbs = float(metrics_summary['total_production_lbs'])
     
     # Assume $2 per lb waste cost and calculate savings from waste reduction
     waste_cost_per_lb = 2.0
@@ -7172,8 +9360,23 @@ def calculate_production_insights(metrics_data, issues_data, inventory_data):
             'total_production': total_production,
             'waste_percentage': waste_percentage,
             'total_waste_lbs': round(total_waste_lbs, 1),
-            'data_points': len(metrics_data)
-        }
+            'oee_trend': _rounded(metrics_summary['oee_trend'], 2) or 0.0,
+            'data_points': metrics_summary['data_points']
+        },
+        'line_performance': performance_averages,
+        'weekly_trend': [
+            {
+                'week': week['week_name'],
+                'submissions': week['submissions'],
+                'avg_oee': _rounded(week['avg_oee']),
+                'avg_waste': _rounded(week['avg_waste'], 2),
+                'total_lbs': _rounded(week['total_lbs'], 0),
+                'oee_delta': _rounded(week['oee_delta']),
+                'waste_delta': _rounded(week['waste_delta'], 2),
+                'lbs_delta': _rounded(week['lbs_delta'], 0)
+            }
+            for week in weekly_trend
+        ]
     }
 
 def generate_recommendations(issues_data, performance_averages, total_waste_lbs):
@@ -7185,12 +9388,8 @@ def generate_recommendations(issues_data, performance_averages, total_waste_lbs)
     logger.info(f"🔧 DEBUG: Performance averages: {performance_averages}")
     
     # Issue-based recommendations - Group by line only (not by shift)
-    line_issues = {}
-    for issue in issues_data:
-        line = issue['line']
-        if line not in line_issues:
-            line_issues[line] = 0
-        line_issues[line] += issue['issue_count']
+    issue_frame = MetricFrame(issues_data, numeric_columns=['issue_count'], label_columns=['line'])
+    line_issues = {line: int(stats['total']) for line, stats in issue_frame.group_stats('issue_count', 'line').items()}
     
     logger.info(f"🔧 DEBUG: Line issues grouped: {line_issues}")
     
@@ -7745,66 +9944,64 @@ def update_work_order(work_order_id):
 
 def generate_maintenance_recommendations(equipment_list, issues_data):
     """Generate maintenance recommendations based on equipment health and issues"""
-    recommendations = []
+    if not equipment_list:
+        return []
     
-    for equipment in equipment_list:
-        name = equipment['name']
-        health_score = equipment['health_score']
-        issues = equipment['issues']
-        days_until_service = equipment['days_until_service']
-        
-        # Critical health score recommendations
-        if health_score < 70:
-            recommendations.append({
-                'priority': 'critical',
-                'equipment': name,
-                'title': f"Immediate {name} maintenance required",
-                'description': f"Health score of {health_score}% indicates critical issues",
-                'action': "Schedule emergency maintenance within 24 hours",
-                'work_type': 'repair'
-            })
-        
-        # Service overdue recommendations
-        if days_until_service is not None and days_until_service < 0:
-            recommendations.append({
-                'priority': 'high',
-                'equipment': name,
-                'title': f"{name} service overdue",
-                'description': f"Service was due {abs(days_until_service)} days ago",
-                'action': "Schedule preventive maintenance immediately",
-                'work_type': 'preventive_maintenance'
-            })
-        
-        # Issue-based recommendations
-        if issues and len(issues) >= 2:
-            recommendations.append({
-                'priority': 'medium',
-                'equipment': name,
-                'title': f"Address recurring {name} issues",
-                'description': f"Multiple issues reported: {', '.join(issues[:2])}",
-                'action': "Perform root cause analysis and corrective action",
-                'work_type': 'routine_inspection'
-            })
-        
-        # Upcoming service recommendations
-        if days_until_service is not None and 0 <= days_until_service <= 7:
-            recommendations.append({
-                'priority': 'low',
-                'equipment': name,
-                'title': f"{name} service due soon",
-                'description': f"Scheduled service in {days_until_service} days",
-                'action': "Prepare for upcoming maintenance",
-                'work_type': 'preventive_maintenance'
-            })
+    frame = MetricFrame(equipment_list, numeric_columns=['health_score', 'days_until_service'])
+    health_scores = frame.columns['health_score']
+    days_until_service = frame.columns['days_until_service']  # NaN when no service is scheduled
+    issue_counts = np.fromiter((len(equipment['issues'] or []) for equipment in equipment_list),
+                               dtype=int, count=frame.size)
+    
+    # One rule per priority, most urgent first; each rule's mask picks the equipment it applies to
+    rules = [
+        (health_scores < 70, lambda equipment: {
+            'priority': 'critical',
+            'equipment': equipment['name'],
+            'title': f"Immediate {equipment['name']} maintenance required",
+            'description': f"Health score of {equipment['health_score']}% indicates critical issues",
+            'action': "Schedule emergency maintenance within 24 hours",
+            'work_type': 'repair'
+        }),
+        (days_until_service < 0, lambda equipment: {
+            'priority': 'high',
+            'equipment': equipment['name'],
+            'title': f"{equipment['name']} service overdue",
+            'description': f"Service was due {abs(equipment['days_until_service'])} days ago",
+            'action': "Schedule preventive maintenance immediately",
+            'work_type': 'preventive_maintenance'
+        }),
+        (issue_counts >= 2, lambda equipment: {
+            'priority': 'medium',
+            'equipment': equipment['name'],
+            'title': f"Address recurring {equipment['name']} issues",
+            'description': f"Multiple issues reported: {', '.join(equipment['issues'][:2])}",
+            'action': "Perform root cause analysis and corrective action",
+            'work_type': 'routine_inspection'
+        }),
+        ((days_until_service >= 0) & (days_until_service <= 7), lambda equipment: {
+            'priority': 'low',
+            'equipment': equipment['name'],
+            'title': f"{equipment['name']} service due soon",
+            'description': f"Scheduled service in {equipment['days_until_service']} days",
+            'action': "Prepare for upcoming maintenance",
+            'work_type': 'preventive_maintenance'
+        }),
+    ]
     
-    # Sort by priority and limit to top 5
-    priority_order = {'critical': 1, 'high': 2, 'medium': 3, 'low': 4}
-    recommendations.sort(key=lambda x: priority_order.get(x['priority'], 5))
+    # Highest priority first, then equipment order - limited to top 5
+    recommendations = []
+    for mask, build in rules:
+        for index in np.flatnonzero(mask):
+            recommendations.append(build(equipment_list[index]))
+            if len(recommendations) == 5:
+                return recommendations
     
-    return recommendations[:5]
+    return recommendations
 
 @app.route('/api/report-dashboard-metrics', methods=['GET'])
 @login_required
+@cached_response(week_cache_tags())
 def get_report_dashboard_metrics():
     """API endpoint for report page dashboard metrics cards - provides real data from both_shifts table"""
     try:
@@ -8100,34 +10297,29 @@ def generate_ai_insights_from_data(metrics_data, issues_data):
         }
     
     # Calculate performance statistics
-    oee_values = [float(r['oee_avg_pct']) for r in metrics_data if r['oee_avg_pct'] is not None]
-    waste_values = [float(r['waste_avg_pct']) for r in metrics_data if r['waste_avg_pct'] is not None]
-    production_values = [float(r['pounds_total']) for r in metrics_data if r['pounds_total'] is not None]
+    frame = MetricFrame(
+        metrics_data,
+        numeric_columns=['oee_avg_pct', 'waste_avg_pct', 'pounds_total', 'die_cut1_oee_pct', 'die_cut2_oee_pct'],
+        label_columns=['day_of_week']
+    )
     
-    avg_oee = sum(oee_values) / len(oee_values) if oee_values else 0
-    avg_waste = sum(waste_values) / len(waste_values) if waste_values else 0
-    total_production = sum(production_values) if production_values else 0
+    avg_oee = frame.mean('oee_avg_pct')
+    avg_waste = frame.mean('waste_avg_pct')
+    total_production = frame.total('pounds_total')
     
-    # Analyze day-of-week patterns
-    day_performance = {}
-    for record in metrics_data:
-        day = record['day_of_week']
-        if day and record['oee_avg_pct']:
-            if day not in day_performance:
-                day_performance[day] = []
-            day_performance[day].append(float(record['oee_avg_pct']))
+    # Analyze day-of-week patterns (days without a recorded OEE are left out)
+    day_averages = {
+        day: stats['mean']
+        for day, stats in frame.group_stats('oee_avg_pct', 'day_of_week', exclude_zero=True).items()
+    }
     
     # Find best and worst performing days
-    day_averages = {day: sum(values) / len(values) for day, values in day_performance.items() if values}
-    best_day = max(day_averages.keys(), key=lambda x: day_averages[x]) if day_averages else None
-    worst_day = min(day_averages.keys(), key=lambda x: day_averages[x]) if day_averages else None
+    best_day = max(day_averages, key=day_averages.get) if day_averages else None
+    worst_day = min(day_averages, key=day_averages.get) if day_averages else None
     
     # Analyze Die Cut performance
-    dc1_oee = [float(r['die_cut1_oee_pct']) for r in metrics_data if r['die_cut1_oee_pct'] is not None]
-    dc2_oee = [float(r['die_cut2_oee_pct']) for r in metrics_data if r['die_cut2_oee_pct'] is not None]
-    
-    avg_dc1_oee = sum(dc1_oee) / len(dc1_oee) if dc1_oee else 0
-    avg_dc2_oee = sum(dc2_oee) / len(dc2_oee) if dc2_oee else 0
+    avg_dc1_oee = frame.mean('die_cut1_oee_pct')
+    avg_dc2_oee = frame.mean('die_cut2_oee_pct')
     
     # Generate key insights
     key_insights = []
@@ -8230,13 +10422,8 @@ def generate_ai_insights_from_data(metrics_data, issues_data):
         })
     
     # Issue-based recommendations
-    line_issues = {}
-    for issue in issues_data:
-        line = issue['line']
-        if line:
-            if line not in line_issues:
-                line_issues[line] = 0
-            line_issues[line] += 1
+    issue_frame = MetricFrame(issues_data, label_columns=['line'])
+    line_issues = {line: stats['count'] for line, stats in issue_frame.group_stats(None, 'line').items()}
     
     for line, count in line_issues.items():
         if count >= 2:
@@ -8497,6 +10684,7 @@ def get_all_submissions():
         user_name = session.get('user_full_name')
         
         logger.info(f"All submissions request - user_id: {user_id}, user_name: '{user_name}'")
+        limit, cursor, include_total = keyset_request_args(default_limit=20, max_limit=100)
         
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -8505,7 +10693,7 @@ def get_all_submissions():
                 logger.info(f"Searching for detailed submissions by: exact='{user_name}', first_name='{first_name}'")
                 logger.info(f"Note: Showing ALL submissions for testing due to user mismatch")
                 
-                cur.execute("""
+                submissions, pagination = fetch_keyset_page(cur, """
                     SELECT
                         ws.id,
                         ws.day_of_week,
@@ -8542,11 +10730,7 @@ def get_all_submissions():
                     LEFT JOIN first_shift_metrics fs ON ws.id = fs.week_submission_id
                     LEFT JOIN second_shift_metrics ss ON ws.id = ss.week_submission_id
                     LEFT JOIN both_shifts_metrics bs ON ws.id = bs.week_submission_id
-                    ORDER BY ws.created_at DESC
-                    LIMIT 20
-                """)
-                
-                submissions = cur.fetchall()
+                """, (), ('ws.created_at', 'ws.id'), limit, cursor, include_total=include_total)
                 logger.info(f"Query result: Found {len(submissions)} detailed submissions")
                 for sub in submissions:
                     logger.info(f"  - {sub['submitted_by']}: {sub['week_name']} {sub['day_of_week']}")
@@ -8603,9 +10787,17 @@ def get_all_submissions():
                 return jsonify({
                     'success': True,
                     'submissions': formatted_submissions,
-                    'total_count': len(formatted_submissions)
+                    'total_count': len(formatted_submissions),
+                    'pagination': pagination
                 })
                 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'submissions': [],
+            'total_count': 0,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"All submissions error: {e}")
         return jsonify({
@@ -8650,36 +10842,15 @@ def get_google_sheets():
     logger.info(f"Session data: {dict(session)}")
     
     try:
-        # Import Google API components
+        # Shared, already-authenticated clients
         try:
-            from googleapiclient.discovery import build
-            from google.oauth2.service_account import Credentials
-            logger.info("Google API libraries imported successfully")
-        except ImportError as e:
-            logger.error(f"Failed to import Google API libraries: {e}")
-            return jsonify({
-                'success': False,
-                'message': 'Google API libraries not available. Please ensure google-api-python-client and google-auth are installed.'
-            }), 500
-        
-        # Check for credentials file
-        creds_path = os.getenv('GOOGLE_CREDENTIALS_PATH', 'credentials.json')
-        logger.info(f"Looking for credentials at: {creds_path}")
-        
-        if not os.path.exists(creds_path):
-            logger.error(f"Credentials file not found at: {creds_path}")
+            sheets_service = get_google_service('sheets', 'v4')
+        except GoogleAPIUnavailable as e:
+            logger.error(str(e))
             return jsonify({
                 'success': False,
-                'message': f'Google credentials file not found at {creds_path}'
+                'message': str(e)
             }), 500
-        
-        # Authenticate with Google APIs using newer auth library
-        try:
-            scopes = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
-            creds = Credentials.from_service_account_file(creds_path, scopes=scopes)
-            drive_service = build('drive', 'v3', credentials=creds)
-            sheets_service = build('sheets', 'v4', credentials=creds)
-            logger.info("Google APIs authenticated successfully")
         except Exception as e:
             logger.error(f"Failed to authenticate with Google APIs: {e}")
             return jsonify({
@@ -8689,19 +10860,15 @@ def get_google_sheets():
         
         # Find the BAKERY METRICS spreadsheet
         try:
-            query = "name='BAKERY METRICS_2024-2025' and mimeType='application/vnd.google-apps.spreadsheet' and trashed=false"
-            logger.info(f"Searching for BAKERY METRICS spreadsheet")
-            results = drive_service.files().list(q=query, fields="files(id,name)").execute()
-            files = results.get('files', [])
+            spreadsheet_id = get_spreadsheet_id()
             
-            if not files:
-                logger.error("BAKERY METRICS_2024-2025 spreadsheet not found")
+            if not spreadsheet_id:
+                logger.error(f"{GOOGLE_SPREADSHEET_NAME} spreadsheet not found")
                 return jsonify({
                     'success': False,
-                    'message': 'BAKERY METRICS_2024-2025 spreadsheet not found'
+                    'message': f'{GOOGLE_SPREADSHEET_NAME} spreadsheet not found'
                 }), 404
             
-            spreadsheet_id = files[0]['id']
             logger.info(f"Found BAKERY METRICS spreadsheet: {spreadsheet_id}")
             
         except Exception as e:
@@ -8713,7 +10880,10 @@ def get_google_sheets():
         
         # Get all sheet tabs from the spreadsheet
         try:
-            spreadsheet = sheets_service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+            spreadsheet = sheets_service.spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields='sheets.properties(title,sheetId)'
+            ).execute()
             sheets = spreadsheet.get('sheets', [])
             logger.info(f"Found {len(sheets)} sheet tabs")
         except Exception as e:
@@ -8724,13 +10894,11 @@ def get_google_sheets():
             }), 500
         
         # Filter sheet tabs that match the pattern mm-dd-yyyy_mm-dd-yyyy
-        import re
-        pattern = r'^\d{2}-\d{2}-\d{4}_\d{2}-\d{2}-\d{4}$'
         matching_sheets = []
         
         for sheet in sheets:
             sheet_name = sheet['properties']['title']
-            if re.match(pattern, sheet_name):
+            if SHEET_WEEK_TAB_PATTERN.match(sheet_name):
                 matching_sheets.append({
                     'id': spreadsheet_id,  # Same spreadsheet ID for all tabs
                     'name': sheet_name,
@@ -8758,184 +10926,165 @@ def get_google_sheets():
             'message': f'An unexpected error occurred: {str(e)}'
         }), 500
 
+# Sheet import layout: week tab names, the weekday columns of a tab and the row of each metric
+SHEET_WEEK_TAB_PATTERN = re.compile(r'^\d{2}-\d{2}-\d{4}_\d{2}-\d{2}-\d{4}$')
+SHEET_DAY_COLUMNS = {
+    'Monday': 'D',
+    'Tuesday': 'E',
+    'Wednesday': 'F',
+    'Thursday': 'G',
+    'Friday': 'H'
+}
+SHEET_METRIC_ROWS = [
+    ('first_shift', 'die_cut1_oee_pct', 6),
+    ('first_shift', 'die_cut2_oee_pct', 7),
+    ('first_shift', 'die_cut1_pounds', 9),
+    ('first_shift', 'die_cut2_pounds', 10),
+    ('first_shift', 'die_cut1_waste_lbs', 12),
+    ('first_shift', 'die_cut2_waste_lbs', 13),
+    ('second_shift', 'die_cut1_oee_pct', 20),
+    ('second_shift', 'die_cut2_oee_pct', 21),
+    ('second_shift', 'die_cut1_pounds', 23),
+    ('second_shift', 'die_cut2_pounds', 24),
+    ('second_shift', 'die_cut1_waste_lbs', 26),
+    ('second_shift', 'die_cut2_waste_lbs', 27),
+]
+SHEET_METRIC_FIELDS = ['die_cut1_oee_pct', 'die_cut2_oee_pct', 'die_cut1_pounds',
+                       'die_cut2_pounds', 'die_cut1_waste_lbs', 'die_cut2_waste_lbs']
+
+def _sheet_number(row_values, offset):
+    try:
+        value = row_values[offset]
+        if value and str(value).strip():
+            return float(value)
+    except (ValueError, IndexError):
+        pass
+    return None
+
+def sheet_day_has_values(day_data):
+    """True when any shift metric of a fetched sheet day is filled in."""
+    return any(value is not None for shift in (day_data or {}).values() for value in (shift or {}).values())
+
+def fetch_sheet_days(sheet_name, days):
+    """Metric values for `days` of a week tab, read with a single values.batchGet.
+
+    Each metric row is requested once across the day columns, so a whole week costs
+    the same single call as one day. Returns {day: {'first_shift': {...}, 'second_shift': {...}}}
+    and raises LookupError when the spreadsheet or the tab does not exist.
+    """
+    spreadsheet_id = get_spreadsheet_id()
+    if not spreadsheet_id:
+        raise LookupError(f'{GOOGLE_SPREADSHEET_NAME} spreadsheet not found')
+
+    columns = [SHEET_DAY_COLUMNS[day] for day in days]
+    first_column, last_column = min(columns), max(columns)
+    quoted_name = sheet_name.replace("'", "''")
+    ranges = [f"'{quoted_name}'!{first_column}{row}:{last_column}{row}" for _, _, row in SHEET_METRIC_ROWS]
+
+    try:
+        result = get_google_service('sheets', 'v4').spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=ranges
+        ).execute()
+    except Exception as e:
+        # The API rejects ranges on a tab that does not exist with a 400
+        if getattr(getattr(e, 'resp', None), 'status', None) == 400:
+            raise LookupError(f'Sheet tab "{sheet_name}" not found')
+        raise
+
+    value_ranges = result.get('valueRanges', [])
+    days_data = {day: {'first_shift': {}, 'second_shift': {}} for day in days}
+    for (shift, field, _), value_range in zip(SHEET_METRIC_ROWS, value_ranges + [{}] * len(SHEET_METRIC_ROWS)):
+        row_values = (value_range.get('values') or [[]])[0]
+        for day, column in zip(days, columns):
+            days_data[day][shift][field] = _sheet_number(row_values, ord(column) - ord(first_column))
+    return days_data
+
+def sheet_week_dates(sheet_name):
+    """(week_start, week_end) parsed from a mm-dd-yyyy_mm-dd-yyyy tab name."""
+    try:
+        if '_' in sheet_name:
+            start_date_str, end_date_str = sheet_name.split('_')
+            return (datetime.strptime(start_date_str, '%m-%d-%Y').date(),
+                    datetime.strptime(end_date_str, '%m-%d-%Y').date())
+    except ValueError:
+        pass
+    # Fallback dates if parsing fails
+    logger.warning(f"Could not parse dates from sheet name '{sheet_name}', using fallback dates")
+    return (datetime.strptime('01-01-2024', '%m-%d-%Y').date(),
+            datetime.strptime('01-07-2024', '%m-%d-%Y').date())
+
+def import_sheet_days(cur, sheet_name, days_data, user_name):
+    """Insert the submissions and shift metrics for every day in `days_data`.
+
+    Runs in the caller's transaction with one multi-row INSERT per table and returns
+    {day: week_submission_id}.
+    """
+    week_start, week_end = sheet_week_dates(sheet_name)
+
+    # Ensure weekly_sheets record exists for this sheet
+    cur.execute("""
+        INSERT INTO weekly_sheets (id, sheet_name, week_start, week_end, is_active, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        ON CONFLICT (sheet_name) DO UPDATE SET
+            updated_at = CURRENT_TIMESTAMP,
+            is_active = true
+    """, (str(uuid.uuid4()), sheet_name, week_start, week_end, True))
+    logger.info(f"Weekly sheet record ensured for '{sheet_name}' with dates {week_start} to {week_end}")
+
+    submissions = execute_values(cur, """
+        INSERT INTO week_submissions (week_name, day_of_week, week_start, week_end, submitted_by)
+        VALUES %s
+        RETURNING id, day_of_week
+    """, [(sheet_name, day, week_start, week_end, user_name) for day in days_data], fetch=True)
+    submission_ids = {day: submission_id for submission_id, day in submissions}
+
+    for shift, table in (('first_shift', 'first_shift_metrics'), ('second_shift', 'second_shift_metrics')):
+        rows = []
+        for day, day_data in days_data.items():
+            metrics = day_data.get(shift) or {}
+            # Only days with at least one value for this shift get a metrics row
+            if any(metrics.get(field) is not None for field in SHEET_METRIC_FIELDS):
+                rows.append((submission_ids[day],) + tuple(metrics.get(field) for field in SHEET_METRIC_FIELDS) + (user_name,))
+        if rows:
+            execute_values(cur, f"""
+                INSERT INTO {table} (
+                    week_submission_id, die_cut1_oee_pct, die_cut2_oee_pct,
+                    die_cut1_lbs, die_cut2_lbs,
+                    die_cut1_waste_lb, die_cut2_waste_lb,
+                    submitted_by
+                ) VALUES %s
+            """, rows)
+            logger.info(f"Inserted {len(rows)} {shift} metrics rows for '{sheet_name}'")
+
+    return submission_ids
+
 @app.route('/api/google-sheets/<sheet_name>/day/<day>', methods=['GET'])
 @admin_or_supervisor_required
 def get_sheet_data_by_day(sheet_name, day):
     """API endpoint to get specific day data from a sheet tab in BAKERY METRICS spreadsheet"""
+    if day not in SHEET_DAY_COLUMNS:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid day provided. Must be Monday, Tuesday, Wednesday, Thursday, or Friday.'
+        }), 400
+
     try:
-        # Import Google API components
-        try:
-            from googleapiclient.discovery import build
-            from google.oauth2.service_account import Credentials
-            logger.info("Google API libraries imported successfully")
-        except ImportError as e:
-            logger.error(f"Failed to import Google API libraries: {e}")
-            return jsonify({
-                'success': False,
-                'message': 'Google API libraries not available'
-            }), 500
-        
-        # Check for credentials file
-        creds_path = os.getenv('GOOGLE_CREDENTIALS_PATH', 'credentials.json')
-        logger.info(f"Looking for credentials at: {creds_path}")
-        
-        if not os.path.exists(creds_path):
-            logger.error(f"Credentials file not found at: {creds_path}")
-            return jsonify({
-                'success': False,
-                'message': f'Google credentials file not found at {creds_path}'
-            }), 500
-        
-        # Authenticate with Google APIs using newer auth library
-        try:
-            scopes = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
-            creds = Credentials.from_service_account_file(creds_path, scopes=scopes)
-            sheets_service = build('sheets', 'v4', credentials=creds)
-            drive_service = build('drive', 'v3', credentials=creds)
-            logger.info("Google APIs authenticated successfully")
-        except Exception as e:
-            logger.error(f"Failed to authenticate with Google APIs: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'Google API authentication failed: {str(e)}'
-            }), 500
-        
-        # Find the BAKERY METRICS spreadsheet
-        try:
-            query = "name='BAKERY METRICS_2024-2025' and mimeType='application/vnd.google-apps.spreadsheet' and trashed=false"
-            logger.info(f"Searching for BAKERY METRICS spreadsheet")
-            results = drive_service.files().list(q=query, fields="files(id)").execute()
-            files = results.get('files', [])
-            
-            if not files:
-                logger.error("BAKERY METRICS_2024-2025 spreadsheet not found")
-                return jsonify({
-                    'success': False,
-                    'message': 'BAKERY METRICS_2024-2025 spreadsheet not found'
-                }), 404
-            
-            spreadsheet_id = files[0]['id']
-            logger.info(f"Found BAKERY METRICS spreadsheet: {spreadsheet_id}")
-        except Exception as e:
-            logger.error(f"Failed to find BAKERY METRICS spreadsheet: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'Failed to find BAKERY METRICS spreadsheet: {str(e)}'
-            }), 500
-        
-        # Validate the sheet tab name exists
-        try:
-            spreadsheet = sheets_service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
-            sheets = spreadsheet.get('sheets', [])
-            sheet_exists = any(sheet['properties']['title'] == sheet_name for sheet in sheets)
-            
-            if not sheet_exists:
-                logger.warning(f"Sheet tab '{sheet_name}' not found")
-                return jsonify({
-                    'success': False,
-                    'message': f'Sheet tab "{sheet_name}" not found'
-                }), 404
-                
-            logger.info(f"Found sheet tab: {sheet_name}")
-        except Exception as e:
-            logger.error(f"Failed to validate sheet tab: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'Failed to validate sheet tab: {str(e)}'
-            }), 500
-        
-        # Define the mapping from your images
-        day_column_mapping = {
-            'Monday': 'D',
-            'Tuesday': 'E',
-            'Wednesday': 'F',
-            'Thursday': 'G',
-            'Friday': 'H'
-        }
-        
-        if day not in day_column_mapping:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid day provided. Must be Monday, Tuesday, Wednesday, Thursday, or Friday.'
-            }), 400
-        
-        col = day_column_mapping[day]
-        logger.info(f"Using column {col} for {day} from sheet tab {sheet_name}")
-        
-        # Define the cell ranges based on the mapping from your images
-        # Include sheet name in range to specify which tab to read from
-        ranges = [
-            f"'{sheet_name}'!{col}6",   # 1st Shift OEE Die-Cut 1
-            f"'{sheet_name}'!{col}7",   # 1st Shift OEE Die-Cut 2
-            f"'{sheet_name}'!{col}9",   # 1st Shift POUNDS Die-Cut 1
-            f"'{sheet_name}'!{col}10",  # 1st Shift POUNDS Die-Cut 2
-            f"'{sheet_name}'!{col}12",  # 1st Shift WASTE Die-Cut 1
-            f"'{sheet_name}'!{col}13",  # 1st Shift WASTE Die-Cut 2
-            f"'{sheet_name}'!{col}20",  # 2nd Shift OEE Die-Cut 1
-            f"'{sheet_name}'!{col}21",  # 2nd Shift OEE Die-Cut 2
-            f"'{sheet_name}'!{col}23",  # 2nd Shift POUNDS Die-Cut 1
-            f"'{sheet_name}'!{col}24",  # 2nd Shift POUNDS Die-Cut 2
-            f"'{sheet_name}'!{col}26",  # 2nd Shift WASTE Die-Cut 1
-            f"'{sheet_name}'!{col}27"   # 2nd Shift WASTE Die-Cut 2
-        ]
-        
-        # Get the data from Google Sheets
-        try:
-            logger.info(f"Fetching data from ranges: {ranges[:3]}...")  # Log first few ranges to avoid clutter
-            result = sheets_service.spreadsheets().values().batchGet(
-                spreadsheetId=spreadsheet_id,
-                ranges=ranges
-            ).execute()
-            
-            value_ranges = result.get('valueRanges', [])
-            logger.info(f"Retrieved {len(value_ranges)} value ranges")
-        except Exception as e:
-            logger.error(f"Failed to fetch sheet data: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'Failed to fetch sheet data: {str(e)}'
-            }), 500
-        
-        # Helper function to safely get numeric value
-        def safe_float(value_range, default=None):
-            try:
-                if value_range and 'values' in value_range and value_range['values']:
-                    value = value_range['values'][0][0]
-                    if value and str(value).strip():
-                        return float(value)
-            except (ValueError, IndexError):
-                pass
-            return default
-        
-        # Parse the data according to the mapping
-        data = {
-            'first_shift': {
-                'die_cut1_oee_pct': safe_float(value_ranges[0]) if len(value_ranges) > 0 else None,
-                'die_cut2_oee_pct': safe_float(value_ranges[1]) if len(value_ranges) > 1 else None,
-                'die_cut1_pounds': safe_float(value_ranges[2]) if len(value_ranges) > 2 else None,
-                'die_cut2_pounds': safe_float(value_ranges[3]) if len(value_ranges) > 3 else None,
-                'die_cut1_waste_lbs': safe_float(value_ranges[4]) if len(value_ranges) > 4 else None,
-                'die_cut2_waste_lbs': safe_float(value_ranges[5]) if len(value_ranges) > 5 else None,
-            },
-            'second_shift': {
-                'die_cut1_oee_pct': safe_float(value_ranges[6]) if len(value_ranges) > 6 else None,
-                'die_cut2_oee_pct': safe_float(value_ranges[7]) if len(value_ranges) > 7 else None,
-                'die_cut1_pounds': safe_float(value_ranges[8]) if len(value_ranges) > 8 else None,
-                'die_cut2_pounds': safe_float(value_ranges[9]) if len(value_ranges) > 9 else None,
-                'die_cut1_waste_lbs': safe_float(value_ranges[10]) if len(value_ranges) > 10 else None,
-                'die_cut2_waste_lbs': safe_float(value_ranges[11]) if len(value_ranges) > 11 else None,
-            }
-        }
-        
+        data = fetch_sheet_days(sheet_name, [day])[day]
         logger.info(f"Successfully parsed data for {day} from sheet tab {sheet_name}")
         return jsonify({
             'success': True,
             'data': data,
             'sheet_name': sheet_name,
             'day': day,
-            'spreadsheet_id': spreadsheet_id
+            'spreadsheet_id': get_spreadsheet_id()
         })
-        
+    except LookupError as e:
+        logger.warning(str(e))
+        return jsonify({'success': False, 'message': str(e)}), 404
+    except GoogleAPIUnavailable as e:
+        logger.error(str(e))
+        return jsonify({'success': False, 'message': str(e)}), 500
     except Exception as e:
         logger.error(f"Unexpected error in get_sheet_data_by_day: {e}")
         return jsonify({
@@ -8943,6 +11092,32 @@ def get_sheet_data_by_day(sheet_name, day):
             'message': f'An unexpected error occurred: {str(e)}'
         }), 500
 
+@app.route('/api/google-sheets/<sheet_name>/week', methods=['GET'])
+@admin_or_supervisor_required
+def get_sheet_week_data(sheet_name):
+    """API endpoint to get Monday-Friday data from a sheet tab in one Sheets API call"""
+    try:
+        days = fetch_sheet_days(sheet_name, list(SHEET_DAY_COLUMNS))
+        logger.info(f"Successfully parsed week data from sheet tab {sheet_name}")
+        return jsonify({
+            'success': True,
+            'days': days,
+            'sheet_name': sheet_name,
+            'spreadsheet_id': get_spreadsheet_id()
+        })
+    except LookupError as e:
+        logger.warning(str(e))
+        return jsonify({'success': False, 'message': str(e)}), 404
+    except GoogleAPIUnavailable as e:
+        logger.error(str(e))
+        return jsonify({'success': False, 'message': str(e)}), 500
+    except Exception as e:
+        logger.error(f"Unexpected error in get_sheet_week_data: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'An unexpected error occurred: {str(e)}'
+        }), 500
+
 @app.route('/api/import-sheet-data', methods=['POST'])
 @admin_or_supervisor_required
 def import_sheet_data():
@@ -8992,113 +11167,295 @@ def import_sheet_data():
                         'error_type': 'duplicate_record'
                     }), 409
                 
-                # Parse week dates from sheet name (format: mm-dd-yyyy_mm-dd-yyyy)
-                try:
-                    if '_' in sheet_name:
-                        start_date_str, end_date_str = sheet_name.split('_')
-                        week_start = datetime.strptime(start_date_str, '%m-%d-%Y').date()
-                        week_end = datetime.strptime(end_date_str, '%m-%d-%Y').date()
-                    else:
-                        # Fallback dates if parsing fails
-                        week_start = datetime.strptime('01-01-2024', '%m-%d-%Y').date()
-                        week_end = datetime.strptime('01-07-2024', '%m-%d-%Y').date()
-                        logger.warning(f"Could not parse dates from sheet name '{sheet_name}', using fallback dates")
-                except ValueError:
-                    # Fallback dates if parsing fails
-                    week_start = datetime.strptime('01-01-2024', '%m-%d-%Y').date()
-                    week_end = datetime.strptime('01-07-2024', '%m-%d-%Y').date()
-                    logger.warning(f"Could not parse dates from sheet name '{sheet_name}', using fallback dates")
-                
-                # Ensure weekly_sheets record exists for this sheet
-                cur.execute("""
-                    INSERT INTO weekly_sheets (id, sheet_name, week_start, week_end, is_active, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                    ON CONFLICT (sheet_name) DO UPDATE SET
-                        updated_at = CURRENT_TIMESTAMP,
-                        is_active = true
-                    RETURNING id
-                """, (str(uuid.uuid4()), sheet_name, week_start, week_end, True))
+                week_submission_id = import_sheet_days(cur, sheet_name, {day_of_week: import_data}, user_name)[day_of_week]
+                
+                conn.commit()
+                invalidate_week_list()
+                week_data_changed(week_name)
+                
+                # Log the import
+                log_submission(
+                    user_id, user_name, user_email,
+                    'sheet_import',
+                    f'Imported data from sheet: {sheet_name} for {day_of_week}'
+                )
                 
-                weekly_sheet_result = cur.fetchone()
-                logger.info(f"Weekly sheet record ensured for '{sheet_name}' with dates {week_start} to {week_end}")
+                return jsonify({
+                    'success': True,
+                    'message': 'Data imported successfully',
+                    'week_submission_id': str(week_submission_id)
+                })
                 
-                # Create week submission
+    except Exception as e:
+        logger.error(f"Import sheet data error: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Import failed: {str(e)}'
+        }), 500
+
+@app.route('/api/import-sheet-week', methods=['POST'])
+@admin_or_supervisor_required
+def import_sheet_week():
+    """API endpoint to import several days of a sheet tab in one transaction"""
+    try:
+        data = request.get_json() or {}
+        
+        user_id = session.get('user_id')
+        user_name = session.get('user_full_name')
+        user_email = session.get('email')
+        
+        sheet_name = data.get('sheet_name')
+        days_data = data.get('days') or {}
+        skip_existing = bool(data.get('skip_existing', False))
+        
+        if not sheet_name or not days_data:
+            return jsonify({
+                'success': False,
+                'message': 'Missing required fields'
+            }), 400
+        
+        invalid_days = [day for day in days_data if day not in SHEET_DAY_COLUMNS]
+        if invalid_days:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid day provided: {", ".join(invalid_days)}'
+            }), 400
+        
+        week_name = sheet_name
+        
+        # Days left blank in the sheet are not imported, so the floor can still submit them
+        empty_days = [day for day in SHEET_DAY_COLUMNS if day in days_data and not sheet_day_has_values(days_data[day])]
+        filled_days = [day for day in SHEET_DAY_COLUMNS if day in days_data and day not in empty_days]
+        if not filled_days:
+            return jsonify({
+                'success': False,
+                'message': 'The selected days have no values in the sheet',
+                'skipped_days': empty_days
+            }), 400
+        
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
                 cur.execute("""
-                    INSERT INTO week_submissions (week_name, day_of_week, week_start, week_end, submitted_by)
-                    VALUES (%s, %s, %s, %s, %s)
-                    RETURNING id
-                """, (week_name, day_of_week, week_start, week_end, user_name))
+                    SELECT day_of_week FROM week_submissions
+                    WHERE week_name = %s AND day_of_week = ANY(%s)
+                """, (week_name, filled_days))
+                existing_days = [row[0] for row in cur.fetchall()]
                 
-                logger.info(f"Created week submission with submitted_by: {user_name}")
-                
-                week_submission_id = cur.fetchone()[0]
+                if existing_days and not skip_existing:
+                    logger.warning(f"Week import blocked: records already exist for {existing_days} in week {week_name}")
+                    return jsonify({
+                        'success': False,
+                        'message': f'Records already exist for {", ".join(existing_days)} in week {week_name}. Delete them first or import only the remaining days.',
+                        'error_type': 'duplicate_record',
+                        'existing_days': existing_days
+                    }), 409
                 
-                # Insert first shift data if available
-                first_shift = import_data['first_shift']
-                if any(v is not None for v in first_shift.values()):
-                    cur.execute("""
-                        INSERT INTO first_shift_metrics (
-                            week_submission_id, die_cut1_oee_pct, die_cut2_oee_pct,
-                            die_cut1_lbs, die_cut2_lbs,
-                            die_cut1_waste_lb, die_cut2_waste_lb,
-                            submitted_by
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        week_submission_id,
-                        first_shift['die_cut1_oee_pct'],
-                        first_shift['die_cut2_oee_pct'],
-                        first_shift['die_cut1_pounds'],  # Google Sheets field name
-                        first_shift['die_cut2_pounds'],  # Google Sheets field name
-                        first_shift['die_cut1_waste_lbs'],  # Google Sheets field name
-                        first_shift['die_cut2_waste_lbs'],  # Google Sheets field name
-                        user_name
-                    ))
-                    logger.info("First shift metrics inserted successfully")
+                # Keep Monday-Friday order for the inserted rows
+                to_import = {day: days_data[day] for day in filled_days if day not in existing_days}
+                skipped_days = [day for day in SHEET_DAY_COLUMNS if day in days_data and day not in to_import]
+                if not to_import:
+                    return jsonify({
+                        'success': True,
+                        'message': 'All selected days already exist; nothing to import',
+                        'imported_days': [],
+                        'skipped_days': skipped_days
+                    })
                 
-                # Insert second shift data if available
-                second_shift = import_data['second_shift']
-                if any(v is not None for v in second_shift.values()):
-                    cur.execute("""
-                        INSERT INTO second_shift_metrics (
-                            week_submission_id, die_cut1_oee_pct, die_cut2_oee_pct,
-                            die_cut1_lbs, die_cut2_lbs,
-                            die_cut1_waste_lb, die_cut2_waste_lb,
-                            submitted_by
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        week_submission_id,
-                        second_shift['die_cut1_oee_pct'],
-                        second_shift['die_cut2_oee_pct'],
-                        second_shift['die_cut1_pounds'],  # Google Sheets field name
-                        second_shift['die_cut2_pounds'],  # Google Sheets field name
-                        second_shift['die_cut1_waste_lbs'],  # Google Sheets field name
-                        second_shift['die_cut2_waste_lbs'],  # Google Sheets field name
-                        user_name
-                    ))
-                    logger.info("Second shift metrics inserted successfully")
+                submission_ids = import_sheet_days(cur, sheet_name, to_import, user_name)
                 
                 conn.commit()
+                invalidate_week_list()
+                week_data_changed(week_name)
                 
-                # Log the import
                 log_submission(
                     user_id, user_name, user_email,
                     'sheet_import',
-                    f'Imported data from sheet: {sheet_name} for {day_of_week}'
+                    f'Imported data from sheet: {sheet_name} for {", ".join(to_import)}'
                 )
                 
                 return jsonify({
                     'success': True,
-                    'message': 'Data imported successfully',
-                    'week_submission_id': str(week_submission_id)
+                    'message': f'Imported {len(to_import)} day(s) successfully',
+                    'imported_days': list(to_import),
+                    'skipped_days': skipped_days,
+                    'week_submission_ids': {day: str(submission_id) for day, submission_id in submission_ids.items()}
                 })
                 
     except Exception as e:
-        logger.error(f"Import sheet data error: {e}")
+        logger.error(f"Import sheet week error: {e}")
         return jsonify({
             'success': False,
             'message': f'Import failed: {str(e)}'
         }), 500
 
+# Sheets backfill
+# `flask --app app backfill-sheets` loads every mm-dd-yyyy_mm-dd-yyyy tab of the metrics
+# spreadsheet. Tabs are fetched in parallel by a bounded thread pool, paced to stay under
+# the Sheets read quota and retried with backoff on 429/5xx. Each tab is written in its
+# own transaction with multi-row INSERTs, and recorded in sheet_backfill_progress so an
+# interrupted run resumes where it stopped; days already in week_submissions are never
+# imported twice. Point GOOGLE_SHEETS_API_ENDPOINT (and GOOGLE_SPREADSHEET_ID) at a
+# local fake responder to exercise it without Google.
+SHEETS_BACKFILL_WORKERS = int(os.getenv('SHEETS_BACKFILL_WORKERS', '4'))
+SHEETS_BACKFILL_MAX_RPM = int(os.getenv('SHEETS_BACKFILL_MAX_RPM', '50'))
+SHEETS_BACKFILL_MAX_RETRIES = 5
+SHEETS_BACKFILL_SUBMITTED_BY = 'Sheets backfill'
+_sheets_rate = {'lock': threading.Lock(), 'next_at': 0.0}
+
+def ensure_sheet_backfill_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS sheet_backfill_progress (
+            sheet_name VARCHAR(100) PRIMARY KEY,
+            status VARCHAR(20) NOT NULL,
+            days_imported INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def list_sheet_week_tabs():
+    """Names of every week tab in the metrics spreadsheet, oldest first."""
+    spreadsheet_id = get_spreadsheet_id()
+    if not spreadsheet_id:
+        raise LookupError(f'{GOOGLE_SPREADSHEET_NAME} spreadsheet not found')
+    spreadsheet = get_google_service('sheets', 'v4').spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        fields='sheets.properties(title)'
+    ).execute()
+    tabs = [sheet['properties']['title'] for sheet in spreadsheet.get('sheets', [])]
+    return sorted((tab for tab in tabs if SHEET_WEEK_TAB_PATTERN.match(tab)), key=sheet_week_dates)
+
+def _wait_for_sheets_quota():
+    """Space calls from all backfill threads evenly under SHEETS_BACKFILL_MAX_RPM."""
+    with _sheets_rate['lock']:
+        now = time.monotonic()
+        start_at = max(now, _sheets_rate['next_at'])
+        _sheets_rate['next_at'] = start_at + 60.0 / max(SHEETS_BACKFILL_MAX_RPM, 1)
+    if start_at > now:
+        time.sleep(start_at - now)
+
+def fetch_sheet_week_for_backfill(sheet_name):
+    """All weekday values of a tab, retrying quota and server errors with backoff."""
+    for attempt in range(SHEETS_BACKFILL_MAX_RETRIES + 1):
+        _wait_for_sheets_quota()
+        try:
+            return fetch_sheet_days(sheet_name, list(SHEET_DAY_COLUMNS))
+        except Exception as e:
+            status = getattr(getattr(e, 'resp', None), 'status', None)
+            if attempt == SHEETS_BACKFILL_MAX_RETRIES or status not in (429, 500, 502, 503, 504):
+                raise
+            delay = min(2 ** attempt, 32)
+            logger.warning(f"Backfill fetch of '{sheet_name}' got HTTP {status}, retrying in {delay}s")
+            time.sleep(delay)
+
+def store_backfilled_week(sheet_name, days_data):
+    """Import the days of a tab that have values and are not in the database yet.
+
+    Returns the number of days imported; the tab is marked done in the same transaction.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT day_of_week FROM week_submissions
+                WHERE week_name = %s
+            """, (sheet_name,))
+            existing_days = {row[0] for row in cur.fetchall()}
+
+            to_import = {
+                day: day_data for day, day_data in days_data.items()
+                if day not in existing_days and sheet_day_has_values(day_data)
+            }
+            if to_import:
+                import_sheet_days(cur, sheet_name, to_import, SHEETS_BACKFILL_SUBMITTED_BY)
+
+            cur.execute("""
+                INSERT INTO sheet_backfill_progress (sheet_name, status, days_imported, last_error, updated_at)
+                VALUES (%s, 'done', %s, NULL, CURRENT_TIMESTAMP)
+                ON CONFLICT (sheet_name) DO UPDATE SET
+                    status = 'done',
+                    days_imported = sheet_backfill_progress.days_imported + EXCLUDED.days_imported,
+                    last_error = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (sheet_name, len(to_import)))
+        conn.commit()
+
+    if to_import:
+        week_data_changed(sheet_name)
+    return len(to_import)
+
+def record_backfill_failure(sheet_name, error):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO sheet_backfill_progress (sheet_name, status, last_error, updated_at)
+                VALUES (%s, 'failed', %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (sheet_name) DO UPDATE SET
+                    status = 'failed',
+                    last_error = EXCLUDED.last_error,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (sheet_name, str(error)))
+        conn.commit()
+
+def run_sheets_backfill(workers=SHEETS_BACKFILL_WORKERS, restart=False, only=None, dry_run=False, echo=logger.info):
+    """Fetch and import every pending week tab; returns {'imported', 'skipped', 'failed'} tab lists."""
+    tabs = list_sheet_week_tabs()
+    if only:
+        tabs = [tab for tab in tabs if tab in set(only)]
+
+    done = set()
+    if not restart:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT sheet_name FROM sheet_backfill_progress WHERE status = 'done'")
+                done = {row[0] for row in cur.fetchall()}
+
+    pending = [tab for tab in tabs if tab not in done]
+    summary = {'imported': [], 'skipped': sorted(set(tabs) & done), 'failed': []}
+    echo(f"{len(tabs)} week tabs found, {len(pending)} to fetch with {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='sheets-backfill') as pool:
+        futures = {pool.submit(fetch_sheet_week_for_backfill, tab): tab for tab in pending}
+        # Writes happen on this thread, one transaction per tab, as fetches complete
+        for future in as_completed(futures):
+            tab = futures[future]
+            try:
+                days_data = future.result()
+                if dry_run:
+                    days_with_values = [
+                        day for day, day_data in days_data.items()
+                        if any(value is not None for shift in day_data.values() for value in shift.values())
+                    ]
+                    echo(f"{tab}: {len(days_with_values)} day(s) with values (dry run)")
+                    continue
+                imported = store_backfilled_week(tab, days_data)
+                summary['imported'].append(tab)
+                echo(f"{tab}: imported {imported} day(s)")
+            except Exception as e:
+                summary['failed'].append(tab)
+                logger.error(f"Backfill of '{tab}' failed: {e}")
+                echo(f"{tab}: failed - {e}")
+                if not dry_run:
+                    record_backfill_failure(tab, e)
+
+    if summary['imported']:
+        invalidate_week_list()
+    return summary
+
+@app.cli.command('backfill-sheets')
+@click.option('--workers', default=SHEETS_BACKFILL_WORKERS, show_default=True,
+              help='Tabs fetched in parallel.')
+@click.option('--restart', is_flag=True, help='Fetch tabs already marked done again (existing days are still skipped).')
+@click.option('--only', multiple=True, help='Only backfill this tab; repeat for several.')
+@click.option('--dry-run', is_flag=True, help='Fetch and report without writing to the database.')
+def backfill_sheets_command(workers, restart, only, dry_run):
+    """Import historical week tabs from the BAKERY METRICS spreadsheet."""
+    summary = run_sheets_backfill(workers=workers, restart=restart, only=only, dry_run=dry_run, echo=click.echo)
+    click.echo(
+        f"Done: {len(summary['imported'])} imported, {len(summary['skipped'])} already done, "
+        f"{len(summary['failed'])} failed"
+    )
+    if summary['failed']:
+        raise SystemExit(1)
 
 
 
@@ -9333,37 +11690,24 @@ def get_reviews():
 @app.route('/api/public/reviews', methods=['GET'])
 def get_public_reviews():
     """API endpoint to get approved reviews for public display on landing page"""
+    per_page = 6
     try:
-        page = int(request.args.get('page', 1))
-        per_page = min(int(request.args.get('per_page', 6)), 12)  # Max 12 reviews per page
-        offset = (page - 1) * per_page
+        page = max(1, int(request.args.get('page', 1)))
+        per_page, cursor, _ = keyset_request_args(default_limit=6, max_limit=12, limit_arg='per_page')  # Max 12 reviews per page
         
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 # Get approved reviews with user information for public display
-                cur.execute("""
+                reviews, pagination = fetch_keyset_page(cur, """
                     SELECT 
                         ur.id, ur.rating, ur.review_text, ur.category,
                         ur.is_anonymous, ur.is_featured, ur.created_at,
                         u.first_name, u.last_name
                     FROM user_reviews ur
                     LEFT JOIN users u ON ur.user_id = u.id
-                    WHERE ur.is_approved = true
-                    ORDER BY ur.is_featured DESC, ur.created_at DESC
-                    LIMIT %s OFFSET %s
-                """, (per_page, offset))
-                
-                reviews = cur.fetchall()
-                
-                # Get total count for pagination
-                cur.execute("""
-                    SELECT COUNT(*) as total_count
-                    FROM user_reviews
-                    WHERE is_approved = true
-                """)
-                
-                total_count = cur.fetchone()['total_count']
-                total_pages = (total_count + per_page - 1) // per_page
+                """, (), ('COALESCE(ur.is_featured, false)', 'ur.created_at', 'ur.id'), per_page, cursor,
+                    conditions=["ur.is_approved = true"],
+                    row_key=lambda row: (bool(row['is_featured']), row['created_at'], row['id']))
                 
                 # Format reviews for public display
                 formatted_reviews = []
@@ -9386,15 +11730,17 @@ def get_public_reviews():
                         'created_at': review['created_at'].strftime('%B %Y') if review['created_at'] else 'Recently'
                     })
                 
-                # Get average rating for display
+                # Get average rating and review count for display in one aggregate
                 cur.execute("""
-                    SELECT AVG(rating)::NUMERIC(3,2) as avg_rating
+                    SELECT AVG(rating)::NUMERIC(3,2) as avg_rating, COUNT(*) as total_count
                     FROM user_reviews
                     WHERE is_approved = true
                 """)
                 
                 avg_rating_result = cur.fetchone()
                 avg_rating = float(avg_rating_result['avg_rating']) if avg_rating_result['avg_rating'] else 0
+                total_count = avg_rating_result['total_count']
+                total_pages = (total_count + per_page - 1) // per_page
                 
                 return jsonify({
                     'success': True,
@@ -9404,8 +11750,9 @@ def get_public_reviews():
                         'per_page': per_page,
                         'total_pages': total_pages,
                         'total_count': total_count,
-                        'has_next': page < total_pages,
-                        'has_prev': page > 1
+                        'has_next': pagination['has_more'],
+                        'has_prev': page > 1,
+                        'next_cursor': pagination['next_cursor']
                     },
                     'average_rating': round(avg_rating, 1),
                     'total_reviews': total_count
@@ -9998,14 +12345,12 @@ def get_all_support_tickets():
     """API endpoint for admin to get all support tickets"""
     try:
         page = max(1, int(request.args.get('page', 1)))
-        limit = min(100, max(10, int(request.args.get('limit', 20))))
+        limit, cursor, _ = keyset_request_args(default_limit=20, max_limit=100)
+        limit = max(10, limit)
         status_filter = request.args.get('status', '').strip()
         priority_filter = request.args.get('priority', '').strip()
         search_query = request.args.get('search', '').strip()
         
-        # Calculate offset for pagination
-        offset = (page - 1) * limit
-        
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 # Build the WHERE clause based on filters
@@ -10025,24 +12370,8 @@ def get_all_support_tickets():
                     search_param = f"%{search_query}%"
                     params.extend([search_param, search_param, search_param])
                 
-                where_clause = " AND ".join(where_conditions)
-                if where_clause:
-                    where_clause = "WHERE " + where_clause
-                
-                # Get total count for pagination
-                count_query = f"""
-                    SELECT COUNT(*) as total
-                    FROM support_tickets st
-                    JOIN support_categories sc ON st.category_id = sc.id
-                    LEFT JOIN users u ON st.user_id_string = u.id::text
-                    {where_clause}
-                """
-                
-                cur.execute(count_query, params)
-                total_tickets = cur.fetchone()['total']
-                
-                # Get tickets with pagination
-                tickets_query = f"""
+                # Get the page of tickets
+                tickets, pagination = fetch_keyset_page(cur, """
                     SELECT
                         st.id,
                         st.ticket_number,
@@ -10060,14 +12389,8 @@ def get_all_support_tickets():
                     FROM support_tickets st
                     JOIN support_categories sc ON st.category_id = sc.id
                     LEFT JOIN users u ON st.user_id_string = u.id::text
-                    {where_clause}
-                    ORDER BY st.created_at DESC
-                    LIMIT %s OFFSET %s
-                """
-                
-                params.extend([limit, offset])
-                cur.execute(tickets_query, params)
-                tickets = cur.fetchall()
+                """, params, ('st.created_at', 'st.id'), limit, cursor,
+                    conditions=where_conditions, include_total=True)
                 
                 # Format tickets data
                 formatted_tickets = []
@@ -10106,10 +12429,8 @@ def get_all_support_tickets():
                         'time_ago': time_ago
                     })
                 
-                # Calculate pagination info
-                total_pages = (total_tickets + limit - 1) // limit
-                has_next = page < total_pages
-                has_prev = page > 1
+                # Calculate pagination info (totals are planner estimates)
+                total_tickets, total_pages = keyset_page_totals(pagination, page, limit, len(formatted_tickets))
                 
                 return jsonify({
                     'success': True,
@@ -10119,11 +12440,18 @@ def get_all_support_tickets():
                         'limit': limit,
                         'total': total_tickets,
                         'total_pages': total_pages,
-                        'has_next': has_next,
-                        'has_prev': has_prev
+                        'has_next': pagination['has_more'],
+                        'has_prev': page > 1,
+                        'next_cursor': pagination['next_cursor']
                     }
                 })
                 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'tickets': [],
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Get all support tickets error: {e}")
         return jsonify({
@@ -10624,12 +12952,7 @@ def change_password():
             new_password_hash = hash_password(new_password)
 
             # Check if password_change_required column exists
-            cur.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'users' AND column_name = 'password_change_required'
-            """)
-            has_password_change_column = cur.fetchone() is not None
+            has_password_change_column = users_have_password_change_column(cur)
 
             # Update password (conditionally update password_change_required if column exists)
             if has_password_change_column:
@@ -10649,6 +12972,7 @@ def change_password():
                 """, (new_password_hash, user_id))
 
             conn.commit()
+            cache_password_change_flag(False)
 
             # Build full name for logging
             full_name = f"{user['first_name']} {user.get('last_name', '')}".strip()
@@ -10756,6 +13080,17 @@ def get_my_profile():
 @login_required
 def get_my_notifications():
     """API endpoint to get current user's notifications."""
+    since_arg = request.args.get('since', '').strip()
+    try:
+        positions = decode_notification_cursor(since_arg) if since_arg else {}
+        since = positions['my_notifications']['at'] if 'my_notifications' in positions else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid notification cursor',
+            'error': 'invalid_cursor'
+        }), 400
+
     try:
         user_id = session.get('user_id')
         
@@ -10777,8 +13112,10 @@ def get_my_notifications():
             
             employee_id = employee['id']
             
-            # Get notifications for this employee from the last 30 days
-            cur.execute("""
+            # Get notifications for this employee from the last 30 days (only newer than the cursor if given)
+            since_clause = "AND created_at > %s" if since else ""
+            params = (employee_id, since) if since else (employee_id,)
+            cur.execute(f"""
                 SELECT 
                     id,
                     user_id as employee_id,
@@ -10791,11 +13128,13 @@ def get_my_notifications():
                 FROM notifications
                 WHERE user_id = %s
                     AND created_at >= NOW() - INTERVAL '30 days'
+                    {since_clause}
                 ORDER BY created_at DESC
                 LIMIT 50
-            """, (employee_id,))
+            """, params)
             
             notifications = cur.fetchall()
+            latest = notifications[0]['created_at'] if notifications else since
             
             # Convert to list of dicts
             notifications_list = []
@@ -10807,7 +13146,10 @@ def get_my_notifications():
             
             return jsonify({
                 'success': True,
-                'notifications': notifications_list
+                'notifications': notifications_list,
+                'cursor': encode_notification_cursor(
+                    {'my_notifications': {'at': latest, 'seen': {}}} if latest is not None else {}
+                )
             })
 
     except Exception as e:
@@ -11556,6 +13898,7 @@ def get_faq_categories():
 
 # Public FAQ Endpoint (No Authentication Required)
 @app.route('/api/public/faqs', methods=['GET'])
+@conditional_get(table_version('faq_items', 'faq_categories'))
 def get_public_faqs():
     """Public API endpoint to retrieve active FAQs for information page"""
     try:
@@ -12255,6 +14598,7 @@ def toggle_global_announcement(announcement_id):
         }), 500
 
 @app.route('/api/public/announcements', methods=['GET'])
+@conditional_get(public_announcements_version)
 def get_public_announcements():
     """Public API endpoint to retrieve active announcements for public display"""
     try:
@@ -12782,6 +15126,7 @@ def get_public_contact_info():
 # ========================================================
 
 @app.route('/api/legal-documents/<document_type>', methods=['GET'])
+@conditional_get(legal_document_version)
 def get_legal_document(document_type):
     """Get active legal document by type"""
     try:
@@ -13359,37 +15704,12 @@ def get_user_status():
     user_id = session.get('user_id')
     
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Check if password_change_required column exists
-                cur.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'users' AND column_name = 'password_change_required'
-                """)
-                column_exists = cur.fetchone()
-                
-                if column_exists:
-                    # Column exists, check if password change is required
-                    cur.execute("""
-                        SELECT password_change_required 
-                        FROM users 
-                        WHERE id = %s
-                    """, (user_id,))
-                    user = cur.fetchone()
-                    
-                    return jsonify({
-                        'success': True,
-                        'password_change_required': user.get('password_change_required', False) if user else False,
-                        'user_id': user_id
-                    })
-                else:
-                    # Column doesn't exist yet
-                    return jsonify({
-                        'success': True,
-                        'password_change_required': False,
-                        'user_id': user_id
-                    })
+        # Always read the current flag (this also refreshes the session copy)
+        return jsonify({
+            'success': True,
+            'password_change_required': fetch_password_change_required(user_id),
+            'user_id': user_id
+        })
                     
     except Exception as e:
         logger.error(f"Error checking user status: {e}")
@@ -13537,221 +15857,32 @@ def get_week_average():
 
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get weekly sheet ID
                 cur.execute("""
-                    SELECT id, week_start, week_end FROM weekly_sheets WHERE sheet_name = %s
+                    SELECT week_start, week_end FROM weekly_sheets WHERE sheet_name = %s
                 """, (week,))
                 
                 sheet_result = cur.fetchone()
                 if not sheet_result:
                     return jsonify({"error": "Week sheet not found"}), 404
 
-                weekly_sheet_id = sheet_result['id']
-                
-                # Get week submissions for this week
-                cur.execute("""
-                    SELECT id, day_of_week FROM week_submissions 
-                    WHERE week_name = %s 
-                    AND day_of_week IN ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')
-                """, (week,))
-                
-                week_submissions = cur.fetchall()
-                
-                if not week_submissions:
-                    return jsonify({
-                        "success": False,
-                        "error": "No data found for the selected week"
-                    }), 404
-                
-                submission_ids = [sub['id'] for sub in week_submissions]
-                submission_ids_placeholder = ','.join(['%s'] * len(submission_ids))
-                
-                # Get first shift metrics
-                cur.execute(f"""
-                    SELECT 
-                        die_cut1_oee_pct, die_cut2_oee_pct, oee_avg_pct,
-                        die_cut1_lbs, die_cut2_lbs, pounds_total,
-                        die_cut1_waste_lb, die_cut2_waste_lb,
-                        die_cut1_waste_pct, die_cut2_waste_pct, waste_avg_pct
-                    FROM first_shift_metrics
-                    WHERE week_submission_id IN ({submission_ids_placeholder})
-                    AND die_cut1_oee_pct IS NOT NULL
-                """, submission_ids)
-                
-                first_shift_data = cur.fetchall()
-                
-                # Get second shift metrics
-                cur.execute(f"""
-                    SELECT 
-                        die_cut1_oee_pct, die_cut2_oee_pct, oee_avg_pct,
-                        die_cut1_lbs, die_cut2_lbs, pounds_total,
-                        die_cut1_waste_lb, die_cut2_waste_lb,
-                        die_cut1_waste_pct, die_cut2_waste_pct, waste_avg_pct
-                    FROM second_shift_metrics
-                    WHERE week_submission_id IN ({submission_ids_placeholder})
-                    AND die_cut1_oee_pct IS NOT NULL
-                """, submission_ids)
-                
-                second_shift_data = cur.fetchall()
-                
-                # Get both shifts metrics (combined data)
-                cur.execute(f"""
-                    SELECT 
-                        oee_avg_pct,
-                        pounds_total,
-                        die_cut1_waste_lb,
-                        die_cut2_waste_lb
-                    FROM both_shifts_metrics
-                    WHERE week_submission_id IN ({submission_ids_placeholder})
-                    AND oee_avg_pct IS NOT NULL
-                """, submission_ids)
-                
-                both_shifts_data = cur.fetchall()
-                
-                # Calculate averages and totals
-                def safe_avg(values):
-                    filtered = [v for v in values if v is not None]
-                    return sum(filtered) / len(filtered) if filtered else 0
-                
-                def safe_total(values):
-                    filtered = [v for v in values if v is not None]
-                    return sum(filtered) if filtered else 0
-                
-                # FIRST SHIFT CALCULATIONS
-                # Die Cut 1 - First Shift
-                first_dc1_oee_avg = safe_avg([row['die_cut1_oee_pct'] for row in first_shift_data])
-                first_dc1_volume_total = safe_total([row['die_cut1_lbs'] for row in first_shift_data])
-                first_dc1_waste_total = safe_total([row['die_cut1_waste_lb'] for row in first_shift_data])
-                
-                # Die Cut 2 - First Shift
-                first_dc2_oee_avg = safe_avg([row['die_cut2_oee_pct'] for row in first_shift_data])
-                first_dc2_volume_total = safe_total([row['die_cut2_lbs'] for row in first_shift_data])
-                first_dc2_waste_total = safe_total([row['die_cut2_waste_lb'] for row in first_shift_data])
-                
-                # Total - First Shift
-                first_total_oee_avg = safe_avg([row['oee_avg_pct'] for row in first_shift_data])
-                first_total_volume_total = safe_total([row['pounds_total'] for row in first_shift_data])
-                first_total_waste_total = first_dc1_waste_total + first_dc2_waste_total
-                
-                # SECOND SHIFT CALCULATIONS
-                # Die Cut 1 - Second Shift
-                second_dc1_oee_avg = safe_avg([row['die_cut1_oee_pct'] for row in second_shift_data])
-                second_dc1_volume_total = safe_total([row['die_cut1_lbs'] for row in second_shift_data])
-                second_dc1_waste_total = safe_total([row['die_cut1_waste_lb'] for row in second_shift_data])
-                
-                # Die Cut 2 - Second Shift
-                second_dc2_oee_avg = safe_avg([row['die_cut2_oee_pct'] for row in second_shift_data])
-                second_dc2_volume_total = safe_total([row['die_cut2_lbs'] for row in second_shift_data])
-                second_dc2_waste_total = safe_total([row['die_cut2_waste_lb'] for row in second_shift_data])
-                
-                # Total - Second Shift
-                second_total_oee_avg = safe_avg([row['oee_avg_pct'] for row in second_shift_data])
-                second_total_volume_total = safe_total([row['pounds_total'] for row in second_shift_data])
-                second_total_waste_total = second_dc1_waste_total + second_dc2_waste_total
-                
-                # BOTH SHIFTS CALCULATIONS
-                # Die Cut 1 - Both Shifts (combine first and second shift data)
-                both_dc1_oee_avg = safe_avg([row['die_cut1_oee_pct'] for row in first_shift_data + second_shift_data])
-                both_dc1_volume_total = first_dc1_volume_total + second_dc1_volume_total
-                both_dc1_waste_total = first_dc1_waste_total + second_dc1_waste_total
-                
-                # Die Cut 2 - Both Shifts
-                both_dc2_oee_avg = safe_avg([row['die_cut2_oee_pct'] for row in first_shift_data + second_shift_data])
-                both_dc2_volume_total = first_dc2_volume_total + second_dc2_volume_total
-                both_dc2_waste_total = first_dc2_waste_total + second_dc2_waste_total
-                
-                # Total - Both Shifts
-                both_total_oee_avg = safe_avg([row['oee_avg_pct'] for row in both_shifts_data])
-                both_total_volume_total = safe_total([row['pounds_total'] for row in both_shifts_data])
-                both_total_waste_total = both_dc1_waste_total + both_dc2_waste_total
-                
-                # Format response data with separate Die Cut calculations
-                response = {
-                    "success": True,
-                    "week": week,
-                    "period": f"{sheet_result['week_start']} to {sheet_result['week_end']}",
-                    "averages": {
-                        "oee": {
-                            "die_cut_1": {
-                                "first_shift": round(first_dc1_oee_avg, 1) if first_dc1_oee_avg > 0 else 0,
-                                "second_shift": round(second_dc1_oee_avg, 1) if second_dc1_oee_avg > 0 else 0,
-                                "both_shifts": round(both_dc1_oee_avg, 1) if both_dc1_oee_avg > 0 else 0
-                            },
-                            "die_cut_2": {
-                                "first_shift": round(first_dc2_oee_avg, 1) if first_dc2_oee_avg > 0 else 0,
-                                "second_shift": round(second_dc2_oee_avg, 1) if second_dc2_oee_avg > 0 else 0,
-                                "both_shifts": round(both_dc2_oee_avg, 1) if both_dc2_oee_avg > 0 else 0
-                            },
-                            "total": {
-                                "first_shift": round(first_total_oee_avg, 1) if first_total_oee_avg > 0 else 0,
-                                "second_shift": round(second_total_oee_avg, 1) if second_total_oee_avg > 0 else 0,
-                                "both_shifts": round(both_total_oee_avg, 1) if both_total_oee_avg > 0 else 0
-                            }
-                        },
-                        "volume": {
-                            "die_cut_1": {
-                                "first_shift": round(first_dc1_volume_total, 0) if first_dc1_volume_total > 0 else 0,
-                                "second_shift": round(second_dc1_volume_total, 0) if second_dc1_volume_total > 0 else 0,
-                                "both_shifts": round(both_dc1_volume_total, 0) if both_dc1_volume_total > 0 else 0
-                            },
-                            "die_cut_2": {
-                                "first_shift": round(first_dc2_volume_total, 0) if first_dc2_volume_total > 0 else 0,
-                                "second_shift": round(second_dc2_volume_total, 0) if second_dc2_volume_total > 0 else 0,
-                                "both_shifts": round(both_dc2_volume_total, 0) if both_dc2_volume_total > 0 else 0
-                            },
-                            "total": {
-                                "first_shift": round(first_total_volume_total, 0) if first_total_volume_total > 0 else 0,
-                                "second_shift": round(second_total_volume_total, 0) if second_total_volume_total > 0 else 0,
-                                "both_shifts": round(both_total_volume_total, 0) if both_total_volume_total > 0 else 0
-                            }
-                        },
-                        "waste": {
-                            "pounds": {
-                                "die_cut_1": {
-                                    "first_shift": round(first_dc1_waste_total, 1) if first_dc1_waste_total > 0 else 0,
-                                    "second_shift": round(second_dc1_waste_total, 1) if second_dc1_waste_total > 0 else 0,
-                                    "both_shifts": round(both_dc1_waste_total, 1) if both_dc1_waste_total > 0 else 0
-                                },
-                                "die_cut_2": {
-                                    "first_shift": round(first_dc2_waste_total, 1) if first_dc2_waste_total > 0 else 0,
-                                    "second_shift": round(second_dc2_waste_total, 1) if second_dc2_waste_total > 0 else 0,
-                                    "both_shifts": round(both_dc2_waste_total, 1) if both_dc2_waste_total > 0 else 0
-                                },
-                                "total": {
-                                    "first_shift": round(first_total_waste_total, 1) if first_total_waste_total > 0 else 0,
-                                    "second_shift": round(second_total_waste_total, 1) if second_total_waste_total > 0 else 0,
-                                    "both_shifts": round(both_total_waste_total, 1) if both_total_waste_total > 0 else 0
-                                }
-                            },
-                            "percentage": {
-                                "die_cut_1": {
-                                    "first_shift": round((first_dc1_waste_total / first_dc1_volume_total * 100), 1) if first_dc1_volume_total > 0 else 0,
-                                    "second_shift": round((second_dc1_waste_total / second_dc1_volume_total * 100), 1) if second_dc1_volume_total > 0 else 0,
-                                    "both_shifts": round((both_dc1_waste_total / both_dc1_volume_total * 100), 1) if both_dc1_volume_total > 0 else 0
-                                },
-                                "die_cut_2": {
-                                    "first_shift": round((first_dc2_waste_total / first_dc2_volume_total * 100), 1) if first_dc2_volume_total > 0 else 0,
-                                    "second_shift": round((second_dc2_waste_total / second_dc2_volume_total * 100), 1) if second_dc2_volume_total > 0 else 0,
-                                    "both_shifts": round((both_dc2_waste_total / both_dc2_volume_total * 100), 1) if both_dc2_volume_total > 0 else 0
-                                },
-                                "total": {
-                                    "first_shift": round((first_total_waste_total / first_total_volume_total * 100), 1) if first_total_volume_total > 0 else 0,
-                                    "second_shift": round((second_total_waste_total / second_total_volume_total * 100), 1) if second_total_volume_total > 0 else 0,
-                                    "both_shifts": round((both_total_waste_total / both_total_volume_total * 100), 1) if both_total_volume_total > 0 else 0
-                                }
-                            }
-                        }
-                    },
-                    "data_points": {
-                        "first_shift_count": len(first_shift_data),
-                        "second_shift_count": len(second_shift_data),
-                        "both_shifts_count": len(both_shifts_data),
-                        "week_submissions": len(week_submissions)
-                    }
-                }
-                
-                logger.info(f"Week average calculated for {week}: {response['averages']}")
-                return jsonify(response)
+            rollup = load_weekly_rollup(conn, week)
+
+        if not rollup['data_points']['week_submissions']:
+            return jsonify({
+                "success": False,
+                "error": "No data found for the selected week"
+            }), 404
+
+        response = {
+            "success": True,
+            "week": week,
+            "period": f"{sheet_result['week_start']} to {sheet_result['week_end']}",
+            "averages": rollup['week_average'],
+            "data_points": rollup['data_points']
+        }
+        
+        logger.info(f"Week average calculated for {week}: {response['averages']}")
+        return jsonify(response)
 
     except Exception as e:
         logger.error(f"Week average calculation error: {e}")
@@ -13766,12 +15897,17 @@ def get_week_average():
 @app.route('/api/employees', methods=['GET'])
 @login_required
 def get_employees():
-    """Get all employees"""
+    """Get employees, newest first; pass limit/cursor to page through them"""
     try:
+        if 'limit' in request.args or 'cursor' in request.args:
+            limit, cursor, include_total = keyset_request_args(default_limit=KEYSET_MAX_LIMIT)
+        else:
+            # The admin list and vacation employee pickers load everyone at once
+            limit, cursor, include_total = None, None, False
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 # Use lowercase column names as they exist in the database
-                cur.execute("""
+                rows, pagination = fetch_keyset_page(cur, """
                     SELECT 
                         e.id,
                         e.firstname,
@@ -13800,11 +15936,11 @@ def get_employees():
                         e.vacation_schedule_hours
                     FROM employees e
                     LEFT JOIN users u ON e.user_id = u.id
-                    ORDER BY e.created_at DESC
-                """)
+                """, (), ('e.created_at', 'e.id'), limit, cursor,
+                    row_key=lambda row: (row[13], row[0]), include_total=include_total)
                 
                 employees = []
-                for row in cur.fetchall():
+                for row in rows:
                     employees.append({
                         'id': row[0],
                         'firstname': row[1],
@@ -13835,9 +15971,15 @@ def get_employees():
         
         return jsonify({
             'success': True,
-            'employees': employees
+            'employees': employees,
+            'pagination': pagination
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Get employees error: {e}")
         return jsonify({
@@ -14062,6 +16204,7 @@ def create_employee():
                 
                 employee_id, created_at = cur.fetchone()
                 conn.commit()
+                update_vacation_absence_index()
         
         return jsonify({
             'success': True,
@@ -14213,6 +16356,7 @@ def update_employee(employee_id):
                 
                 updated_at = cur.fetchone()[0]
                 conn.commit()
+                update_vacation_absence_index()
         
         return jsonify({
             'success': True,
@@ -14255,6 +16399,7 @@ def delete_employee(employee_id):
                 
                 cur.execute("DELETE FROM employees WHERE id = %s", (employee_id,))
                 conn.commit()
+                update_vacation_absence_index()
         
         return jsonify({
             'success': True,
@@ -14451,6 +16596,11 @@ def create_vacation_request():
         start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date
         end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date
         
+        update_vacation_absence_index(
+            lambda index: index.add(vacation_id, int(employee_id), start_date_obj, end_date_obj)
+        )
+        coverage = vacation_coverage_verdict(employee_id, start_date_obj, end_date_obj)
+        
         notification_title = "Vacation Request Submitted"
         notification_message = f"Your vacation request for {start_date_obj.strftime('%b %d')} - {end_date_obj.strftime('%b %d, %Y')} has been submitted and is pending approval."
         
@@ -14468,7 +16618,8 @@ def create_vacation_request():
             'success': True,
             'message': 'Vacation request created successfully',
             'vacation_id': vacation_id,
-            'created_at': created_at.isoformat() if created_at else None
+            'created_at': created_at.isoformat() if created_at else None,
+            'coverage': coverage
         })
         
     except Exception as e:
@@ -14740,6 +16891,10 @@ def approve_vacation(vacation_id):
                 
                 conn.commit()
                 
+                update_vacation_absence_index(
+                    lambda index: index.add(vacation_id, vacation['employee_id'], vacation['start_date'], vacation['end_date'])
+                )
+                
                 # Create notification for the employee
                 notification_title = "Vacation Request Approved"
                 notification_message = f"Your vacation request for {vacation['start_date'].strftime('%b %d')} - {vacation['end_date'].strftime('%b %d, %Y')} has been approved."
@@ -14806,6 +16961,8 @@ def deny_vacation(vacation_id):
                 
                 conn.commit()
                 
+                update_vacation_absence_index(lambda index: index.remove(vacation_id))
+                
                 # Create notification for the employee
                 notification_title = "Vacation Request Denied"
                 notification_message = f"Your vacation request for {vacation['start_date'].strftime('%b %d')} - {vacation['end_date'].strftime('%b %d, %Y')} was not approved. Reason: {decision_reason}"
@@ -15008,6 +17165,10 @@ def update_vacation_request(vacation_id):
                 updated_vacation = cur.fetchone()
                 conn.commit()
                 
+                update_vacation_absence_index(
+                    lambda index: index.add(vacation_id, vacation['employee_id'], start, end)
+                )
+                
                 # Calculate duration for activity log
                 duration_days = 0
                 current = start
@@ -15051,7 +17212,8 @@ def update_vacation_request(vacation_id):
                         'start_date': updated_vacation['start_date'].strftime('%Y-%m-%d'),
                         'end_date': updated_vacation['end_date'].strftime('%Y-%m-%d'),
                         'duration_days': updated_vacation['duration_days']
-                    }
+                    },
+                    'coverage': vacation_coverage_verdict(vacation['employee_id'], start, end)
                 })
                 
     except Exception as e:
@@ -15069,8 +17231,7 @@ def get_vacation_activity_log():
     try:
         # Get query parameters
         activity_type = request.args.get('type', 'all')  # all, approvals, denials, modifications, new_requests
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
+        limit, cursor, include_total = keyset_request_args()
         
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -15104,6 +17265,9 @@ def get_vacation_activity_log():
                     LEFT JOIN users requester ON v.requested_by_user_id = requester.id
                 """
                 
+                # Most recent activity first: whichever of created/updated/decided is latest
+                activity_key = "GREATEST(v.created_at, COALESCE(v.updated_at, v.created_at), COALESCE(v.decided_at, v.created_at))"
+                
                 # Add filters based on activity type
                 where_clauses = []
                 if activity_type == 'approvals':
@@ -15115,15 +17279,10 @@ def get_vacation_activity_log():
                 elif activity_type == 'modifications':
                     where_clauses.append("v.updated_at > v.created_at + INTERVAL '1 minute'")
                 
-                if where_clauses:
-                    query += " WHERE " + " AND ".join(where_clauses)
-                
-                # Order by most recent activity first
-                query += " ORDER BY GREATEST(v.created_at, COALESCE(v.updated_at, v.created_at), COALESCE(v.decided_at, v.created_at)) DESC"
-                query += " LIMIT %s OFFSET %s"
-                
-                cur.execute(query, (limit, offset))
-                activities = cur.fetchall()
+                activities, pagination = fetch_keyset_page(
+                    cur, query, (), (activity_key, 'v.id'), limit, cursor, conditions=where_clauses,
+                    row_key=lambda row: (max(t for t in (row['created_at'], row['updated_at'], row['decided_at']) if t), row['id']),
+                    include_total=include_total)
                 
                 # Process activities to determine activity type and format data
                 result = []
@@ -15186,9 +17345,14 @@ def get_vacation_activity_log():
                     'activities': result,
                     'count': len(result),
                     'limit': limit,
-                    'offset': offset
+                    'pagination': pagination
                 })
                 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Get vacation activity log error: {e}")
         return jsonify({
@@ -15328,6 +17492,7 @@ def create_blackout_period():
                 
                 new_id = cur.fetchone()['id']
                 conn.commit()
+                update_vacation_absence_index()
                 
                 return jsonify({
                     'success': True,
@@ -15383,6 +17548,7 @@ def update_blackout_period(period_id):
                 ))
                 
                 conn.commit()
+                update_vacation_absence_index()
                 
                 return jsonify({
                     'success': True,
@@ -15417,6 +17583,7 @@ def delete_blackout_period(period_id):
                 # Delete the period
                 cur.execute("DELETE FROM vacation_blackout_periods WHERE id = %s", (period_id,))
                 conn.commit()
+                update_vacation_absence_index()
                 
                 return jsonify({
                     'success': True,
@@ -15459,6 +17626,7 @@ def update_vacation_settings():
                 ))
                 
                 conn.commit()
+                update_vacation_absence_index()
                 
                 return jsonify({
                     'success': True,
@@ -15736,6 +17904,367 @@ def get_employee_departments():
             'message': str(e)
         }), 500
 
+# Vacation conflict engine
+# Approved and pending requests overlapping the horizon are loaded once (through a GiST
+# index on their date range) and swept in date order: each request is a +1 event on its
+# first day and a -1 event the day after its last, so the number of employees off only
+# changes at event dates and every over-limit window falls out of a single pass.
+VACATION_CONFLICT_LOOKBACK_DAYS = 30
+VACATION_CONFLICT_HORIZON_DAYS = int(os.getenv('VACATION_CONFLICT_HORIZON_DAYS', '90'))
+VACATION_CONFLICT_MAX_HORIZON_DAYS = 366
+
+def ensure_vacation_conflict_index(cur):
+    """GiST index on active requests' date ranges for the conflict engine's overlap scans."""
+    cur.execute("SELECT to_regclass('vacation') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_vacation_active_daterange ON vacation
+            USING gist (daterange(start_date, end_date, '[]'))
+            WHERE status IN ('approved', 'pending')
+        """)
+
+def load_vacation_intervals(cursor, window_start, window_end, exclude_employee_id=None):
+    """Approved/pending requests overlapping [window_start, window_end], clipped to it."""
+    cursor.execute("""
+        SELECT
+            v.id,
+            v.employee_id,
+            e.firstname || ' ' || e.lastname as employee_name,
+            e.role,
+            e.workarea,
+            v.status,
+            GREATEST(v.start_date, %s::date) as start_date,
+            LEAST(v.end_date, %s::date) as end_date,
+            v.start_date as requested_start,
+            v.end_date as requested_end
+        FROM vacation v
+        JOIN employees e ON v.employee_id = e.id
+        WHERE v.status IN ('approved', 'pending')
+        AND daterange(v.start_date, v.end_date, '[]') && daterange(%s::date, %s::date, '[]')
+        AND v.employee_id IS DISTINCT FROM %s
+    """, (window_start, window_end, window_start, window_end, exclude_employee_id))
+    return cursor.fetchall()
+
+def sweep_absences(intervals, threshold):
+    """Sweep request start/end events in date order.
+
+    Returns (peak, periods): the most employees off on any single day, and each maximal
+    run of days with more than `threshold` employees off, with its start/end date, peak
+    count and the requests active during it. A negative threshold is treated as 0:
+    every day ends with nobody off, so a period can always close.
+    """
+    threshold = max(threshold, 0)
+    events = []
+    for index, interval in enumerate(intervals):
+        events.append((interval['start_date'], 1, index))
+        events.append((interval['end_date'] + timedelta(days=1), -1, index))
+    # Ends sort before starts on the same day (an end event is the day after the last day off)
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    active = {}
+    employees_off = {}
+    peak = 0
+    periods = []
+    current = None
+    position = 0
+    while position < len(events):
+        day = events[position][0]
+        while position < len(events) and events[position][0] == day:
+            _, delta, index = events[position]
+            employee_id = intervals[index]['employee_id']
+            if delta > 0:
+                active[index] = intervals[index]
+                employees_off[employee_id] = employees_off.get(employee_id, 0) + 1
+            else:
+                del active[index]
+                employees_off[employee_id] -= 1
+                if not employees_off[employee_id]:
+                    del employees_off[employee_id]
+            position += 1
+
+        count = len(employees_off)
+        peak = max(peak, count)
+        if count > threshold:
+            if current is None:
+                current = {'start_date': day, 'max_count': count, 'requests': {}}
+            current['max_count'] = max(current['max_count'], count)
+            current['requests'].update(active)
+        elif current is not None:
+            current['end_date'] = day - timedelta(days=1)
+            current['requests'] = sorted(current['requests'].values(), key=lambda request: request['requested_start'])
+            periods.append(current)
+            current = None
+
+    return peak, periods
+
+def conflict_request_summary(interval):
+    return {
+        'employee_name': interval['employee_name'],
+        'start_date': interval['requested_start'].isoformat(),
+        'end_date': interval['requested_end'].isoformat(),
+        'status': interval['status'],
+        'role': interval['role']
+    }
+
+def team_coverage_conflicts(cursor, intervals, min_coverage_percent):
+    """Coverage warnings for every role and work area whose staffing drops below the minimum."""
+    cursor.execute("""
+        SELECT role, workarea, GROUPING(role) as by_workarea, COUNT(*) as headcount
+        FROM employees
+        GROUP BY GROUPING SETS ((role), (workarea))
+    """)
+    conflicts = []
+    for team in cursor.fetchall():
+        dimension = 'workarea' if team['by_workarea'] else 'role'
+        name = team[dimension]
+        headcount = team['headcount']
+        if not name or headcount < 2:
+            continue
+
+        team_intervals = [interval for interval in intervals if interval[dimension] == name]
+        # Coverage is below the minimum once more than this many members are off together
+        allowed_off = headcount * (100 - min_coverage_percent) / 100
+        _, periods = sweep_absences(team_intervals, allowed_off)
+        for period in periods:
+            coverage = round((headcount - period['max_count']) / headcount * 100)
+            label = 'Work Area' if dimension == 'workarea' else 'Team'
+            conflicts.append({
+                'severity': 'critical' if period['max_count'] >= headcount else 'warning',
+                'title': f'{label} Coverage Warning - {name}',
+                'description': (
+                    f"{name} coverage drops to {coverage}% ({period['max_count']} of {headcount} off) "
+                    f"between {period['start_date'].strftime('%b %d')} and {period['end_date'].strftime('%b %d, %Y')} "
+                    f"(minimum {min_coverage_percent}%)"
+                ),
+                'conflicting_requests': [conflict_request_summary(request) for request in period['requests'][:5]],
+                'period': {
+                    'start': period['start_date'].strftime('%b %d, %Y'),
+                    'end': period['end_date'].strftime('%b %d, %Y')
+                }
+            })
+    return conflicts
+
+# Vacation absence index
+# Who is off on each day (approved or pending requests) is held per process together
+# with the blackout periods, team headcounts and absence limits, so checking a request
+# against coverage costs one dict lookup per requested day. Create, update, approve and
+# deny patch this worker's index in place and bump its generation (shared through the
+# response cache backend when one is configured) so other workers rebuild theirs; every
+# worker also rebuilds after VACATION_ABSENCE_INDEX_TTL seconds, or after
+# RESPONSE_CACHE_LOCAL_TTL when there is no shared backend to carry the generation.
+VACATION_ABSENCE_INDEX_TTL = int(os.getenv('VACATION_ABSENCE_INDEX_TTL', '600'))
+VACATION_ABSENCE_INDEX_TAG = 'vacation-absences'
+VACATION_PRECHECK_MAX_DAYS = 366
+_absence_index = {'index': None, 'generation': None, 'loaded_at': 0.0}
+_absence_index_lock = threading.Lock()
+
+class VacationAbsenceIndex:
+    """Per-day absences of active requests.
+
+    Once published in _absence_index, the index is patched in place, so every method
+    must then run under _absence_index_lock.
+    """
+
+    def __init__(self, max_simultaneous, min_coverage_percent, employee_roles, blackouts):
+        self.max_simultaneous = max_simultaneous
+        self.min_coverage_percent = min_coverage_percent
+        self.employee_roles = employee_roles
+        self.role_headcounts = {}
+        for role in employee_roles.values():
+            if role:
+                self.role_headcounts[role] = self.role_headcounts.get(role, 0) + 1
+        self.blackouts = blackouts
+        self.requests = {}  # vacation id -> (employee_id, start_date, end_date)
+        self.days = {}      # date -> {employee_id: number of their requests covering it}
+
+    def add(self, vacation_id, employee_id, start_date, end_date):
+        self.remove(vacation_id)
+        self.requests[vacation_id] = (employee_id, start_date, end_date)
+        day = start_date
+        while day <= end_date:
+            off = self.days.setdefault(day, {})
+            off[employee_id] = off.get(employee_id, 0) + 1
+            day += timedelta(days=1)
+
+    def remove(self, vacation_id):
+        existing = self.requests.pop(vacation_id, None)
+        if not existing:
+            return
+        employee_id, start_date, end_date = existing
+        day = start_date
+        while day <= end_date:
+            off = self.days.get(day)
+            if off and employee_id in off:
+                off[employee_id] -= 1
+                if not off[employee_id]:
+                    del off[employee_id]
+                if not off:
+                    del self.days[day]
+            day += timedelta(days=1)
+
+    def verdict(self, employee_id, start_date, end_date):
+        """Coverage verdict for `employee_id` being off from start_date to end_date.
+
+        The employee's own requests are ignored, so re-checking an edited request does
+        not count it twice.
+        """
+        role = self.employee_roles.get(employee_id)
+        team_size = self.role_headcounts.get(role, 0) if role else 0
+        allowed_team_off = team_size * (100 - self.min_coverage_percent) / 100
+        peak_off = 0
+        days_over_limit = []
+        team_days_below_coverage = []
+
+        day = start_date
+        while day <= end_date:
+            others = [other for other in self.days.get(day, ()) if other != employee_id]
+            total_off = len(others) + 1
+            peak_off = max(peak_off, total_off)
+            if total_off > self.max_simultaneous:
+                days_over_limit.append(day.isoformat())
+            if team_size > 1:
+                team_off = sum(1 for other in others if self.employee_roles.get(other) == role) + 1
+                if team_off > allowed_team_off:
+                    team_days_below_coverage.append(day.isoformat())
+            day += timedelta(days=1)
+
+        blackout_overlaps = [
+            {
+                'name': blackout['name'],
+                'start_date': blackout['start_date'].isoformat(),
+                'end_date': blackout['end_date'].isoformat()
+            }
+            for blackout in self.blackouts
+            if blackout['start_date'] <= end_date and blackout['end_date'] >= start_date
+        ]
+
+        return {
+            'ok': not (days_over_limit or team_days_below_coverage or blackout_overlaps),
+            'peak_off': peak_off,
+            'max_simultaneous': self.max_simultaneous,
+            'days_over_limit': days_over_limit,
+            'role': role,
+            'team_size': team_size,
+            'min_team_coverage_percent': self.min_coverage_percent,
+            'team_days_below_coverage': team_days_below_coverage,
+            'blackout_overlaps': blackout_overlaps
+        }
+
+def build_vacation_absence_index():
+    """Load limits, team roles, blackout periods and active requests into a fresh index."""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT max_simultaneous_absences, min_team_coverage_percent FROM vacation_settings LIMIT 1")
+            settings = cur.fetchone() or {}
+
+            cur.execute("SELECT id, role FROM employees")
+            employee_roles = {row['id']: row['role'] for row in cur.fetchall()}
+
+            cur.execute("""
+                SELECT name, start_date, end_date
+                FROM vacation_blackout_periods
+                WHERE is_active = TRUE AND end_date >= CURRENT_DATE
+                ORDER BY start_date
+            """)
+            blackouts = cur.fetchall()
+
+            max_simultaneous = settings.get('max_simultaneous_absences')
+            min_coverage = settings.get('min_team_coverage_percent')
+            index = VacationAbsenceIndex(
+                3 if max_simultaneous is None else max_simultaneous,
+                70 if min_coverage is None else min_coverage,
+                employee_roles,
+                blackouts
+            )
+
+            cur.execute("""
+                SELECT id, employee_id, start_date, end_date
+                FROM vacation
+                WHERE status IN ('approved', 'pending')
+                AND end_date >= CURRENT_DATE - %s
+            """, (VACATION_CONFLICT_LOOKBACK_DAYS,))
+            for row in cur.fetchall():
+                index.add(row['id'], row['employee_id'], row['start_date'], row['end_date'])
+    return index
+
+def get_vacation_absence_index():
+    generation = response_cache.tag_generation(VACATION_ABSENCE_INDEX_TAG)
+    with _absence_index_lock:
+        if (_absence_index['index'] is not None
+                and _absence_index['generation'] == generation
+                and time.monotonic() - _absence_index['loaded_at'] < response_cache.generation_ttl(VACATION_ABSENCE_INDEX_TTL)):
+            return _absence_index['index']
+
+    index = build_vacation_absence_index()
+    with _absence_index_lock:
+        # Stored under the generation read before loading, so a change that lands
+        # mid-load forces another rebuild next time
+        _absence_index.update(index=index, generation=generation, loaded_at=time.monotonic())
+    return index
+
+def update_vacation_absence_index(apply=None):
+    """Patch this worker's index with `apply(index)` and make every other worker rebuild.
+
+    Without `apply` (settings, roles or blackout periods changed) the local index is
+    dropped as well.
+    """
+    previous = response_cache.tag_generation(VACATION_ABSENCE_INDEX_TAG)
+    response_cache.invalidate([VACATION_ABSENCE_INDEX_TAG])
+    generation = response_cache.tag_generation(VACATION_ABSENCE_INDEX_TAG)
+    with _absence_index_lock:
+        index = _absence_index['index']
+        if index is None:
+            return
+        # Only patch an index that was current; one that already missed a change is rebuilt
+        if apply is None or _absence_index['generation'] != previous:
+            _absence_index['index'] = None
+            return
+        apply(index)
+        _absence_index['generation'] = generation
+
+def vacation_coverage_verdict(employee_id, start_date, end_date):
+    """Coverage verdict for a prospective request, or None when the index is unavailable."""
+    try:
+        index = get_vacation_absence_index()
+        # Other threads patch the shared index in place under this lock
+        with _absence_index_lock:
+            return index.verdict(int(employee_id), start_date, end_date)
+    except Exception as e:
+        logger.warning(f"Vacation coverage pre-check failed: {e}")
+        return None
+
+@app.route('/api/vacation/precheck', methods=['GET'])
+@login_required
+def precheck_vacation_request():
+    """Check a prospective request against absence limits, team coverage and blackout periods"""
+    try:
+        employee_id = request.args.get('employee_id', type=int)
+        start_date = datetime.strptime(request.args.get('start_date', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'employee_id, start_date and end_date (YYYY-MM-DD) are required'
+        }), 400
+
+    if employee_id is None or end_date < start_date or (end_date - start_date).days >= VACATION_PRECHECK_MAX_DAYS:
+        return jsonify({
+            'success': False,
+            'message': f'Provide an employee and a date range of at most {VACATION_PRECHECK_MAX_DAYS} days'
+        }), 400
+
+    try:
+        index = get_vacation_absence_index()
+        with _absence_index_lock:
+            coverage = index.verdict(employee_id, start_date, end_date)
+        return jsonify({'success': True, 'coverage': coverage})
+    except Exception as e:
+        logger.error(f"Vacation pre-check error: {e}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @app.route('/api/vacation/conflicts', methods=['GET'])
 @login_required
 def get_vacation_conflicts():
@@ -15757,93 +18286,35 @@ def get_vacation_conflicts():
                         'max_simultaneous_absences': 3
                     }
                 
-                max_simultaneous = settings.get('max_simultaneous_absences', 3)
+                max_simultaneous = settings.get('max_simultaneous_absences')
+                if max_simultaneous is None:
+                    max_simultaneous = 3
+                # 0% is a valid setting (no coverage requirement), so only a missing value defaults
+                min_coverage = settings.get('min_team_coverage_percent')
+                if min_coverage is None:
+                    min_coverage = 70
                 
                 logger.info(f"Checking for conflicts with max_simultaneous_absences: {max_simultaneous}")
                 
-                # Check for overlapping vacations across the company
-                # Find all dates where more people are on vacation than allowed
-                cursor.execute("""
-                    WITH date_series AS (
-                        SELECT generate_series(
-                            CURRENT_DATE - INTERVAL '30 days',
-                            CURRENT_DATE + INTERVAL '90 days',
-                            '1 day'::interval
-                        )::date as check_date
-                    ),
-                    vacations_per_day AS (
-                        SELECT 
-                            ds.check_date,
-                            COUNT(DISTINCT v.id) as vacation_count,
-                            array_agg(
-                                DISTINCT jsonb_build_object(
-                                    'employee_name', e.firstname || ' ' || e.lastname,
-                                    'start_date', v.start_date,
-                                    'end_date', v.end_date,
-                                    'status', v.status,
-                                    'role', e.role
-                                )
-                            ) FILTER (WHERE v.id IS NOT NULL) as employees_off
-                        FROM date_series ds
-                        LEFT JOIN vacation v ON ds.check_date BETWEEN v.start_date AND v.end_date
-                            AND (v.status = 'approved' OR v.status = 'pending')
-                        LEFT JOIN employees e ON v.employee_id = e.id
-                        GROUP BY ds.check_date
-                        HAVING COUNT(DISTINCT v.id) > %s
-                        ORDER BY ds.check_date
-                        LIMIT 10
-                    )
-                    SELECT 
-                        check_date,
-                        vacation_count,
-                        employees_off
-                    FROM vacations_per_day
-                """, (max_simultaneous,))
-                
-                conflicts_by_date = cursor.fetchall()
-                
-                logger.info(f"Found {len(conflicts_by_date)} conflict dates")
-                
-                # Group consecutive dates into conflict periods
-                conflict_periods = []
-                if conflicts_by_date:
-                    current_period = {
-                        'start_date': conflicts_by_date[0]['check_date'],
-                        'end_date': conflicts_by_date[0]['check_date'],
-                        'max_count': conflicts_by_date[0]['vacation_count'],
-                        'all_employees': conflicts_by_date[0]['employees_off']
-                    }
-                    
-                    for row in conflicts_by_date[1:]:
-                        # If consecutive day, extend period
-                        if (row['check_date'] - current_period['end_date']).days == 1:
-                            current_period['end_date'] = row['check_date']
-                            current_period['max_count'] = max(current_period['max_count'], row['vacation_count'])
-                            # Merge employee lists
-                            for emp in row['employees_off']:
-                                if emp not in current_period['all_employees']:
-                                    current_period['all_employees'].append(emp)
-                        else:
-                            # Save current period and start new one
-                            conflict_periods.append(current_period)
-                            current_period = {
-                                'start_date': row['check_date'],
-                                'end_date': row['check_date'],
-                                'max_count': row['vacation_count'],
-                                'all_employees': row['employees_off']
-                            }
-                    
-                    # Don't forget the last period
-                    conflict_periods.append(current_period)
+                # Load every active request in the horizon once and sweep it
+                horizon_days = max(1, min(request.args.get('days', VACATION_CONFLICT_HORIZON_DAYS, type=int),
+                                          VACATION_CONFLICT_MAX_HORIZON_DAYS))
+                today = datetime.now().date()
+                window_start = today - timedelta(days=VACATION_CONFLICT_LOOKBACK_DAYS)
+                window_end = today + timedelta(days=horizon_days)
+                intervals = load_vacation_intervals(cursor, window_start, window_end)
+                
+                # Company-wide: windows where more people are off than allowed
+                _, conflict_periods = sweep_absences(intervals, max_simultaneous)
+                
+                logger.info(f"Found {len(conflict_periods)} conflict periods across {len(intervals)} requests")
                 
                 # Create conflict cards from periods
-                for period in conflict_periods:
-                    # Get unique employees in this period
+                for period in conflict_periods[:10]:
+                    # One entry per employee in this period
                     unique_employees = {}
-                    for emp_obj in period['all_employees']:
-                        key = emp_obj['employee_name']
-                        if key not in unique_employees:
-                            unique_employees[key] = emp_obj
+                    for interval in period['requests']:
+                        unique_employees.setdefault(interval['employee_name'], conflict_request_summary(interval))
                     
                     conflicting_requests = list(unique_employees.values())
                     
@@ -15858,74 +18329,8 @@ def get_vacation_conflicts():
                         }
                     })
                 
-                # Also check for overlapping vacations by role/department
-                cursor.execute("""
-                    WITH overlapping_vacations AS (
-                        SELECT 
-                            v1.id as vacation1_id,
-                            v1.employee_id as employee1_id,
-                            e1.firstname || ' ' || e1.lastname as employee1_name,
-                            e1.role as role,
-                            v1.start_date as start1,
-                            v1.end_date as end1,
-                            v2.id as vacation2_id,
-                            v2.employee_id as employee2_id,
-                            e2.firstname || ' ' || e2.lastname as employee2_name,
-                            v2.start_date as start2,
-                            v2.end_date as end2
-                        FROM vacation v1
-                        JOIN employees e1 ON v1.employee_id = e1.id
-                        JOIN vacation v2 ON v1.id < v2.id 
-                        JOIN employees e2 ON v2.employee_id = e2.id
-                        WHERE 
-                            e1.role = e2.role
-                            AND e1.role IS NOT NULL
-                            AND (v1.status = 'approved' OR v1.status = 'pending')
-                            AND (v2.status = 'approved' OR v2.status = 'pending')
-                            AND (
-                                (v1.start_date <= v2.end_date AND v1.end_date >= v2.start_date)
-                            )
-                            AND v1.start_date >= CURRENT_DATE - INTERVAL '7 days'
-                    )
-                    SELECT 
-                        role,
-                        COUNT(*) as overlap_count,
-                        array_agg(
-                            json_build_object(
-                                'employee_name', employee1_name,
-                                'start_date', start1,
-                                'end_date', end1
-                            )
-                        ) || array_agg(
-                            json_build_object(
-                                'employee_name', employee2_name,
-                                'start_date', start2,
-                                'end_date', end2
-                            )
-                        ) as conflicting_requests
-                    FROM overlapping_vacations
-                    GROUP BY role
-                    HAVING COUNT(*) >= 1
-                """)
-                
-                overlaps = cursor.fetchall()
-                
-                for overlap in overlaps:
-                    # Remove duplicates from conflicting_requests
-                    seen = set()
-                    unique_requests = []
-                    for req in overlap['conflicting_requests']:
-                        key = (req['employee_name'], str(req['start_date']), str(req['end_date']))
-                        if key not in seen:
-                            seen.add(key)
-                            unique_requests.append(req)
-                    
-                    conflicts.append({
-                        'severity': 'warning',
-                        'title': f'Team Coverage Warning - {overlap["role"]}',
-                        'description': 'Multiple team members requesting overlapping vacation dates',
-                        'conflicting_requests': unique_requests[:5]  # Limit to 5 for display
-                    })
+                # Per-role and per-work-area coverage against the minimum team coverage
+                conflicts.extend(team_coverage_conflicts(cursor, intervals, min_coverage))
                 
                 # Check for blackout period violations
                 cursor.execute("""
@@ -16788,7 +19193,9 @@ def get_my_vacation_conflicts():
                         'max_simultaneous_absences': 3
                     }
                 
-                max_simultaneous = settings.get('max_simultaneous_absences', 3)
+                max_simultaneous = settings.get('max_simultaneous_absences')
+                if max_simultaneous is None:
+                    max_simultaneous = 3
                 
                 # Get employee's approved and pending vacation requests
                 cursor.execute("""
@@ -16808,50 +19215,44 @@ def get_my_vacation_conflicts():
                 
                 my_vacations = cursor.fetchall()
                 
+                # Load everyone else's requests over the span of mine once, then sweep per request
+                others = []
+                if my_vacations:
+                    others = load_vacation_intervals(
+                        cursor,
+                        min(vac['start_date'] for vac in my_vacations),
+                        max(vac['end_date'] for vac in my_vacations),
+                        exclude_employee_id=employee_id
+                    )
+                
                 # For each vacation, check for conflicts
                 for vac in my_vacations:
-                    # Check how many other people are off during this period
-                    cursor.execute("""
-                        SELECT 
-                            COUNT(DISTINCT v.id) as overlapping_count,
-                            array_agg(
-                                DISTINCT jsonb_build_object(
-                                    'employee_name', e.firstname || ' ' || e.lastname,
-                                    'start_date', v.start_date,
-                                    'end_date', v.end_date,
-                                    'status', v.status
-                                )
-                            ) FILTER (WHERE v.id IS NOT NULL AND v.id != %s) as other_employees
-                        FROM vacation v
-                        JOIN employees e ON v.employee_id = e.id
-                        WHERE (v.status = 'approved' OR v.status = 'pending')
-                        AND v.employee_id != %s
-                        AND (
-                            (v.start_date BETWEEN %s AND %s)
-                            OR (v.end_date BETWEEN %s AND %s)
-                            OR (v.start_date <= %s AND v.end_date >= %s)
-                        )
-                    """, (
-                        vac['id'], 
-                        employee_id,
-                        vac['start_date'], vac['end_date'],
-                        vac['start_date'], vac['end_date'],
-                        vac['start_date'], vac['end_date']
-                    ))
-                    
-                    overlap_data = cursor.fetchone()
-                    total_off = overlap_data['overlapping_count'] + 1  # +1 for current employee
+                    overlapping = [
+                        dict(other, start_date=max(other['start_date'], vac['start_date']),
+                             end_date=min(other['end_date'], vac['end_date']))
+                        for other in others
+                        if other['start_date'] <= vac['end_date'] and other['end_date'] >= vac['start_date']
+                    ]
+                    # Peak number of others off on any one day of this request
+                    peak_others, periods = sweep_absences(overlapping, max_simultaneous - 1)
+                    total_off = peak_others + 1  # +1 for current employee
                     
                     if total_off > max_simultaneous:
                         # Create conflict entry
                         start_str = vac['start_date'].strftime('%b %d')
                         end_str = vac['end_date'].strftime('%b %d, %Y')
                         
+                        # Requests active while the limit is exceeded
+                        conflicting = {}
+                        for period in periods:
+                            for other in period['requests']:
+                                conflicting.setdefault(other['id'], conflict_request_summary(other))
+                        
                         conflicts.append({
                             'severity': 'critical' if total_off > max_simultaneous + 1 else 'warning',
                             'title': f'Scheduling Conflict: {start_str} - {end_str}',
                             'description': f'{total_off} employees requesting time off (maximum allowed: {max_simultaneous}). Your request may be affected.',
-                            'conflicting_requests': overlap_data['other_employees'][:10] if overlap_data['other_employees'] else [],
+                            'conflicting_requests': list(conflicting.values())[:10],
                             'details': {
                                 'Your Request': f"{vac['status'].capitalize()} - {vac['duration_days']} days",
                                 'Total Employees Off': str(total_off),
@@ -17143,6 +19544,7 @@ def delete_work_area_setting(setting_id):
 
 @app.route('/api/assets', methods=['GET'])
 @login_required
+@conditional_get(table_version('assets'))
 def get_assets():
     """Get current active assets configuration"""
     try:
@@ -17690,6 +20092,7 @@ def get_ticket(ticket_id):
 
 @app.route('/api/kpi-targets', methods=['GET'])
 @login_required
+@conditional_get(table_version('kpi_targets', columns=('updated_at',)))
 def get_kpi_targets():
     """Get current KPI target settings"""
     try:
@@ -17865,6 +20268,8 @@ def update_kpi_targets():
                                 updated_count += 1
                 
                 conn.commit()
+                invalidate_pdf_cache()
+                invalidate_response_cache()
                 
                 return jsonify({
                     'success': True,
@@ -7,26 +7,34 @@ class NotificationManager {
     this.permission = this.isSupported ? Notification.permission : 'denied';
     this.serviceWorkerRegistration = null;
     this.lastNotificationCheck = localStorage.getItem('lastNotificationCheck') || new Date(0).toISOString();
+    this.notificationCursor = localStorage.getItem('notificationCursor');
     
     this.init();
   }
 
   async init() {
+    // Register service worker (it also queues submissions made while offline)
+    await this.registerServiceWorker();
+
     if (!this.isSupported) {
       console.warn('Browser notifications not supported');
       return;
     }
-
-    // Register service worker
-    await this.registerServiceWorker();
     
     // Request permission if not already granted
     if (this.permission === 'default') {
       await this.requestPermission();
     }
 
-    // Start checking for new notifications
-    this.startNotificationPolling();
+    // Listen for new notifications (falls back to polling without SSE support)
+    this.startNotificationStream();
+
+    // Also check when page becomes visible again
+    document.addEventListener('visibilitychange', async () => {
+      if (document.visibilityState === 'visible') {
+        await this.checkForNewNotifications();
+      }
+    });
   }
 
   async registerServiceWorker() {
@@ -42,6 +50,23 @@ class NotificationManager {
         this.serviceWorkerRegistration.addEventListener('updatefound', () => {
           console.log('Service Worker update found');
         });
+
+        // Replay queued submissions as soon as the connection returns, for
+        // browsers without Background Sync
+        window.addEventListener('online', () => {
+          navigator.serviceWorker.controller?.postMessage({ type: 'replay-submissions' });
+        });
+        // Entries held back by an expired session or another user's login go out
+        // once a page loads under the right session
+        if (navigator.onLine) {
+          navigator.serviceWorker.controller?.postMessage({ type: 'replay-submissions' });
+        }
+
+        navigator.serviceWorker.addEventListener('message', event => {
+          if (event.data?.type === 'submission-replayed') {
+            this.handleSubmissionReplayed(event.data);
+          }
+        });
         
       } catch (error) {
         console.error('Service Worker registration failed:', error);
@@ -49,6 +74,19 @@ class NotificationManager {
     }
   }
 
+  handleSubmissionReplayed({ url, status }) {
+    const succeeded = status >= 200 && status < 300;
+    console.log(`Queued submission to ${url} replayed with status ${status}`);
+    if (this.permission === 'granted') {
+      new Notification(succeeded ? 'Offline submission sent' : 'Offline submission rejected', {
+        body: succeeded
+          ? 'A submission saved while offline has been delivered.'
+          : 'A submission saved while offline was rejected by the server. Please check and resubmit it.',
+        icon: '/static/avatar.png'
+      });
+    }
+  }
+
   async requestPermission() {
     if (!this.isSupported) return 'denied';
     
@@ -108,7 +146,11 @@ class NotificationManager {
 
   async checkForNewNotifications() {
     try {
-      const response = await fetch('/api/notifications', {
+      // Only pull what changed since the last cursor; the first call gets the full feed
+      const url = this.notificationCursor
+        ? `/api/notifications?since=${encodeURIComponent(this.notificationCursor)}`
+        : '/api/notifications';
+      const response = await fetch(url, {
         credentials: 'same-origin',
         headers: {
           'Accept': 'application/json',
@@ -116,33 +158,60 @@ class NotificationManager {
         }
       });
 
+      if (response.status === 400 && this.notificationCursor) {
+        // Stale or malformed cursor - start over with a full fetch
+        this.setNotificationCursor(null);
+        return await this.checkForNewNotifications();
+      }
+
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}: ${response.statusText}`);
       }
 
       const data = await response.json();
+      return await this.processNotifications(data);
+    } catch (error) {
+      console.error('Error checking for notifications:', error);
+      return [];
+    }
+  }
 
-      if (data.success && data.notifications) {
-        // Filter notifications newer than last check
-        const lastCheck = new Date(this.lastNotificationCheck);
-        const newNotifications = data.notifications.filter(notification => 
+  async processNotifications(data) {
+    if (!data.success || !data.notifications) {
+      return [];
+    }
+
+    // Cursor responses only contain undelivered rows, including ones that committed late
+    // with an older timestamp; a full feed is filtered to what is newer than the last check
+    const lastCheck = new Date(this.lastNotificationCheck);
+    const newNotifications = data.incremental
+      ? data.notifications
+      : data.notifications.filter(notification =>
           new Date(notification.created_at) > lastCheck
         );
 
-        // Show native notifications for new items
-        for (const notification of newNotifications) {
-          await this.showNotificationFromData(notification);
-        }
+    // Show native notifications for new items
+    for (const notification of newNotifications) {
+      await this.showNotificationFromData(notification);
+    }
 
-        // Update last check time
-        this.lastNotificationCheck = new Date().toISOString();
-        localStorage.setItem('lastNotificationCheck', this.lastNotificationCheck);
+    // Update last check time
+    this.lastNotificationCheck = new Date().toISOString();
+    localStorage.setItem('lastNotificationCheck', this.lastNotificationCheck);
 
-        return newNotifications;
-      }
-    } catch (error) {
-      console.error('Error checking for notifications:', error);
-      return [];
+    if (data.cursor) {
+      this.setNotificationCursor(data.cursor);
+    }
+
+    return newNotifications;
+  }
+
+  setNotificationCursor(cursor) {
+    this.notificationCursor = cursor;
+    if (cursor) {
+      localStorage.setItem('notificationCursor', cursor);
+    } else {
+      localStorage.removeItem('notificationCursor');
     }
   }
 
@@ -194,6 +263,39 @@ class NotificationManager {
     return await this.showNativeNotification(title, options);
   }
 
+  startNotificationStream() {
+    if (!('EventSource' in window)) {
+      this.startNotificationPolling();
+      return;
+    }
+
+    this.eventSource = new EventSource('/api/notifications/stream');
+
+    // The server pushes the whole feed whenever it changes
+    this.eventSource.addEventListener('notifications', async (event) => {
+      const data = JSON.parse(event.data);
+      window.dispatchEvent(new CustomEvent('bakery:notifications', { detail: data }));
+      if (document.visibilityState === 'hidden' || !document.hasFocus()) {
+        // Only show native notifications when app is in background
+        await this.processNotifications(data);
+      }
+    });
+
+    // Raw table changes, for pages that refresh other panels
+    this.eventSource.addEventListener('change', (event) => {
+      window.dispatchEvent(new CustomEvent('bakery:change', { detail: JSON.parse(event.data) }));
+    });
+
+    this.eventSource.addEventListener('error', () => {
+      // EventSource reconnects by itself; it only gives up when the server refuses the stream
+      if (this.eventSource.readyState === EventSource.CLOSED) {
+        console.warn('Notification stream unavailable, falling back to polling');
+        this.eventSource = null;
+        this.startNotificationPolling();
+      }
+    });
+  }
+
   startNotificationPolling() {
     // Check for new notifications every 30 seconds
     setInterval(async () => {
@@ -202,13 +304,6 @@ class NotificationManager {
         await this.checkForNewNotifications();
       }
     }, 30000);
-
-    // Also check when page becomes visible again
-    document.addEventListener('visibilitychange', async () => {
-      if (document.visibilityState === 'visible') {
-        await this.checkForNewNotifications();
-      }
-    });
   }
 
   // Enhanced notification with custom sounds
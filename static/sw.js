@@ -1,5 +1,5 @@
 // Service Worker for Native Push Notifications
-// Handles background push notifications and caching
+// Handles background push notifications, caching and the offline submission queue
 
 const CACHE_NAME = 'bakery-metrics-v1';
 const urlsToCache = [
@@ -37,8 +37,15 @@ self.addEventListener('activate', event => {
   );
 });
 
-// Fetch event - serve from cache when offline
+// Fetch event - queue floor submissions when offline, serve from cache otherwise
 self.addEventListener('fetch', event => {
+  const url = new URL(event.request.url);
+  if (event.request.method === 'POST' && url.origin === self.location.origin
+      && QUEUED_SUBMISSION_PATHS.includes(url.pathname) && event.request.mode !== 'navigate') {
+    event.respondWith(sendOrQueueSubmission(event.request));
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then(response => {
@@ -135,13 +142,170 @@ self.addEventListener('notificationclick', event => {
   );
 });
 
-// Background sync for offline notifications
+// Background sync for offline notifications and queued submissions
 self.addEventListener('sync', event => {
   if (event.tag === 'background-sync-notifications') {
     event.waitUntil(syncNotifications());
   }
+  if (event.tag === SUBMISSION_SYNC_TAG) {
+    event.waitUntil(replayQueuedSubmissions());
+  }
+});
+
+// Pages ask for a replay when they come back online (browsers without Background Sync)
+self.addEventListener('message', event => {
+  if (event.data?.type === 'replay-submissions') {
+    event.waitUntil(replayQueuedSubmissions().catch(error => {
+      console.log('Service Worker: Queued submissions still pending', error);
+    }));
+  }
 });
 
+// Offline submission queue
+// Submissions that fail to reach the server are stored in IndexedDB and replayed by
+// Background Sync (or when a page reports the connection is back). Every attempt
+// carries the same Idempotency-Key, so a replay of a submission the server already
+// processed gets the stored response instead of creating a second record. An entry is
+// only removed once the server answered it with JSON; a login page (expired session)
+// or a different user's session keeps it queued.
+const QUEUED_SUBMISSION_PATHS = ['/submit', '/submit-inventory', '/api/submit-issue'];
+const SUBMISSION_SYNC_TAG = 'submission-queue';
+const SUBMISSION_DB_NAME = 'bakery-metrics-offline';
+const SUBMISSION_STORE = 'submissions';
+const REPLAYED_HEADERS = ['content-type', 'x-requested-with', 'x-submitting-user'];
+
+async function sendOrQueueSubmission(request) {
+  const headers = {};
+  for (const name of REPLAYED_HEADERS) {
+    const value = request.headers.get(name);
+    if (value) headers[name] = value;
+  }
+  headers['idempotency-key'] = request.headers.get('idempotency-key') || crypto.randomUUID();
+  // Ask for JSON so login_required answers 401 instead of redirecting to the login page
+  headers['accept'] = 'application/json';
+
+  const submission = {
+    key: headers['idempotency-key'],
+    userId: headers['x-submitting-user'] || null,
+    url: request.url,
+    method: request.method,
+    headers: headers,
+    body: await request.arrayBuffer(),
+    queuedAt: Date.now()
+  };
+
+  try {
+    return await fetch(buildSubmissionRequest(submission));
+  } catch (error) {
+    console.log('Service Worker: Offline, queueing submission', submission.url);
+    await withSubmissionStore('readwrite', store => store.put(submission));
+    try {
+      await self.registration.sync.register(SUBMISSION_SYNC_TAG);
+    } catch (syncError) {
+      console.log('Service Worker: Background Sync unavailable, waiting for the page to come back online');
+    }
+
+    return new Response(JSON.stringify({
+      success: true,
+      queued: true,
+      message: 'You are offline. This submission was saved and will be sent automatically when the connection returns.'
+    }), {
+      status: 202,
+      headers: { 'Content-Type': 'application/json' }
+    });
+  }
+}
+
+function buildSubmissionRequest(submission, options = {}) {
+  return new Request(submission.url, {
+    method: submission.method,
+    headers: { ...submission.headers, accept: 'application/json' },
+    body: submission.body,
+    credentials: 'same-origin',
+    ...options
+  });
+}
+
+async function isUserMismatch(response) {
+  if (response.status !== 409) return false;
+  try {
+    const data = await response.clone().json();
+    return data.error_type === 'user_mismatch';
+  } catch (error) {
+    return false;
+  }
+}
+
+async function replayQueuedSubmissions() {
+  const submissions = await withSubmissionStore('readonly', store => store.getAll());
+  submissions.sort((a, b) => a.queuedAt - b.queuedAt);
+
+  let waitingForUser = 0;
+  for (const submission of submissions) {
+    // A network error propagates so Background Sync retries the rest later.
+    // Redirects are not followed: a redirect to /login must not look like success.
+    const response = await fetch(buildSubmissionRequest(submission, { redirect: 'manual' }));
+
+    // Expired sessions, server errors and in-flight duplicates are retried later
+    const contentType = response.headers.get('content-type') || '';
+    if (response.type === 'opaqueredirect' || response.status === 401 || response.status >= 500
+        || response.headers.has('Retry-After') || !contentType.includes('application/json')) {
+      throw new Error(`Replay of ${submission.url} deferred (HTTP ${response.status || response.type})`);
+    }
+
+    // Queued by someone else on this device - keep it until they log in again
+    if (await isUserMismatch(response)) {
+      waitingForUser++;
+      continue;
+    }
+
+    await withSubmissionStore('readwrite', store => store.delete(submission.key));
+    await notifySubmissionReplayed(submission, response);
+  }
+
+  if (waitingForUser) {
+    throw new Error(`${waitingForUser} queued submission(s) belong to another user`);
+  }
+}
+
+async function notifySubmissionReplayed(submission, response) {
+  const clientList = await clients.matchAll({ type: 'window', includeUncontrolled: true });
+  for (const client of clientList) {
+    client.postMessage({
+      type: 'submission-replayed',
+      url: new URL(submission.url).pathname,
+      status: response.status,
+      queuedAt: submission.queuedAt
+    });
+  }
+}
+
+function openSubmissionDb() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(SUBMISSION_DB_NAME, 1);
+    request.onupgradeneeded = () => {
+      request.result.createObjectStore(SUBMISSION_STORE, { keyPath: 'key' });
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+async function withSubmissionStore(mode, operation) {
+  const db = await openSubmissionDb();
+  try {
+    return await new Promise((resolve, reject) => {
+      const transaction = db.transaction(SUBMISSION_STORE, mode);
+      const request = operation(transaction.objectStore(SUBMISSION_STORE));
+      transaction.oncomplete = () => resolve(request.result);
+      transaction.onerror = () => reject(transaction.error);
+      transaction.onabort = () => reject(transaction.error);
+    });
+  } finally {
+    db.close();
+  }
+}
+
 async function syncNotifications() {
   try {
     const response = await fetch('/api/notifications');